@@ -17,6 +17,21 @@ if [ -z "$TURN_SECRET" ]; then
     exit 1
 fi
 
+if [ -z "$MEDIA_URL_SECRET" ]; then
+    echo "Error: MEDIA_URL_SECRET environment variable is not set."
+    exit 1
+fi
+
+# Serving the bucket without signed links is deprecated, see the location / block of the nginx template
+PUBLIC_BUCKET_COMPAT="${PUBLIC_BUCKET_COMPAT:-off}"
+if [ "$PUBLIC_BUCKET_COMPAT" != "on" ] && [ "$PUBLIC_BUCKET_COMPAT" != "off" ]; then
+    echo "Error: PUBLIC_BUCKET_COMPAT has to be on or off."
+    exit 1
+fi
+if [ "$PUBLIC_BUCKET_COMPAT" = "on" ]; then
+    echo "Warning: PUBLIC_BUCKET_COMPAT=on serves every capture without authentication, it goes away in the next major release."
+fi
+
 COTURN_CONF="coturn/turnserver.conf"
 
 cp coturn/turnserver.conf.template $COTURN_CONF
@@ -28,6 +43,8 @@ sed -i "s|\${TURN_SECRET}|$TURN_SECRET|g" "$COTURN_CONF"
 cp nginx/nginx.conf.template nginx/nginx.conf
 
 sed -i "s|\${DOMAIN_NAME}|$DOMAIN_NAME|g" nginx/nginx.conf
+sed -i "s|\${MEDIA_URL_SECRET}|$MEDIA_URL_SECRET|g" nginx/nginx.conf
+sed -i "s|\${PUBLIC_BUCKET_COMPAT}|$PUBLIC_BUCKET_COMPAT|g" nginx/nginx.conf
 
 chmod 644 "$COTURN_CONF"
 chmod 644 nginx/nginx.conf
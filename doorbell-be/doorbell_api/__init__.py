@@ -2,6 +2,7 @@ import logging
 import os
 import firebase_admin
 from contextlib import asynccontextmanager
+from dependency_injector.wiring import Provide, inject
 from fastapi import FastAPI
 from firebase_admin import credentials
 
@@ -9,14 +10,26 @@ from .api import router
 from .configs import DependencyInjector
 from .middlewares import setup_middlewares
 from .exceptions import setup_exception_handlers
+from .services import IRetentionService, ICaptureArchiveService, IRecordingService
 
 
+@inject
+def start_background_jobs(
+        retention_service: IRetentionService = Provide['retention_service'],
+        capture_archive_service: ICaptureArchiveService = Provide['capture_archive_service'],
+        # Built here so an aiortc that cannot be recorded from stops the startup, not the first live view
+        _recording_service: IRecordingService = Provide['recording_service']
+) -> None:
+    retention_service.start()
+    capture_archive_service.start()
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     cred = credentials.Certificate('./doorbell_api/firebase_credentials.json')
     firebase_admin.initialize_app(cred)
     logging.basicConfig()
+    start_background_jobs()
     yield
 
 
@@ -1,5 +1,5 @@
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, Query, Path
+from fastapi import APIRouter, Depends, Query, Path, Header, Request, Response
 from typing import List, Optional
 from ..dtos import CaptureDTO
 from ..controllers import ICaptureController
@@ -13,16 +13,79 @@ controller_name = "capture_controller"
 class CaptureVideoRequest(BaseModel):
     capture_paths: List[str]
 
+class CapturePathsRequest(BaseModel):
+    capture_paths: List[str]
+
 @capture_router.post(
 "",
     dependencies=[Depends(OAuth2Authorized)]
 )
 @inject
 async def generate_stop_motion_video(
-    request: CaptureVideoRequest,
+    request: Request,
+    body: CaptureVideoRequest,
+    if_none_match: Optional[str] = Header(None),
+    controller: ICaptureController = Depends(Provide[controller_name])
+):
+    return await controller.generate_cap_video(body.capture_paths, request.user.identity, if_none_match)
+
+
+@capture_router.get(
+    "/images/{path:path}",
+    dependencies=[Depends(OAuth2Authorized)]
+)
+@inject
+async def get_capture_image(
+    request: Request,
+    path: str,
+    w: Optional[int] = Query(None, ge=16, le=4096),
+    q: Optional[int] = Query(None, ge=1, le=100),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    controller: ICaptureController = Depends(Provide[controller_name])
+):
+    return await controller.get_capture_image(path, request.user.identity, accept, w, q, if_none_match)
+
+
+@capture_router.get(
+    "/videos/{job_id}",
+    dependencies=[Depends(OAuth2Authorized)]
+)
+@inject
+async def get_video_job(
+    request: Request,
+    job_id: str = Path(..., min_length=64, max_length=64),
+    controller: ICaptureController = Depends(Provide[controller_name])
+):
+    return await controller.get_video_job(job_id, request.user.identity)
+
+
+@capture_router.post(
+    "/signed-urls",
+    dependencies=[Depends(OAuth2Authorized)]
+)
+@inject
+async def sign_capture_urls(
+    request: Request,
+    body: CapturePathsRequest,
+    controller: ICaptureController = Depends(Provide[controller_name])
+):
+    return await controller.sign_capture_urls(body.capture_paths, request.user.identity)
+
+
+@capture_router.get(
+    "/media/{path:path}"
+)
+@inject
+async def get_signed_media(
+    path: str,
+    expires: int = Query(...),
+    u: str = Query(...),
+    sig: str = Query(...),
     controller: ICaptureController = Depends(Provide[controller_name])
 ):
-    return await controller.generate_cap_video(request.capture_paths)
+    # The signature is the credential here, so plain <img>/<video> tags and nginx can follow these links
+    return await controller.get_signed_media(path, expires, u, sig)
 
 
 @capture_router.get(
@@ -32,12 +95,24 @@ async def generate_stop_motion_video(
 )
 @inject
 async def get_all_captures(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=1),
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     controller: ICaptureController = Depends(Provide[controller_name])
 ):
+    # Paging by created_at goes by cursor, the next one is in X-Next-Cursor
+    if cursor or (page == 1 and sort_by in (None, 'created_at')):
+        captures, next_cursor = await controller.get_page(
+            page_size=page_size,
+            cursor=cursor,
+            sort_order=sort_order or 'asc'
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return captures
     pagination = {
         "page": page,
         "page_size": page_size,
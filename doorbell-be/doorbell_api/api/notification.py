@@ -1,5 +1,5 @@
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, Query, Path
+from fastapi import APIRouter, Depends, Query, Path, Response
 from typing import List, Optional
 from ..dtos import NotificationDTO
 from ..controllers import INotificationController
@@ -17,12 +17,25 @@ controller_name = "notification_controller"
 )
 @inject
 async def get_all_notifications(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=1),
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     controller: INotificationController = Depends(Provide[controller_name])
 ):
+    # Paging by created_at goes by cursor, the next one is in X-Next-Cursor
+    if cursor or (page == 1 and sort_by in (None, 'created_at')):
+        notifications, next_cursor = await controller.get_page(
+            page_size=page_size,
+            cursor=cursor,
+            sort_order=sort_order or 'asc',
+            eager_load=['captures']
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return notifications
     pagination = {
         "page": page,
         "page_size": page_size,
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
 from dependency_injector.wiring import Provide, inject
 
+from ..exceptions import ServiceUnavailableException
 from ..middlewares import OAuth2Authorized
-from ..services import IWebRTCSignalingService
+from ..services import IWebRTCSignalingService, IDeviceChannelService
+from doorbell_shared.models import MessageType
 
 webrtc_router = APIRouter()
 controller_name = "signaling_service"
@@ -29,3 +34,29 @@ async def get_room_clients(
     signaling_service: IWebRTCSignalingService = Depends(Provide[controller_name])
 ):
    return signaling_service.get_room_clients(room_id)
+
+
+@webrtc_router.get(
+    "/stats",
+    dependencies=[Depends(OAuth2Authorized)]
+)
+@inject
+async def get_stream_stats(
+    request: Request,
+    format: Literal['json', 'prometheus'] = Query('json'),
+    history: Optional[int] = Query(None, ge=0),
+    device_channel_service: IDeviceChannelService = Depends(Provide['device_channel_service'])
+):
+    # Asked from the doorbell itself, the stats are collected where the peer connections live
+    try:
+        reply = await device_channel_service.request(
+            request.user.identity, MessageType.STREAM_STATS_REQUEST, {"format": format, "history": history}
+        )
+    except (LookupError, TimeoutError) as e:
+        raise ServiceUnavailableException(str(e))
+    if reply.msg_type != MessageType.STREAM_STATS:
+        raise ServiceUnavailableException(f"Doorbell could not collect stream stats: {(reply.payload or {}).get('error')}")
+
+    if format == 'prometheus':
+        return PlainTextResponse((reply.payload or {}).get('prometheus', ''), media_type="text/plain; version=0.0.4")
+    return reply.payload
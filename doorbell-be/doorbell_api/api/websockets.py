@@ -1,9 +1,16 @@
 import logging
+from typing import Optional
 
 from dependency_injector.wiring import inject, Provide
 from fastapi import APIRouter, Depends, Query
 from starlette.websockets import WebSocket
 from ..controllers import IWebSocketController
+from ..middlewares import OAuth2Authorized
+from ..services import (
+    IIngestService, IInsertBatcher, IEventLinkService, IRateLimitService, IPushService, IFCMTokenCache,
+    IVideoPregenerateService, IVideoJobService, IImageTranscodeService, ICaptureStorageService,
+    IRetentionService, ICaptureArchiveService, IQueryCache
+)
 
 logger = logging.getLogger(__name__)
 
@@ -32,3 +39,42 @@ async def webrtc_signaling(
     ws_controller: IWebSocketController = Depends(Provide[controller])
 ):
     await ws_controller.handle_signaling(websocket, token)
+
+
+@ws_router.get(
+    "/messages/metrics",
+    dependencies=[Depends(OAuth2Authorized)]
+)
+@inject
+async def device_messages_metrics(
+    ingest_service: IIngestService = Depends(Provide['ingest_service']),
+    capture_batcher: Optional[IInsertBatcher] = Depends(Provide['capture_batcher']),
+    notification_batcher: Optional[IInsertBatcher] = Depends(Provide['notification_batcher']),
+    event_link_service: IEventLinkService = Depends(Provide['event_link_service']),
+    rate_limit_service: IRateLimitService = Depends(Provide['rate_limit_service']),
+    push_service: IPushService = Depends(Provide['push_service']),
+    fcm_token_cache: IFCMTokenCache = Depends(Provide['fcm_token_cache']),
+    video_pregenerate_service: IVideoPregenerateService = Depends(Provide['video_pregenerate_service']),
+    video_job_service: IVideoJobService = Depends(Provide['video_job_service']),
+    image_transcode_service: IImageTranscodeService = Depends(Provide['image_transcode_service']),
+    capture_storage_service: ICaptureStorageService = Depends(Provide['capture_storage_service']),
+    retention_service: IRetentionService = Depends(Provide['retention_service']),
+    capture_archive_service: ICaptureArchiveService = Depends(Provide['capture_archive_service']),
+    query_cache: IQueryCache = Depends(Provide['query_cache'])
+):
+    return {
+        **ingest_service.get_metrics(),
+        "batch_inserts": {
+            "captures": capture_batcher.get_metrics() if capture_batcher else None,
+            "notifications": notification_batcher.get_metrics() if notification_batcher else None
+        },
+        "capture_links": event_link_service.get_metrics(),
+        "rate_limits": rate_limit_service.get_metrics(),
+        "fcm": {**push_service.get_metrics(), "token_cache": fcm_token_cache.get_metrics()},
+        "videos": {**video_pregenerate_service.get_metrics(), "jobs": video_job_service.get_metrics()},
+        "images": image_transcode_service.get_metrics(),
+        "storage": capture_storage_service.get_metrics(),
+        "retention": retention_service.get_metrics(),
+        "archive": capture_archive_service.get_metrics(),
+        "cache": query_cache.get_metrics()
+    }
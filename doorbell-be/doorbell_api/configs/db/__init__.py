@@ -1,6 +1,6 @@
 from .context import set_db
 from .db import DB, Base
-from .transactional import transactional
+from .transactional import transactional, own_session
 from .timestamp_mixin import TimestampMixin
 from .base_repo import BaseRepo
 
@@ -8,6 +8,7 @@ __all__ = [
     'set_db',
     'DB',
     'transactional',
+    'own_session',
     'TimestampMixin',
     'Base',
     'BaseRepo'
@@ -1,13 +1,14 @@
 from typing import TypeVar, Type, Generic, List, Optional, Tuple, cast, Dict, Any, Sequence, Union
 
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy import select, update, delete, desc, asc, func
+from sqlalchemy import select, update, delete, desc, asc, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.elements import BinaryExpression, and_
 from sqlalchemy.orm import DeclarativeBase, selectinload
 from dependency_injector.wiring import Provide, inject
 
 from doorbell_api.configs.db import DB
+from doorbell_api.helpers import CursorHelper
 
 TModel = TypeVar('TModel', bound=DeclarativeBase)
 
@@ -54,16 +55,11 @@ class BaseRepo(Generic[TModel]):
 
         return filter_conditions
 
-    async def get_all(
+    def _select(
             self,
-            page: int = 0,
-            page_size: int = 100,
-            sort_by: Optional[str] = None,
-            sort_order: str = 'asc',
             filter_by: Optional[Dict[str, Any]] = None,
             eager_load: Optional[List[Union[str, Any]]] = None
-    ) -> List[TModel]:
-        skip = (page - 1) * page_size
+    ):
         query = select(self._model)
 
         # Add eager loading options if provided
@@ -83,6 +79,20 @@ class BaseRepo(Generic[TModel]):
             if filter_conditions:
                 query = query.where(and_(*filter_conditions))
 
+        return query
+
+    async def get_all(
+            self,
+            page: int = 1,
+            page_size: int = 100,
+            sort_by: Optional[str] = None,
+            sort_order: str = 'asc',
+            filter_by: Optional[Dict[str, Any]] = None,
+            eager_load: Optional[List[Union[str, Any]]] = None
+    ) -> List[TModel]:
+        skip = max(page - 1, 0) * page_size
+        query = self._select(filter_by, eager_load)
+
         if sort_by:
             column = getattr(self._model, sort_by, None)
             if column is None:
@@ -98,6 +108,40 @@ class BaseRepo(Generic[TModel]):
         scalar_result = result.scalars().all()
         return cast(List[TModel], list(scalar_result))
 
+    async def get_page(
+            self,
+            page_size: int = 100,
+            cursor: Optional[str] = None,
+            sort_order: str = 'desc',
+            filter_by: Optional[Dict[str, Any]] = None,
+            eager_load: Optional[List[Union[str, Any]]] = None
+    ) -> Tuple[List[TModel], Optional[str]]:
+        """
+            Keyset pagination on (created_at, id), the cursor names the last row of the previous page
+            so every page is an index range scan, however far back it is
+        """
+        created_at = getattr(self._model, 'created_at', None)
+        if created_at is None:
+            raise ValueError(f"Model {self._model.__name__} has no created_at to paginate by")
+        key = tuple_(created_at, self._model.id)
+        query = self._select(filter_by, eager_load)
+
+        if cursor:
+            after = tuple_(*CursorHelper.decode(cursor))
+            query = query.where(key > after if sort_order == 'asc' else key < after)
+        if sort_order == 'asc':
+            query = query.order_by(asc(created_at), asc(self._model.id))
+        else:
+            query = query.order_by(desc(created_at), desc(self._model.id))
+
+        # One row more than asked for tells whether another page follows
+        result = await self.session.execute(query.limit(page_size + 1))
+        models = cast(List[TModel], list(result.scalars().all()))
+        if len(models) <= page_size:
+            return models, None
+        models = models[:page_size]
+        return models, CursorHelper.encode(models[-1].created_at, models[-1].id)
+
     async def count_all(
             self,
             filter_by: Optional[Dict[str, Any]] = None
@@ -211,7 +255,7 @@ class BaseRepo(Generic[TModel]):
         )
 
         result = await self.session.execute(query)
-        deleted_count = result.rowcount()
+        deleted_count = result.rowcount
 
         return deleted_count
 
@@ -219,3 +263,9 @@ class BaseRepo(Generic[TModel]):
         self.session.add(model)
         await self.session.flush()
         return model
+
+    async def save_all(self, models: List[TModel]) -> List[TModel]:
+        # The unit of work sends rows of one table as a single multi-row INSERT ... RETURNING
+        self.session.add_all(models)
+        await self.session.flush()
+        return models
@@ -1,9 +1,11 @@
+from contextlib import asynccontextmanager
 from functools import wraps
-from typing import Any, Callable, TypeVar, cast
+from typing import Any, AsyncIterator, Callable, TypeVar, cast
+from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .context import get_db_instance
+from .context import get_db_instance, orm_session_context
 
 R = TypeVar('R')
 F = TypeVar('F', bound=Callable[..., Any])
@@ -29,3 +31,18 @@ def transactional(func: Callable[..., Any]) -> Callable[..., Any]:
 
     return async_wrapper
 
+
+
+@asynccontextmanager
+async def own_session() -> AsyncIterator[None]:
+    """Gives work running outside of a request a scoped session of its own, removed again on the way out."""
+    db = get_db_instance()
+    token = orm_session_context.set(str(uuid4()))
+    try:
+        yield
+    finally:
+        try:
+            # Reads outside of @transactional leave their session open, it would keep a pooled connection
+            await db.scoped_session.remove()
+        finally:
+            orm_session_context.reset(token)
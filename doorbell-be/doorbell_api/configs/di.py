@@ -1,3 +1,5 @@
+import os
+
 from dependency_injector import providers, containers
 from ..configs.db import DB, set_db
 
@@ -31,8 +33,175 @@ class DependencyInjector:
 
         self._container.config.capture_dir.from_env("CAPTURE_DIR", required=True)
 
+        self._container.config.capture.workers.from_env("CAPTURE_WORKERS", default="2")
+        self._container.config.capture.max_pending.from_env("CAPTURE_MAX_PENDING", default="8")
+        self._container.config.capture.variants.from_env("CAPTURE_VARIANTS", default="160:webp,480:webp")
+        self._container.config.capture.variant_quality.from_env("CAPTURE_VARIANT_QUALITY", default="75")
+        self._container.config.capture.fsync.from_env("CAPTURE_FSYNC", default="batch")
+        self._container.config.capture.fsync_interval_ms.from_env("CAPTURE_FSYNC_INTERVAL_MS", default="200")
+
+        self._container.config.storage.backend.from_env("STORAGE_BACKEND", default="local")
+        self._container.config.storage.s3.bucket.from_env("STORAGE_S3_BUCKET", default="")
+        self._container.config.storage.s3.endpoint_url.from_env("STORAGE_S3_ENDPOINT_URL", default="")
+        self._container.config.storage.s3.region.from_env("STORAGE_S3_REGION", default="")
+        self._container.config.storage.s3.access_key.from_env("STORAGE_S3_ACCESS_KEY", default="")
+        self._container.config.storage.s3.secret_key.from_env("STORAGE_S3_SECRET_KEY", default="")
+        self._container.config.storage.s3.prefix.from_env("STORAGE_S3_PREFIX", default="")
+        self._container.config.storage.s3.max_connections.from_env("STORAGE_S3_MAX_CONNECTIONS", default="10")
+        self._container.config.storage.s3.part_size.from_env("STORAGE_S3_PART_SIZE", default="8388608")
+
+        self._container.config.ingest.workers.from_env("INGEST_WORKERS", default="4")
+        self._container.config.ingest.queue_size.from_env("INGEST_QUEUE_SIZE", default="32")
+
+        self._container.config.batch_insert.enabled.from_env("BATCH_INSERT_ENABLED", default="true")
+        self._container.config.batch_insert.max_rows.from_env("BATCH_INSERT_MAX_ROWS", default="100")
+        self._container.config.batch_insert.max_delay_ms.from_env("BATCH_INSERT_MAX_DELAY_MS", default="20")
+
+        self._container.config.event_link.cache_size.from_env("EVENT_LINK_CACHE_SIZE", default="1024")
+        self._container.config.event_link.ttl_seconds.from_env("EVENT_LINK_TTL_SECONDS", default="600")
+        self._container.config.event_link.wait_seconds.from_env("EVENT_LINK_WAIT_SECONDS", default="5")
+
+        self._container.config.rate_limit.limits.from_env("RATE_LIMITS", default="motion_detected=1/60")
+        self._container.config.rate_limit.redis_url.from_env("RATE_LIMIT_REDIS_URL", default="")
+
+        self._container.config.cache.enabled.from_env("CACHE_ENABLED", default="true")
+        self._container.config.cache.ttl_seconds.from_env("CACHE_TTL_SECONDS", default="30")
+        self._container.config.cache.max_entries.from_env("CACHE_MAX_ENTRIES", default="1024")
+        self._container.config.cache.redis_url.from_env("CACHE_REDIS_URL", default="")
+
+        self._container.config.fcm.workers.from_env("FCM_WORKERS", default="2")
+        self._container.config.fcm.queue_size.from_env("FCM_QUEUE_SIZE", default="1000")
+        self._container.config.fcm.max_retries.from_env("FCM_MAX_RETRIES", default="3")
+        self._container.config.fcm.retry_base_seconds.from_env("FCM_RETRY_BASE_SECONDS", default="1")
+        self._container.config.fcm.endpoint.from_env("FCM_ENDPOINT", default="")
+        self._container.config.fcm.token_cache.size.from_env("FCM_TOKEN_CACHE_SIZE", default="1024")
+        self._container.config.fcm.token_cache.ttl_seconds.from_env("FCM_TOKEN_CACHE_TTL_SECONDS", default="300")
+
+        self._container.config.video.cache_dir.from_env("VIDEO_CACHE_DIR", default="")
+        self._container.config.video.cache_max_bytes.from_env("VIDEO_CACHE_MAX_BYTES", default="1073741824")
+        self._container.config.video.workers.from_env("VIDEO_WORKERS", default="2")
+        self._container.config.video.queue_size.from_env("VIDEO_QUEUE_SIZE", default="16")
+        self._container.config.video.pregenerate_delay_seconds.from_env("VIDEO_PREGENERATE_DELAY_SECONDS", default="30")
+
+        self._container.config.image.cache_dir.from_env("IMAGE_CACHE_DIR", default="")
+        self._container.config.image.cache_max_bytes.from_env("IMAGE_CACHE_MAX_BYTES", default="536870912")
+        self._container.config.image.widths.from_env("IMAGE_WIDTHS", default="160,320,480,720,1280")
+        self._container.config.image.workers.from_env("IMAGE_TRANSCODE_WORKERS", default="2")
+        self._container.config.image.max_pending.from_env("IMAGE_TRANSCODE_MAX_PENDING", default="16")
+
+        self._container.config.media_url.mode.from_env("MEDIA_URL_MODE", default="internal")
+        self._container.config.media_url.secret.from_env("MEDIA_URL_SECRET", default="")
+        self._container.config.media_url.ttl_seconds.from_env("MEDIA_URL_TTL_SECONDS", default="300")
+        self._container.config.media_url.base.from_env("MEDIA_URL_BASE", default="/media")
+        self._container.config.media_url.accel_prefix.from_env("MEDIA_ACCEL_PREFIX", default="/protected")
+
+        self._container.config.retention.enabled.from_env("RETENTION_ENABLED", default="false")
+        self._container.config.retention.full_days.from_env("RETENTION_FULL_DAYS", default="7")
+        self._container.config.retention.keep_days.from_env("RETENTION_KEEP_DAYS", default="90")
+        self._container.config.retention.interval_minutes.from_env("RETENTION_INTERVAL_MINUTES", default="60")
+        self._container.config.retention.batch_size.from_env("RETENTION_BATCH_SIZE", default="500")
+
+        self._container.config.archive.enabled.from_env("ARCHIVE_ENABLED", default="false")
+        self._container.config.archive.after_days.from_env("ARCHIVE_AFTER_DAYS", default="30")
+        self._container.config.archive.interval_minutes.from_env("ARCHIVE_INTERVAL_MINUTES", default="60")
+        self._container.config.archive.batch_size.from_env("ARCHIVE_BATCH_SIZE", default="50")
+
+        self._container.config.device_request.timeout_seconds.from_env("DEVICE_REQUEST_TIMEOUT_SECONDS", default="5")
+
+        self._container.config.webrtc_relay.enabled.from_env("WEBRTC_RELAY_ENABLED", default="false")
+        self._container.config.turn.host.from_env("TURN_HOST", default="")
+        self._container.config.turn.secret.from_env("TURN_SECRET", default="")
+
+        self._container.config.recording.enabled.from_env("RECORDING_ENABLED", default="false")
+        self._container.config.recording.segment_seconds.from_env("RECORDING_SEGMENT_SECONDS", default="60")
+        self._container.config.recording.queue_size.from_env("RECORDING_QUEUE_SIZE", default="300")
+        self._container.config.recording.link_window_minutes.from_env("RECORDING_LINK_WINDOW_MINUTES", default="5")
+
     def _setup_shared_instances(self):
-        from ..services.impl import WebRTCSignalingService
+        from ..helpers import BoundedExecutor, DiskLRUCache
+        self._container.image_executor = providers.Singleton(
+            BoundedExecutor,
+            max_workers=self._container.config.capture.workers.as_int(),
+            max_pending=self._container.config.capture.max_pending.as_int(),
+            thread_name_prefix="capture-ingest"
+        )
+        from ..services.impl import LocalObjectStorage, S3ObjectStorage
+        storage_config = self._container.config.storage
+        if str(storage_config.backend() or "local").lower() == "s3":
+            s3_config = storage_config.s3
+            self._container.object_storage = providers.Singleton(
+                S3ObjectStorage,
+                bucket=s3_config.bucket,
+                endpoint_url=s3_config.endpoint_url,
+                region=s3_config.region,
+                access_key=s3_config.access_key,
+                secret_key=s3_config.secret_key,
+                prefix=s3_config.prefix,
+                max_connections=s3_config.max_connections.as_int(),
+                part_size=s3_config.part_size.as_int()
+            )
+        else:
+            capture_config = self._container.config.capture
+            self._container.object_storage = providers.Singleton(
+                LocalObjectStorage,
+                directory=self._container.config.capture_dir(),
+                fsync=str(capture_config.fsync() or "batch").lower(),
+                fsync_interval_ms=capture_config.fsync_interval_ms.as_int()
+            )
+        video_config = self._container.config.video
+        self._container.video_cache = providers.Singleton(
+            DiskLRUCache,
+            directory=video_config.cache_dir() or os.path.join(self._container.config.capture_dir(), "video_cache"),
+            max_bytes=video_config.cache_max_bytes.as_int(),
+            suffix=".mp4"
+        )
+        image_config = self._container.config.image
+        self._container.image_cache = providers.Singleton(
+            DiskLRUCache,
+            directory=image_config.cache_dir() or os.path.join(self._container.config.capture_dir(), "image_cache"),
+            max_bytes=image_config.cache_max_bytes.as_int()
+        )
+        self._container.transcode_executor = providers.Singleton(
+            BoundedExecutor,
+            max_workers=image_config.workers.as_int(),
+            max_pending=image_config.max_pending.as_int(),
+            thread_name_prefix="image-transcode"
+        )
+
+        from ..services.impl import (
+            WebRTCSignalingService, WebRTCRelayService, RecordingService, IngestService, InsertBatcher,
+            EventLinkService, RateLimitService, PushService, FCMTokenCache, VideoPregenerateService,
+            VideoJobService, ImageTranscodeService, MediaUrlService, CaptureStorageService, RetentionService,
+            CaptureArchiveService, QueryCache, DeviceChannelService
+        )
+        self._container.query_cache = providers.Singleton(QueryCache)
+        self._container.device_channel_service = providers.Singleton(DeviceChannelService)
+        self._container.capture_storage_service = providers.Singleton(CaptureStorageService)
+        self._container.retention_service = providers.Singleton(RetentionService)
+        self._container.capture_archive_service = providers.Singleton(CaptureArchiveService)
+        self._container.media_url_service = providers.Singleton(MediaUrlService)
+        self._container.image_transcode_service = providers.Singleton(ImageTranscodeService)
+        self._container.video_job_service = providers.Singleton(VideoJobService)
+        self._container.video_pregenerate_service = providers.Singleton(VideoPregenerateService)
+        self._container.fcm_token_cache = providers.Singleton(FCMTokenCache)
+        self._container.push_service = providers.Singleton(PushService)
+        self._container.rate_limit_service = providers.Singleton(RateLimitService)
+        self._container.event_link_service = providers.Singleton(EventLinkService)
+        batch_config = self._container.config.batch_insert
+        batching = str(batch_config.enabled()).lower() in ('1', 'true', 'yes')
+        for name, repo in (("capture", self._container.capture_repo), ("notification", self._container.notification_repo)):
+            batcher = providers.Singleton(
+                InsertBatcher,
+                name=name,
+                repo=repo,
+                max_rows=batch_config.max_rows.as_int(),
+                max_delay_ms=batch_config.max_delay_ms.as_int()
+            ) if batching else providers.Object(None)
+            setattr(self._container, f"{name}_batcher", batcher)
+
+        self._container.ingest_service = providers.Singleton(IngestService)
+        self._container.recording_service = providers.Singleton(RecordingService)
+        self._container.relay_service = providers.Singleton(WebRTCRelayService)
         self._container.signaling_service = providers.Singleton(WebRTCSignalingService)
 
     def _setup_mappers(self):
@@ -46,7 +215,8 @@ class DependencyInjector:
     def _setup_repositories(self):
         from ..repositories.impl import (
             TokenRepository, UserRepository, CaptureRepository,
-            SettingsRepository, NotificationRepository, FCMDeviceRepository
+            SettingsRepository, NotificationRepository, FCMDeviceRepository,
+            LiveSessionRepository, BlobRepository, CaptureArchiveRepository
         )
 
         db = DB()
@@ -58,6 +228,9 @@ class DependencyInjector:
         self._container.settings_repo = providers.Factory(SettingsRepository)
         self._container.notification_repo = providers.Factory(NotificationRepository)
         self._container.fcm_device_repo = providers.Factory(FCMDeviceRepository)
+        self._container.live_session_repo = providers.Factory(LiveSessionRepository)
+        self._container.blob_repo = providers.Factory(BlobRepository)
+        self._container.capture_archive_repo = providers.Factory(CaptureArchiveRepository)
 
     def _setup_services(self):
         from ..services.impl import (
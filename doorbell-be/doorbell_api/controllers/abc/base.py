@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, List, Dict, Generic, Any, Optional
+from typing import TypeVar, List, Dict, Generic, Any, Optional, Tuple
 from pydantic import BaseModel
 
 
@@ -12,6 +12,10 @@ class IBaseController(ABC, Generic[TDTO]):
     async def get_all(self, **data: Dict[str, Any]) -> List[TDTO]:
         pass
 
+    @abstractmethod
+    async def get_page(self, **data: Dict[str, Any]) -> Tuple[List[TDTO], Optional[str]]:
+        pass
+
     @abstractmethod
     async def get_by_id(self, model_id: int) -> TDTO:
         pass
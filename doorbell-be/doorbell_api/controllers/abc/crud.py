@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
 
 from ...dtos import NotificationDTO, SettingsDTO, CaptureDTO
 
@@ -9,7 +10,25 @@ class INotificationController(IBaseController[NotificationDTO], ABC):
 
 class ICaptureController(IBaseController[CaptureDTO], ABC):
     @abstractmethod
-    async def generate_cap_video(self, ids: list[str]):
+    async def generate_cap_video(self, ids: list[str], user_id: str, if_none_match: Optional[str] = None):
+        pass
+
+    @abstractmethod
+    async def get_capture_image(self, path: str, user_id: str, accept: Optional[str] = None,
+                                width: Optional[int] = None, quality: Optional[int] = None,
+                                if_none_match: Optional[str] = None):
+        pass
+
+    @abstractmethod
+    async def get_video_job(self, job_id: str, user_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def sign_capture_urls(self, paths: list[str], user_id: str) -> Dict[str, Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_signed_media(self, path: str, expires: int, user_id: str, signature: str):
         pass
 
 class ISettingsController(IBaseController[SettingsDTO], ABC):
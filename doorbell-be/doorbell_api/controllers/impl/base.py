@@ -1,11 +1,11 @@
 from http import HTTPStatus
-from typing import TypeVar, List, Dict, Generic, Any, Optional
+from typing import TypeVar, List, Dict, Generic, Any, Optional, Tuple
 from pydantic import BaseModel
 from sqlalchemy.exc import NoResultFound
 
 from ...controllers import IBaseController
 from ...dtos.hits import HitsDTO
-from ...exceptions import CatchesAndThrows, NotFoundException
+from ...exceptions import BadRequestException, CatchesAndThrows, NotFoundException
 from ...services import IBaseService
 
 TDTO = TypeVar('TDTO', bound=BaseModel)
@@ -20,6 +20,10 @@ class BaseController(IBaseController, Generic[TDTO]):
     async def get_all(self, **data: Dict[str, Any]) -> List[TDTO]:
         return await self._service.get_all(**data)
 
+    @CatchesAndThrows(ValueError, BadRequestException, "Invalid cursor")
+    async def get_page(self, **data: Dict[str, Any]) -> Tuple[List[TDTO], Optional[str]]:
+        return await self._service.get_page(**data)
+
     @CatchesAndThrows(NoResultFound, NotFoundException, NOT_FOUND_MESSAGE)
     async def get_by_id(self, model_id: int) -> TDTO:
         return await self._service.get_by_id(model_id)
@@ -1,11 +1,18 @@
+import mimetypes
 import time
+from asyncio import QueueFull
+from typing import Any, Dict, Optional
 from .base import BaseController
 from ...dtos import NotificationDTO, CaptureDTO, SettingsDTO
 from ...controllers import (
     INotificationController, ICaptureController, ISettingsController
 )
-from ...services import INotificationService, ICaptureService, ISettingsService
-from fastapi.responses import StreamingResponse
+from ...services import (
+    INotificationService, ICaptureService, ISettingsService, IVideoJobService, IImageTranscodeService,
+    IMediaUrlService, ICaptureArchiveService
+)
+from ...exceptions import CatchesAndThrows, NotFoundException, ServiceUnavailableException
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from dependency_injector.wiring import Provide, inject
 
 
@@ -17,21 +24,104 @@ class NotificationController(BaseController[NotificationDTO], INotificationContr
 
 class CaptureController(BaseController[CaptureDTO], ICaptureController):
     @inject
-    def __init__(self, service: ICaptureService = Provide['capture_service']):
+    def __init__(
+        self,
+        service: ICaptureService = Provide['capture_service'],
+        video_job_service: IVideoJobService = Provide['video_job_service'],
+        transcode_service: IImageTranscodeService = Provide['image_transcode_service'],
+        media_url_service: IMediaUrlService = Provide['media_url_service'],
+        capture_archive_service: ICaptureArchiveService = Provide['capture_archive_service']
+    ):
         super().__init__(service)
         self._service = service
+        self._video_job_service = video_job_service
+        self._transcode_service = transcode_service
+        self._media_url_service = media_url_service
+        self._capture_archive_service = capture_archive_service
+
+    @CatchesAndThrows(QueueFull, ServiceUnavailableException, "Too many videos are being generated, retry later")
+    @CatchesAndThrows(ValueError, NotFoundException, "No captures found for the video")
+    async def generate_cap_video(self, paths: list[str], user_id: str, if_none_match: Optional[str] = None):
+        paths = await self._service.filter_owned(paths, user_id)
+        etag = f'"{await self._service.get_video_key(paths)}"'
+        if if_none_match and self._etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers={"ETag": etag})
 
-    async def generate_cap_video(self, paths: list[str]):
-        video_gen = self._service.generate_video(paths)
+        job_id, video_gen = await self._video_job_service.open_stream(paths)
 
         return StreamingResponse(
             video_gen,
             media_type="video/mp4",
             headers={
-                "Content-Disposition": f"attachment; filename=stop_motion_{int(time.time())}.mp4"
+                "Content-Disposition": f"attachment; filename=stop_motion_{int(time.time())}.mp4",
+                "ETag": etag,
+                "X-Video-Job": job_id,
+                "Cache-Control": "private, no-cache"
             }
         )
 
+    @staticmethod
+    def _etag_matches(etag: str, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+    @CatchesAndThrows(FileNotFoundError, NotFoundException, "Capture not found")
+    async def get_capture_image(
+        self,
+        path: str,
+        user_id: str,
+        accept: Optional[str] = None,
+        width: Optional[int] = None,
+        quality: Optional[int] = None,
+        if_none_match: Optional[str] = None
+    ):
+        if not await self._service.filter_owned([path], user_id):
+            raise FileNotFoundError(path)
+        key, media_type = await self._transcode_service.negotiate(path, accept, width, quality)
+        headers = {
+            "ETag": f'"{key}"',
+            "Vary": "Accept",
+            "Cache-Control": "private, max-age=86400"
+        }
+        if if_none_match and self._etag_matches(headers["ETag"], if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        image_path, _, _ = await self._transcode_service.get_variant(path, accept, width, quality)
+        return FileResponse(image_path, media_type=media_type, headers=headers)
+
+    @CatchesAndThrows(KeyError, NotFoundException, "Unknown video job")
+    async def get_video_job(self, job_id: str, user_id: str) -> Dict[str, Any]:
+        status = self._video_job_service.get_status(job_id)
+        paths = self._video_job_service.get_paths(job_id)
+        # A job nobody can be matched to, or with frames of someone else, is reported as unknown
+        if status is None or paths is None or len(await self._service.filter_owned(paths, user_id)) != len(paths):
+            raise KeyError(job_id)
+        video_path = self._video_job_service.get_video_path(job_id) if status["state"] == "done" else None
+        if video_path is not None:
+            # Finished videos are fetched straight from the media URL instead of through this API
+            status["media"] = self._media_url_service.sign_file(video_path, user_id)
+        return status
+
+    async def sign_capture_urls(self, paths: list[str], user_id: str) -> Dict[str, Dict[str, Any]]:
+        return await self._media_url_service.sign_captures(paths, user_id)
+
+    @CatchesAndThrows(FileNotFoundError, NotFoundException, "Link is invalid or expired")
+    async def get_signed_media(self, path: str, expires: int, user_id: str, signature: str):
+        headers = {"Cache-Control": "private, max-age=300"}
+        file_path = self._media_url_service.resolve(path, expires, user_id, signature)
+        if file_path is None:
+            if not self._media_url_service.verify(path, expires, user_id, signature):
+                raise FileNotFoundError(path)
+            # Archived captures have no file of their own, the member is read out of its archive
+            data = await self._capture_archive_service.read(path)
+            return Response(data, media_type=mimetypes.guess_type(path)[0], headers=headers)
+        accel_path = self._media_url_service.accel_redirect(path)
+        if accel_path:
+            # nginx serves the bytes with sendfile and range support, the API only checked the signature
+            return Response(headers={**headers, "X-Accel-Redirect": accel_path})
+        return FileResponse(file_path, headers=headers)
+
 
 class SettingsController(BaseController[SettingsDTO], ISettingsController):
     @inject
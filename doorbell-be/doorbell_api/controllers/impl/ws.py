@@ -10,7 +10,9 @@ from dependency_injector.wiring import Provide, inject
 from ...configs.db.context import orm_session_context
 from ...controllers import IWebSocketController  # Adjust import
 from ...exceptions import DecodeTokenException, ExpiredTokenException, ForbiddendWS  # Adjust import
-from ...services import IAuthService, IMessageHandler, IWebRTCSignalingService  # Adjust import
+from ...services import (  # Adjust import
+    IAuthService, IMessageHandler, IWebRTCSignalingService, IIngestService, IDeviceChannelService
+)
 from doorbell_shared.models import Message, MessageTypeJSONEncoder  # Assuming this path is correct for shared models
 
 
@@ -20,8 +22,12 @@ class WebsocketController(IWebSocketController):
         auth_service: IAuthService = Provide['auth_service'],
         message_handler: IMessageHandler = Provide['message_handler'],
         signaling_service: IWebRTCSignalingService = Provide['signaling_service'],
+        ingest_service: IIngestService = Provide['ingest_service'],
+        device_channel_service: IDeviceChannelService = Provide['device_channel_service'],
     ):
         self._auth_service = auth_service
+        self._ingest_service = ingest_service
+        self._device_channel_service = device_channel_service
         self._signaling_service = signaling_service
         self._message_handler = message_handler
         self._logger = getLogger(__name__)
@@ -37,12 +43,22 @@ class WebsocketController(IWebSocketController):
         connection_id = str(uuid4())
         client_info_str = f"{websocket.client.host}:{websocket.client.port}"  # For logging
         self._logger.info(f"WS conn {connection_id} attempt from {client_info_str} for endpoint.")
+        pipeline = None
+        send_lock = asyncio.Lock()
+
+        async def send_reply(reply_dict: Dict[str, Any]):
+            # Acks are sent by the ingest workers, one frame at a time
+            async with send_lock:
+                await websocket.send_text(json.dumps(reply_dict, cls=MessageTypeJSONEncoder))
+            self._logger.debug(f"WS conn {connection_id} sent reply: {str(reply_dict)[:200]}")
 
         try:
             jwt_payload = await self._auth_service.decode_token(access_token)
             await websocket.accept()
             self._logger.info(
                 f"WS conn {connection_id} accepted for user {jwt_payload.get('sub', 'unknown')} from {client_info_str}")
+            pipeline = self._ingest_service.open_pipeline(connection_id, process, send_reply)
+            self._device_channel_service.register(connection_id, str(jwt_payload.get('sub', '')), send_reply)
 
             while True:
                 message_str = await asyncio.wait_for(
@@ -55,15 +71,13 @@ class WebsocketController(IWebSocketController):
                     message_obj = Message(**json.loads(message_str))
                 except (json.JSONDecodeError, Exception) as e:
                     self._logger.warning(f"WS conn {connection_id}: Invalid message: {e} - Data: {message_str[:200]}")
-                    await websocket.send_text(
-                        json.dumps({"type": "error", "message": f"Invalid message format/structure: {e}"}))
+                    await send_reply({"type": "error", "message": f"Invalid message format/structure: {e}"})
                     continue
 
-                reply_dict = await process(message_obj, jwt_payload)
-
-                if reply_dict:
-                    await websocket.send_text(json.dumps(reply_dict, cls=MessageTypeJSONEncoder))
-                    self._logger.debug(f"WS conn {connection_id} sent reply: {str(reply_dict)[:200]}")
+                if self._device_channel_service.resolve(message_obj):
+                    # Answer to a request the API sent, whoever asked is waiting for it
+                    continue
+                await pipeline.submit(message_obj, jwt_payload)
 
         except WebSocketDisconnect:
             self._logger.info(f"WS conn {connection_id} from {client_info_str} disconnected.")
@@ -79,6 +93,9 @@ class WebsocketController(IWebSocketController):
         except Exception as e:
             self._logger.error(f"WS conn {connection_id} from {client_info_str} unexpected error: {e}", exc_info=True)
         finally:
+            self._device_channel_service.unregister(connection_id)
+            if pipeline:
+                await pipeline.close()
             orm_session_context.reset(context_token)
             self._logger.info(f"WS conn {connection_id} from {client_info_str} processing ended.")
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import BaseModel, Field
 
@@ -8,4 +8,6 @@ class CaptureDTO(BaseModel):
     id: Optional[int] = None
     notification_id: Optional[int] = None
     path: str
+    variants: Optional[Dict[str, str]] = None
+    content_hash: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
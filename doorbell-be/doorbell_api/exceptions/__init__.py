@@ -3,6 +3,8 @@ from .handlers import setup_exception_handlers
 from .base import CustomAPIException
 from .catches_n_throws import CatchesAndThrows
 from .not_found import NotFoundException
+from .unavailable import ServiceUnavailableException
+from .bad_request import BadRequestException
 from .auth import ForbiddendWS
 
 __all__ = [
@@ -13,5 +15,7 @@ __all__ = [
     'CustomAPIException',
     'CatchesAndThrows',
     'NotFoundException',
+    'ServiceUnavailableException',
+    'BadRequestException',
     'ForbiddendWS'
 ]
@@ -0,0 +1,8 @@
+from http import HTTPStatus
+
+from doorbell_api.exceptions import CustomAPIException
+
+
+class BadRequestException(CustomAPIException):
+    code = HTTPStatus.BAD_REQUEST
+    message = HTTPStatus.BAD_REQUEST.description
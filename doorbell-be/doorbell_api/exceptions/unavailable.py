@@ -0,0 +1,8 @@
+from http import HTTPStatus
+
+from doorbell_api.exceptions import CustomAPIException
+
+
+class ServiceUnavailableException(CustomAPIException):
+    code = HTTPStatus.SERVICE_UNAVAILABLE
+    message = HTTPStatus.SERVICE_UNAVAILABLE.description
@@ -1,5 +1,19 @@
 from .token import TokenHelper
+from .image import ImageHelper
+from .executor import BoundedExecutor
+from .metrics import MetricsHelper
+from .cache import TTLCache
+from .disk_cache import DiskLRUCache
+from .signed_url import SignedUrlHelper
+from .cursor import CursorHelper
 
 __all__ = [
-    'TokenHelper'
+    'TokenHelper',
+    'ImageHelper',
+    'BoundedExecutor',
+    'MetricsHelper',
+    'TTLCache',
+    'DiskLRUCache',
+    'SignedUrlHelper',
+    'CursorHelper'
 ]
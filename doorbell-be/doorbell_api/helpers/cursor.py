@@ -0,0 +1,20 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+
+class CursorHelper:
+    @staticmethod
+    def encode(created_at: datetime, model_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{model_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str) -> Tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+            created_at, model_id = raw.split("|")
+            return datetime.fromisoformat(created_at), int(model_id)
+        except (ValueError, binascii.Error) as e:
+            raise ValueError(f"Malformed cursor '{cursor}'") from e
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+TEMP_SUFFIX = ".tmp"
+
+
+class DiskLRUCache:
+    """Files in one directory keyed by name, the least recently read go once the total passes max_bytes."""
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(0, max_bytes)
+        self._suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> Path:
+        return self._directory / f"{key}{self._suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        try:
+            # mtime doubles as the last access time, so other workers sharing the directory agree on the order
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def contains(self, key: str) -> bool:
+        return self.path_for(key).exists()
+
+    def temp_path(self, key: str) -> Path:
+        return self._directory / f".{key}.{uuid4().hex}{TEMP_SUFFIX}"
+
+    def commit(self, key: str, temp_path: Path) -> Path:
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    def discard(self, temp_path: Path) -> None:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(TEMP_SUFFIX):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        # The newest entry stays even when it alone is over budget, it was just written for a reader
+        for _, size, path in entries[:-1]:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        size = 0
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(TEMP_SUFFIX):
+                    entries += 1
+                    size += entry.stat().st_size
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,18 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class BoundedExecutor:
+    """Thread pool with a cap on in-flight jobs, callers wait for a free slot instead of piling up work."""
+
+    def __init__(self, max_workers: int, max_pending: int, thread_name_prefix: str = ""):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = asyncio.Semaphore(max(max_pending, max_workers))
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
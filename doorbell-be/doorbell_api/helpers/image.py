@@ -0,0 +1,83 @@
+import io
+from pathlib import Path
+from typing import BinaryIO, Dict, Sequence, Tuple, Union
+
+from PIL import Image
+
+# Stretch limited range YUV (Y 16-235, UV 16-240) to the full range Pillow's YCbCr mode expects,
+# so the JFIF conversion matrix produces the same BT.601 colors ffmpeg gives for yuv420p.
+_LUMA_LUT = [min(255, max(0, round((v - 16) * 255 / 219))) for v in range(256)]
+_CHROMA_LUT = [min(255, max(0, round((v - 128) * 255 / 224 + 128))) for v in range(256)]
+
+# Variant format name -> (Pillow format, file extension)
+VARIANT_FORMATS = {
+    "avif": ("AVIF", "avif"),
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+    "jpg": ("JPEG", "jpg"),
+}
+
+
+class ImageHelper:
+    @staticmethod
+    def yuv420_to_image(data: bytes, width: int, height: int) -> Image.Image:
+        luma_size = width * height
+        chroma_size = luma_size // 4
+        if len(data) < luma_size + 2 * chroma_size:
+            raise ValueError(
+                f"YUV420 buffer of {len(data)} bytes is too small for {width}x{height}"
+            )
+
+        chroma_dims = (width // 2, height // 2)
+        y = Image.frombuffer("L", (width, height), data[:luma_size], "raw", "L", 0, 1)
+        u = Image.frombuffer("L", chroma_dims, data[luma_size:luma_size + chroma_size], "raw", "L", 0, 1)
+        v = Image.frombuffer("L", chroma_dims, data[luma_size + chroma_size:luma_size + 2 * chroma_size], "raw", "L", 0, 1)
+
+        y = y.point(_LUMA_LUT)
+        u = u.point(_CHROMA_LUT).resize((width, height), Image.Resampling.BILINEAR)
+        v = v.point(_CHROMA_LUT).resize((width, height), Image.Resampling.BILINEAR)
+        return Image.merge("YCbCr", (y, u, v)).convert("RGB")
+
+    @staticmethod
+    def save_yuv420_as_png(data: bytes, width: int, height: int, path: Union[str, Path]) -> None:
+        ImageHelper.yuv420_to_image(data, width, height).save(path, format="PNG")
+
+    @staticmethod
+    def encode_png(image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def encode_variants(
+            image: Image.Image, variants: Sequence[Tuple[int, str]], quality: int
+    ) -> Dict[str, Tuple[str, bytes]]:
+        """Encodes downscaled copies, returns (file extension, data) keyed as '<width>_<format>'"""
+        encoded = {}
+        source = image
+        # Widest first, each smaller size is resized from the previous one instead of the full frame
+        for variant_width, variant_format in sorted(variants, reverse=True):
+            if variant_width >= image.width:
+                continue
+            pillow_format, extension = VARIANT_FORMATS[variant_format]
+            if source.width != variant_width:
+                variant_height = max(1, round(image.height * variant_width / image.width))
+                source = source.resize((variant_width, variant_height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            source.save(buffer, format=pillow_format, quality=quality)
+            encoded[f"{variant_width}_{variant_format}"] = (extension, buffer.getvalue())
+        return encoded
+
+    @staticmethod
+    def transcode(source: Union[str, Path, BinaryIO], target: Union[str, Path], image_format: str, width: int,
+                  quality: int) -> None:
+        pillow_format, _ = VARIANT_FORMATS[image_format]
+        with Image.open(source) as image:
+            if width < image.width:
+                # draft lets JPEG sources decode at a reduced scale, other formats ignore it
+                image.draft("RGB", (width, round(image.height * width / image.width)))
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(target, format=pillow_format, quality=quality)
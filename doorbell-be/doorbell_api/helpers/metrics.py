@@ -0,0 +1,14 @@
+from typing import Dict, Iterable, Optional
+
+
+class MetricsHelper:
+    @staticmethod
+    def percentiles(samples: Iterable[float]) -> Dict[str, Optional[float]]:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": round(ordered[len(ordered) // 2], 2),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max": round(ordered[-1], 2)
+        }
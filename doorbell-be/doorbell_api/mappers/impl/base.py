@@ -1,5 +1,5 @@
-from typing import Type, TypeVar, Optional, Dict, Generic, List, Union, Any
-from inspect import isclass
+from typing import Type, TypeVar, Optional, Dict, Generic, List, Tuple, Union, Any
+from inspect import isclass, isroutine
 
 from pydantic import BaseModel
 from sqlalchemy.orm import RelationshipProperty
@@ -27,6 +27,9 @@ class Mapper(IMapper, Generic[TDTO, TORM]):
         self.exclude_dto_keys = exclude_dto_keys or set()
         self.exclude_orm_keys = exclude_orm_keys or set()
         self.relationship_mappers = relationship_mappers or {}
+        # (orm attribute, dto field, None for a plain value or whether the relationship is a collection)
+        self._plan: Optional[List[Tuple[str, str, Optional[bool]]]] = None
+        self._column_keys: Dict[type, List[str]] = {}
 
         # Auto-discover relationships if not provided
         self._discover_relationships()
@@ -46,6 +49,7 @@ class Mapper(IMapper, Generic[TDTO, TORM]):
     def add_relationship_mapper(self, relationship_name: str, mapper: 'Mapper'):
         """Add a mapper for a specific relationship"""
         self.relationship_mappers[relationship_name] = mapper
+        self._plan = None
 
     def to_orm(self, dto: TDTO, existing_model: Optional[TORM] = None) -> TORM:
         if existing_model:
@@ -79,60 +83,45 @@ class Mapper(IMapper, Generic[TDTO, TORM]):
         }
         return self.orm_model(**kwargs)
 
+    def _compile(self) -> List[Tuple[str, str, Optional[bool]]]:
+        """Works out once per mapper which attribute fills which DTO field, rows then only follow the plan"""
+        plan = []
+        for dto_field in self.dto_model.model_fields:
+            orm_field = self.field_mapping.get(dto_field, dto_field)
+            if orm_field.startswith('_') or orm_field in self.exclude_orm_keys:
+                continue
+            attribute = getattr(self.orm_model, orm_field, None)
+            if attribute is None or isroutine(attribute):
+                continue
+            relationship = self.relationships.get(orm_field)
+            plan.append((orm_field, dto_field, relationship['is_collection'] if relationship else None))
+        self._plan = plan
+        return plan
+
     def _convert_orm_to_dto(self, orm_model: TORM, exclusions: Optional[set[str]] = None) -> TDTO:
         if orm_model is None:
             return None
 
-        exclusions = exclusions or set()
-        reversed_field_mapping = {v: k for k, v in self.field_mapping.items()}
+        plan = self._plan if self._plan is not None else self._compile()
+        # Loaded attributes sit in the instance dict, reading them there skips the descriptor per value
+        loaded = orm_model.__dict__
         orm_dict = {}
-
-        for orm_field in dir(orm_model):
-            if orm_field.startswith('_'):
+        for orm_field, dto_field, is_collection in plan:
+            if exclusions and dto_field in exclusions:
                 continue
-
-            dto_field = reversed_field_mapping.get(orm_field, orm_field)
-            if dto_field in exclusions or orm_field in self.exclude_orm_keys:
-                continue
-
-            try:
-                value = getattr(orm_model, orm_field, None)
-
-                if callable(value):
+            if orm_field in loaded:
+                value = loaded[orm_field]
+            else:
+                try:
+                    value = getattr(orm_model, orm_field)
+                except Exception:
+                    # A relationship that was not loaded cannot lazy load in async code, the DTO keeps its default
                     continue
-
-                if orm_field in self.relationships:
-                    processed_value = self._process_relationship(orm_field, value)
-                    if processed_value is not None:
-                        orm_dict[dto_field] = processed_value
-
-                elif not orm_field in self.relationships:
-                    if self._field_exists_in_dto(dto_field):
-                        orm_dict[dto_field] = value
-
-            except Exception as e:
-                continue
-
-        for orm_field in self.field_mapping.values():
-            if orm_field in self.exclude_orm_keys:
-                continue
-
-            dto_field = reversed_field_mapping.get(orm_field, orm_field)
-            if dto_field in exclusions:
-                continue
-
-            try:
-                value = getattr(orm_model, orm_field, None)
-
-                if orm_field in self.relationships:
-                    processed_value = self._process_relationship(orm_field, value)
-                    if processed_value is not None:
-                        orm_dict[dto_field] = processed_value
-                else:
-                    orm_dict[dto_field] = value
-
-            except Exception:
-                continue
+            if is_collection is not None:
+                value = self._process_relationship(orm_field, value)
+                if value is None:
+                    continue
+            orm_dict[dto_field] = value
 
         return self.dto_model(**orm_dict)
 
@@ -163,20 +152,23 @@ class Mapper(IMapper, Generic[TDTO, TORM]):
         if orm_obj is None:
             return None
 
-        result = {}
+        column_keys = self._column_keys.get(orm_obj.__class__)
+        if column_keys is None:
+            column_keys = [prop.key for prop in sqlalchemy_inspect(orm_obj.__class__).column_attrs]
+            self._column_keys[orm_obj.__class__] = column_keys
+
+        loaded = orm_obj.__dict__
+        try:
+            return {key: loaded[key] for key in column_keys}
+        except KeyError:
+            # Expired or deferred columns, only the descriptor knows how to get them
+            pass
 
-        mapper = sqlalchemy_inspect(orm_obj.__class__)
-        for column in mapper.columns:
+        result = {}
+        for key in column_keys:
             try:
-                value = getattr(orm_obj, column.name, None)
-                result[column.name] = value
+                result[key] = getattr(orm_obj, key, None)
             except Exception:
                 continue
 
         return result
-
-    def _field_exists_in_dto(self, field_name: str) -> bool:
-        try:
-            return field_name in self.dto_model.model_fields
-        except Exception:
-            return False
\ No newline at end of file
@@ -12,6 +12,8 @@ class CaptureMapper(Mapper[CaptureDTO, Capture]):
                 'id': 'id',
                 'notification_id': 'notification_id',
                 'path': 'path',
+                'variants': 'variants',
+                'content_hash': 'content_hash',
                 'created_at': 'created_at'
             },
             exclude_dto_keys=set('id')
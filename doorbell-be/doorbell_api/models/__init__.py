@@ -4,6 +4,9 @@ from .settings import Settings
 from .token import Token
 from .user import User
 from .fcm_device import FCMDevice
+from .live_session import LiveSession
+from .blob import Blob
+from .capture_archive import CaptureArchive, ArchiveMember
 
 __all__ = [
     'Capture',
@@ -11,5 +14,9 @@ __all__ = [
     'Settings',
     'Token',
     'User',
-    'FCMDevice'
+    'FCMDevice',
+    'LiveSession',
+    'Blob',
+    'CaptureArchive',
+    'ArchiveMember'
 ]
@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..configs.db import Base, TimestampMixin
+
+
+class Blob(Base, TimestampMixin):
+    __tablename__ = 'blobs'
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    path: Mapped[str] = mapped_column()
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, index=True)
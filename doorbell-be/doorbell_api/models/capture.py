@@ -2,16 +2,19 @@ from typing import Optional
 
 from ..configs.db import Base, TimestampMixin
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .notification import Notification
 
 class Capture(Base, TimestampMixin):
     __tablename__ = 'captures'
+    __table_args__ = (Index('ix_captures_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     notification_id: Mapped[Optional[int]] = mapped_column(ForeignKey("notifications.id"), nullable=True)
     path: Mapped[str] = mapped_column()
+    variants: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
 
     notification: Mapped[Notification] = relationship("Notification", back_populates="captures")
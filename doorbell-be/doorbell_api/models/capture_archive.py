@@ -0,0 +1,34 @@
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from ..configs.db import Base, TimestampMixin
+
+
+class CaptureArchive(Base, TimestampMixin):
+    __tablename__ = 'capture_archives'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # No foreign key, the archive outlives the notification until no blob in it is referenced anymore
+    notification_id: Mapped[Optional[int]] = mapped_column(Integer, index=True, nullable=True)
+    key: Mapped[str] = mapped_column()
+    size: Mapped[int] = mapped_column(BigInteger)
+
+    members: Mapped[List['ArchiveMember']] = relationship(
+        "ArchiveMember",
+        back_populates="archive",
+        cascade="all, delete-orphan"
+    )
+
+
+class ArchiveMember(Base):
+    __tablename__ = 'archive_members'
+
+    archive_id: Mapped[int] = mapped_column(ForeignKey("capture_archives.id", ondelete="CASCADE"), primary_key=True)
+    path: Mapped[str] = mapped_column(primary_key=True, index=True)
+    digest: Mapped[str] = mapped_column(String(64), index=True)
+    offset: Mapped[int] = mapped_column(BigInteger)
+    size: Mapped[int] = mapped_column(BigInteger)
+
+    archive: Mapped[CaptureArchive] = relationship("CaptureArchive", back_populates="members")
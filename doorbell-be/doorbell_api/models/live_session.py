@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from ..configs.db import Base, TimestampMixin
+from .notification import Notification
+
+
+class LiveSession(Base, TimestampMixin):
+    __tablename__ = 'live_sessions'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    room_id: Mapped[str] = mapped_column(String, index=True)
+    notification_id: Mapped[Optional[int]] = mapped_column(ForeignKey("notifications.id"), nullable=True, index=True)
+
+    # Directory of the recording, relative to the capture dir, holding segment_00000.mp4, segment_00001.mp4, ...
+    path: Mapped[str] = mapped_column()
+    started_at: Mapped[datetime] = mapped_column(DateTime)
+    ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    segment_count: Mapped[int] = mapped_column(default=0)
+    bytes_written: Mapped[int] = mapped_column(BigInteger, default=0)
+    dropped_frames: Mapped[int] = mapped_column(default=0)
+
+    notification: Mapped[Optional[Notification]] = relationship("Notification")
@@ -1,6 +1,6 @@
 from typing import List, TYPE_CHECKING, Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer
+from sqlalchemy import Index, String, Integer
 from ..configs.db import Base, TimestampMixin
 
 if TYPE_CHECKING:
@@ -9,6 +9,7 @@ if TYPE_CHECKING:
 
 class Notification(Base, TimestampMixin):
     __tablename__ = 'notifications'
+    __table_args__ = (Index('ix_notifications_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column()
@@ -20,5 +21,6 @@ class Notification(Base, TimestampMixin):
     captures: Mapped[List['Capture']] = relationship(
         "Capture",
         back_populates="notification",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="Capture.id"
     )
@@ -1,15 +1,20 @@
 from .token import ITokenRepository
-from .crud import ISettingsRepository, ICaptureRepository, INotificationRepository
+from .crud import ISettingsRepository, ICaptureRepository, INotificationRepository, ILiveSessionRepository
 from .base import IBaseRepository
 from .user import IUserRepository
 from .device import IFCMDeviceRepository
+from .blob import IBlobRepository
+from .capture_archive import ICaptureArchiveRepository
 
 __all__ = [
     'ISettingsRepository',
     'ICaptureRepository',
     'INotificationRepository',
+    'ILiveSessionRepository',
     'ITokenRepository',
     'IBaseRepository',
     'IUserRepository',
-    'IFCMDeviceRepository'
+    'IFCMDeviceRepository',
+    'IBlobRepository',
+    'ICaptureArchiveRepository'
 ]
@@ -16,6 +16,10 @@ class IBaseRepository(ABC, Generic[TModel]):
         TModel]:
         pass
 
+    @abstractmethod
+    async def get_page_models(self, **pagination: Dict[str, Any]) -> Tuple[List[TModel], Optional[str]]:
+        pass
+
     @abstractmethod
     async def get_model_by_id(self, model_id: int) -> TModel:
         pass
@@ -24,6 +28,10 @@ class IBaseRepository(ABC, Generic[TModel]):
     async def create_model(self, model: TModel) -> TModel:
         pass
 
+    @abstractmethod
+    async def create_models(self, models: List[TModel]) -> List[TModel]:
+        pass
+
     @abstractmethod
     async def update_model_by_id(self, model_id: int, params: Dict[str, any]) -> TModel:
         pass
@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from ...models import Blob
+from .base import IBaseRepository
+
+
+class IBlobRepository(IBaseRepository[Blob], ABC):
+
+    @abstractmethod
+    async def acquire(self, digest: str, path: str, size: int) -> int:
+        pass
+
+    @abstractmethod
+    async def release(self, digests: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    async def lock_unreferenced(self, limit: int) -> List[Blob]:
+        pass
+
+    @abstractmethod
+    async def delete_unreferenced(self, digests: List[str]) -> int:
+        pass
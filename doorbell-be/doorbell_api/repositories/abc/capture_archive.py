@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...models import CaptureArchive
+from .base import IBaseRepository
+
+
+class ICaptureArchiveRepository(IBaseRepository[CaptureArchive], ABC):
+
+    @abstractmethod
+    async def find_candidates(self, before: datetime, limit: int) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def find_files(self, notification_id: int) -> List[Tuple[str, str, Optional[dict]]]:
+        pass
+
+    @abstractmethod
+    async def create_archive(self, notification_id: int, key: str, size: int,
+                             members: List[Dict[str, Any]]) -> CaptureArchive:
+        pass
+
+    @abstractmethod
+    async def locate(self, paths: List[str]) -> Dict[str, Tuple[str, int, int]]:
+        pass
+
+    @abstractmethod
+    async def delete_orphaned_members(self) -> int:
+        pass
+
+    @abstractmethod
+    async def lock_empty(self, limit: int) -> List[CaptureArchive]:
+        pass
+
+    @abstractmethod
+    async def delete_archives(self, archive_ids: List[int]) -> int:
+        pass
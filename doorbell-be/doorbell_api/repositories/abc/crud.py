@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from ...models import Settings, Capture, Notification
+from ...models import Settings, Capture, Notification, LiveSession
 from .base import IBaseRepository
 
 
@@ -10,7 +11,31 @@ class ISettingsRepository(IBaseRepository[Settings], ABC):
 
 
 class ICaptureRepository(IBaseRepository[Capture], ABC):
-    pass
+
+    @abstractmethod
+    async def link_to_notification(self, capture_ids: List[int], notification_id: int) -> int:
+        pass
+
+    @abstractmethod
+    async def get_paths_for_notification(self, notification_id: int) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def find_with_owner(self, paths: List[str]) -> List[Tuple[Capture, Optional[int]]]:
+        pass
+
+    @abstractmethod
+    async def delete_returning_content_hashes(self, capture_ids: List[int]) -> List[Optional[str]]:
+        pass
+
+    @abstractmethod
+    async def find_downsample_candidates(self, before: datetime, limit: int) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def find_expired_ids(self, before: datetime, limit: int) -> List[int]:
+        pass
+
 
 class INotificationRepository(IBaseRepository[Notification], ABC):
 
@@ -19,5 +44,20 @@ class INotificationRepository(IBaseRepository[Notification], ABC):
         pass
 
     @abstractmethod
-    async def is_rate_limited(self, user_id: str, rate_limit=1):
+    async def find_created_since(self, since: datetime, type_strs: List[str]) -> List[Notification]:
+        pass
+
+    @abstractmethod
+    async def find_latest_since(self, since: datetime) -> Optional[Notification]:
+        pass
+
+    @abstractmethod
+    async def find_expired_ids(self, before: datetime, limit: int) -> List[int]:
+        pass
+
+
+class ILiveSessionRepository(IBaseRepository[LiveSession], ABC):
+
+    @abstractmethod
+    async def unlink_notifications(self, notification_ids: List[int]) -> int:
         pass
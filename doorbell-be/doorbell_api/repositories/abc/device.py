@@ -28,3 +28,11 @@ class IFCMDeviceRepository(IBaseRepository[Any], ABC):
     @abstractmethod
     async def get_tokens_by_user_id(self, user_id: int) -> List[str]:
         pass
+
+    @abstractmethod
+    async def delete_by_tokens(self, fcm_tokens: List[str]) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def notify_tokens_changed(self, user_id: int) -> None:
+        pass
@@ -1,7 +1,9 @@
 from .token import TokenRepository
 from .user import UserRepository
-from .crud import CaptureRepository, SettingsRepository, NotificationRepository
+from .crud import CaptureRepository, SettingsRepository, NotificationRepository, LiveSessionRepository
 from .device import FCMDeviceRepository
+from .blob import BlobRepository
+from .capture_archive import CaptureArchiveRepository
 
 __all__ = [
     'TokenRepository',
@@ -9,5 +11,8 @@ __all__ = [
     'CaptureRepository',
     'SettingsRepository',
     'NotificationRepository',
+    'LiveSessionRepository',
     'FCMDeviceRepository',
+    'BlobRepository',
+    'CaptureArchiveRepository',
 ]
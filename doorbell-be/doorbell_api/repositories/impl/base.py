@@ -17,12 +17,18 @@ class BaseRepository(BaseRepo[TModel], IBaseRepository):
     async def get_all_models(self, **data: Dict[str, any]) -> List[TModel]:
         return await super().get_all(**data)
 
+    async def get_page_models(self, **pagination: Dict[str, Any]) -> Tuple[List[TModel], Optional[str]]:
+        return await super().get_page(**pagination)
+
     async def get_model_by_id(self, model_id: int) -> TModel:
         return await super().get_by_id(model_id)
 
     async def create_model(self, model: TModel) -> TModel:
         return await super().save(model)
 
+    async def create_models(self, models: List[TModel]) -> List[TModel]:
+        return await super().save_all(models)
+
     async def update_model_by_id(self, model_id: int, params: Dict[str, any]) -> TModel:
         return await super().update_by_id(model_id, params)
 
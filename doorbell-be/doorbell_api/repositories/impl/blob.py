@@ -0,0 +1,57 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from doorbell_api.models import Blob
+from doorbell_api.repositories import IBlobRepository
+from .base import BaseRepository
+
+
+class BlobRepository(BaseRepository[Blob], IBlobRepository):
+
+    def __init__(self):
+        super().__init__(Blob)
+
+    async def acquire(self, digest: str, path: str, size: int) -> int:
+        # One statement, so two captures of the same frame arriving together cannot both insert
+        insert = postgresql.insert if self.session.bind.dialect.name == 'postgresql' else sqlite.insert
+        stmt = insert(Blob).values(digest=digest, path=path, size=size, ref_count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Blob.digest],
+            set_={"ref_count": Blob.ref_count + 1, "modified_at": datetime.now()}
+        ).returning(Blob.ref_count)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def release(self, digests: List[str]) -> None:
+        by_count = defaultdict(list)
+        for digest, count in Counter(digests).items():
+            by_count[count].append(digest)
+        for count, grouped in by_count.items():
+            stmt = (
+                update(Blob)
+                .where(Blob.digest.in_(grouped))
+                .values(ref_count=Blob.ref_count - count, modified_at=datetime.now())
+            )
+            await self.session.execute(stmt)
+
+    async def lock_unreferenced(self, limit: int) -> List[Blob]:
+        # Held until commit, a capture re-acquiring one of these waits and then finds the file gone
+        stmt = (
+            select(Blob)
+            .where(Blob.ref_count <= 0)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def delete_unreferenced(self, digests: List[str]) -> int:
+        if not digests:
+            return 0
+        stmt = delete(Blob).where(Blob.digest.in_(digests), Blob.ref_count <= 0)
+        result = await self.session.execute(stmt)
+        return result.rowcount
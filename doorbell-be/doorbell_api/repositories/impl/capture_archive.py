@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, delete, exists
+
+from doorbell_api.models import ArchiveMember, Blob, Capture, CaptureArchive, Notification
+from doorbell_api.repositories import ICaptureArchiveRepository
+from .base import BaseRepository
+
+
+class CaptureArchiveRepository(BaseRepository[CaptureArchive], ICaptureArchiveRepository):
+
+    def __init__(self):
+        super().__init__(CaptureArchive)
+
+    async def find_candidates(self, before: datetime, limit: int) -> List[int]:
+        stmt = (
+            Select(Notification.id)
+            .where(
+                Notification.created_at < before,
+                exists().where(Capture.notification_id == Notification.id, Capture.content_hash.is_not(None)),
+                ~exists().where(CaptureArchive.notification_id == Notification.id)
+            )
+            .order_by(Notification.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_files(self, notification_id: int) -> List[Tuple[str, str, Optional[dict]]]:
+        # Captures from before blobs existed have no reference count keeping an archived copy alive, they stay loose
+        stmt = (
+            Select(Capture.path, Capture.content_hash, Capture.variants)
+            .join(Blob, Capture.content_hash == Blob.digest)
+            .where(Capture.notification_id == notification_id)
+            .order_by(Capture.id)
+        )
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def create_archive(self, notification_id: int, key: str, size: int,
+                             members: List[Dict[str, Any]]) -> CaptureArchive:
+        archive = CaptureArchive(
+            notification_id=notification_id,
+            key=key,
+            size=size,
+            members=[ArchiveMember(**member) for member in members]
+        )
+        return await self.save(archive)
+
+    async def locate(self, paths: List[str]) -> Dict[str, Tuple[str, int, int]]:
+        if not paths:
+            return {}
+        stmt = (
+            Select(ArchiveMember.path, CaptureArchive.key, ArchiveMember.offset, ArchiveMember.size)
+            .join(CaptureArchive, ArchiveMember.archive_id == CaptureArchive.id)
+            .where(ArchiveMember.path.in_(paths))
+            .order_by(ArchiveMember.archive_id)
+        )
+        result = await self.session.execute(stmt)
+        # A blob shared by two notifications can be in both archives, the newer one wins
+        return {path: (key, offset, size) for path, key, offset, size in result.all()}
+
+    async def delete_orphaned_members(self) -> int:
+        # The blob row is what keeps a member alive, once garbage collection dropped it the bytes are dead
+        stmt = delete(ArchiveMember).where(~exists().where(Blob.digest == ArchiveMember.digest))
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def lock_empty(self, limit: int) -> List[CaptureArchive]:
+        stmt = (
+            Select(CaptureArchive)
+            .where(~exists().where(ArchiveMember.archive_id == CaptureArchive.id))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def delete_archives(self, archive_ids: List[int]) -> int:
+        if not archive_ids:
+            return 0
+        stmt = delete(CaptureArchive).where(CaptureArchive.id.in_(archive_ids))
+        result = await self.session.execute(stmt)
+        return result.rowcount
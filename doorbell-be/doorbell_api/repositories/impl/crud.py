@@ -1,12 +1,12 @@
-from datetime import timedelta, datetime
+from datetime import datetime
 from logging import getLogger
-from typing import Optional, Any
+from typing import List, Optional, Any, Tuple
 
-from doorbell_api.models import Capture, Notification, Settings
+from doorbell_api.models import Blob, Capture, Notification, Settings, LiveSession
 from doorbell_api.repositories import (
-    ICaptureRepository, INotificationRepository, ISettingsRepository
+    ICaptureRepository, INotificationRepository, ISettingsRepository, ILiveSessionRepository
 )
-from sqlalchemy import Select
+from sqlalchemy import Select, delete, exists, func, or_, update
 from .base import BaseRepository
 
 
@@ -14,6 +14,87 @@ class CaptureRepository(BaseRepository[Capture], ICaptureRepository):
     def __init__(self):
         super().__init__(Capture)
 
+    async def link_to_notification(self, capture_ids: List[int], notification_id: int) -> int:
+        if not capture_ids:
+            return 0
+        stmt = (
+            update(Capture)
+            .where(Capture.id.in_(capture_ids))
+            .values(notification_id=notification_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def get_paths_for_notification(self, notification_id: int) -> List[str]:
+        stmt = (
+            Select(Capture.path)
+            .where(Capture.notification_id == notification_id)
+            .order_by(Capture.id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_with_owner(self, paths: List[str]) -> List[Tuple[Capture, Optional[int]]]:
+        if not paths:
+            return []
+        stmt = (
+            Select(Capture, Notification.user_id)
+            .outerjoin(Notification, Capture.notification_id == Notification.id)
+            .where(Capture.path.in_(paths))
+        )
+        result = await self.session.execute(stmt)
+        return [(capture, user_id) for capture, user_id in result.all()]
+
+    async def delete_returning_content_hashes(self, capture_ids: List[int]) -> List[Optional[str]]:
+        if not capture_ids:
+            return []
+        # Only rows this statement removed come back, so concurrent deletes never release a blob twice
+        stmt = delete(Capture).where(Capture.id.in_(capture_ids)).returning(Capture.content_hash)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_downsample_candidates(self, before: datetime, limit: int) -> List[int]:
+        # Notifications down to their best frame are done, only the next few with more are ranked. Each of
+        # them has at least one candidate, so that many notifications always fill a batch
+        pending = (
+            Select(Capture.notification_id.label('notification_id'))
+            .join(Notification, Capture.notification_id == Notification.id)
+            .where(Notification.created_at < before)
+            .group_by(Capture.notification_id)
+            .having(func.count() > 1)
+            .order_by(Capture.notification_id)
+            .limit(limit)
+            .subquery()
+        )
+        # The largest PNG of a notification is its best frame, blurred and dark frames compress smaller
+        rank = func.row_number().over(
+            partition_by=Capture.notification_id,
+            order_by=(func.coalesce(Blob.size, 0).desc(), Capture.id)
+        ).label('rank')
+        ranked = (
+            Select(Capture.id.label('id'), rank)
+            .join(pending, Capture.notification_id == pending.c.notification_id)
+            .outerjoin(Blob, Capture.content_hash == Blob.digest)
+            .subquery()
+        )
+        stmt = Select(ranked.c.id).where(ranked.c.rank > 1).order_by(ranked.c.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_expired_ids(self, before: datetime, limit: int) -> List[int]:
+        stmt = (
+            Select(Capture.id)
+            .outerjoin(Notification, Capture.notification_id == Notification.id)
+            .where(or_(
+                Notification.created_at < before,
+                Capture.notification_id.is_(None) & (Capture.created_at < before)
+            ))
+            .order_by(Capture.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
 
 class NotificationRepository(BaseRepository[Notification], INotificationRepository):
     def __init__(self):
@@ -27,34 +108,56 @@ class NotificationRepository(BaseRepository[Notification], INotificationReposito
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def is_rate_limited(self, user_id: str, rate_limit = 1):
-        filter_conditions = {
-            "user_id": int(user_id),
-            "type_str": "motion_detected"
-        }
-
-        args = {
-            "page": 1,
-            "page_size": 1,
-            "sort_by": "created_at",
-            "sort_order": "desc",
-            "filter_by": filter_conditions
-        }
-        results = await super().get_all(**args)
-        if not results:
-            return True
-        last_notification = results[0]
-        last_notification_time = last_notification.created_at
-        time_since_last_notification = datetime.now() - last_notification_time
-        required_interval = timedelta(minutes=rate_limit)
-
-        self._logger.debug(
-            f"Last motion notification for user {user_id} was at {last_notification_time}. "
-            f"Time since: {time_since_last_notification}, Required: {required_interval}"
-        )
-        return time_since_last_notification >= required_interval
+    async def find_created_since(self, since: datetime, type_strs: List[str]) -> List[Notification]:
+        stmt = (
+            Select(Notification)
+            .where(Notification.created_at >= since, Notification.type_str.in_(type_strs))
+            .order_by(Notification.created_at)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_latest_since(self, since: datetime) -> Optional[Notification]:
+        stmt = (
+            Select(Notification)
+            .where(Notification.created_at >= since)
+            .order_by(Notification.created_at.desc())
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def find_expired_ids(self, before: datetime, limit: int) -> List[int]:
+        # Captures go first, a notification is only removed once nothing refers to it
+        stmt = (
+            Select(Notification.id)
+            .where(
+                Notification.created_at < before,
+                ~exists().where(Capture.notification_id == Notification.id)
+            )
+            .order_by(Notification.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
 
 
 class SettingsRepository(BaseRepository[Settings], ISettingsRepository):
     def __init__(self):
         super().__init__(Settings)
+
+
+class LiveSessionRepository(BaseRepository[LiveSession], ILiveSessionRepository):
+    def __init__(self):
+        super().__init__(LiveSession)
+
+    async def unlink_notifications(self, notification_ids: List[int]) -> int:
+        if not notification_ids:
+            return 0
+        stmt = (
+            update(LiveSession)
+            .where(LiveSession.notification_id.in_(notification_ids))
+            .values(notification_id=None)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
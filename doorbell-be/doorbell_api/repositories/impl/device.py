@@ -1,13 +1,15 @@
 from typing import Optional, List
 
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
+from sqlalchemy import update, delete, text
 from datetime import datetime
 
 from doorbell_api.models import FCMDevice
 from doorbell_api.repositories import IFCMDeviceRepository
 from doorbell_api.repositories.impl.base import BaseRepository
 
+FCM_TOKENS_CHANGED_CHANNEL = "fcm_tokens_changed"
+
 
 class FCMDeviceRepository(BaseRepository[FCMDevice], IFCMDeviceRepository):
     
@@ -48,3 +50,19 @@ class FCMDeviceRepository(BaseRepository[FCMDevice], IFCMDeviceRepository):
         stmt = select(FCMDevice.fcm_token).where(FCMDevice.user_id == user_id)
         result = await self.session.execute(stmt)
         return [row[0] for row in result.all()]
+
+    async def delete_by_tokens(self, fcm_tokens: List[str]) -> List[int]:
+        if not fcm_tokens:
+            return []
+        stmt = delete(FCMDevice).where(FCMDevice.fcm_token.in_(fcm_tokens)).returning(FCMDevice.user_id)
+        result = await self.session.execute(stmt)
+        return [row[0] for row in result.all()]
+
+    async def notify_tokens_changed(self, user_id: int) -> None:
+        # Delivered to every listening worker when the transaction commits
+        if self.session.bind.dialect.name != 'postgresql':
+            return
+        await self.session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": FCM_TOKENS_CHANGED_CHANNEL, "payload": str(user_id)}
+        )
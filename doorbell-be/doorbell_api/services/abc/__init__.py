@@ -4,7 +4,25 @@ from .base import IBaseService
 from .crud import ICaptureService, INotificationService, ISettingsService
 from .msg_handler import IMessageHandler
 from .signaling import IWebRTCSignalingService
+from .relay import IWebRTCRelayService
+from .recording import IRecordingService
 from .device import IDeviceService
+from .ingest import IIngestService
+from .batch import IInsertBatcher
+from .event_link import IEventLinkService
+from .rate_limit import IRateLimitService
+from .push import IPushService
+from .token_cache import IFCMTokenCache
+from .pregenerate import IVideoPregenerateService
+from .video_job import IVideoJobService
+from .transcode import IImageTranscodeService
+from .media_url import IMediaUrlService
+from .capture_storage import ICaptureStorageService
+from .object_storage import IObjectStorage
+from .retention import IRetentionService
+from .capture_archive import ICaptureArchiveService
+from .query_cache import IQueryCache
+from .device_channel import IDeviceChannelService
 
 __all__ = [
     'ICaptureService',
@@ -15,5 +33,23 @@ __all__ = [
     'IBaseService',
     'IMessageHandler',
     'IWebRTCSignalingService',
-    'IDeviceService'
+    'IWebRTCRelayService',
+    'IRecordingService',
+    'IDeviceService',
+    'IIngestService',
+    'IInsertBatcher',
+    'IEventLinkService',
+    'IRateLimitService',
+    'IPushService',
+    'IFCMTokenCache',
+    'IVideoPregenerateService',
+    'IVideoJobService',
+    'IImageTranscodeService',
+    'IMediaUrlService',
+    'ICaptureStorageService',
+    'IObjectStorage',
+    'IRetentionService',
+    'ICaptureArchiveService',
+    'IQueryCache',
+    'IDeviceChannelService'
 ]
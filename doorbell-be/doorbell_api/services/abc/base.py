@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, List, Dict, Generic, Any, Optional
+from typing import TypeVar, List, Dict, Generic, Any, Optional, Tuple
 from sqlalchemy.orm import DeclarativeBase
 from pydantic import BaseModel
 
@@ -14,6 +14,10 @@ class IBaseService(ABC, Generic[TDTO, TModel]):
     async def get_all(self, **data: Dict[str, Any]) -> List[TDTO]:
         pass
 
+    @abstractmethod
+    async def get_page(self, **data: Dict[str, Any]) -> Tuple[List[TDTO], Optional[str]]:
+        pass
+
     @abstractmethod
     async def get_by_id(self, model_id: int) -> TDTO:
         pass
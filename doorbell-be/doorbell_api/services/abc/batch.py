@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Generic, TypeVar
+
+from sqlalchemy.orm import DeclarativeBase
+
+TModel = TypeVar('TModel', bound=DeclarativeBase)
+
+
+class IInsertBatcher(ABC, Generic[TModel]):
+
+    @abstractmethod
+    async def insert(self, model: TModel) -> TModel:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+
+class ICaptureArchiveService(ABC):
+
+    @abstractmethod
+    def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def run_once(self) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def read(self, path: str) -> bytes:
+        pass
+
+    @abstractmethod
+    async def locate(self, path: str) -> Optional[Tuple[str, int, int]]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple
+
+
+class ICaptureStorageService(ABC):
+
+    @abstractmethod
+    async def store_yuv420(self, data: bytes, width: int, height: int) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def release(self, content_hash: str) -> None:
+        pass
+
+    @abstractmethod
+    async def collect_garbage(self) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, AsyncGenerator
+from pathlib import Path
+from typing import Dict, Any, List, Optional, AsyncGenerator, Callable
 
 from doorbell_api.dtos import SettingsDTO, NotificationDTO, CaptureDTO
 from doorbell_api.models import Settings, Notification, Capture
@@ -20,5 +21,20 @@ class INotificationService(IBaseService[NotificationDTO, Notification], ABC):
 class ICaptureService(IBaseService[CaptureDTO, Capture], ABC):
 
     @abstractmethod
-    def generate_video(self, ids: list[str]) -> AsyncGenerator[bytes, None]:
+    async def delete_releasing_blobs(self, model_ids: List[int]) -> int:
+        pass
+
+    @abstractmethod
+    async def filter_owned(self, paths: List[str], user_id: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def get_video_key(self, paths: list[str]) -> str:
+        pass
+
+    @abstractmethod
+    def generate_video(
+            self, ids: list[str], progress: Optional[Callable[[int, int], None]] = None,
+            spool: Optional[Callable[[Path], None]] = None
+    ) -> AsyncGenerator[bytes, None]:
         pass
@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from doorbell_shared.models import Message, MessageType
+
+
+class IDeviceChannelService(ABC):
+
+    @abstractmethod
+    def register(self, connection_id: str, device_id: str, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        pass
+
+    @abstractmethod
+    def unregister(self, connection_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def resolve(self, message: Message) -> bool:
+        pass
+
+    @abstractmethod
+    async def request(self, user_id: str, msg_type: MessageType, payload: Optional[Dict[str, Any]] = None) -> Message:
+        pass
@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class IEventLinkService(ABC):
+
+    @abstractmethod
+    def remember(self, rpi_event_id: Optional[str], user_id: Optional[str], notification_id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def resolve(self, rpi_event_id: str, user_id: Optional[str]) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def defer(self, capture_id: int, rpi_event_id: str, user_id: Optional[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
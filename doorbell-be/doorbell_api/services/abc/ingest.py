@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class IIngestService(ABC):
+
+    @abstractmethod
+    def open_pipeline(
+            self,
+            connection_id: str,
+            process: Callable[[Any, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+            reply: Callable[[Dict[str, Any]], Awaitable[None]]
+    ) -> Any:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class IMediaUrlService(ABC):
+
+    @abstractmethod
+    async def sign_captures(self, paths: List[str], user_id: str) -> Dict[str, Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def sign_file(self, file_path: Path, user_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def verify(self, path: str, expires: int, user_id: str, signature: str) -> bool:
+        pass
+
+    @abstractmethod
+    def resolve(self, path: str, expires: int, user_id: str, signature: str) -> Optional[Path]:
+        pass
+
+    @abstractmethod
+    def accel_redirect(self, path: str) -> Optional[str]:
+        pass
@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Tuple
+
+
+class IObjectStorage(ABC):
+
+    @property
+    @abstractmethod
+    def is_local(self) -> bool:
+        pass
+
+    @abstractmethod
+    def local_path(self, key: str) -> Optional[Path]:
+        pass
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: Optional[str] = None) -> int:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        pass
+
+    @abstractmethod
+    async def get_range(self, key: str, offset: int, length: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncGenerator[bytes, None]:
+        pass
+
+    @abstractmethod
+    async def delete(self, keys: List[str]) -> int:
+        pass
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    async def presign(self, key: str, expires_seconds: int) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+
+class IVideoPregenerateService(ABC):
+
+    @abstractmethod
+    def touch(self, notification_id: int) -> None:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+
+class IPushService(ABC):
+
+    @abstractmethod
+    def enqueue(self, title: str, data: Dict[str, str], fcm_tokens: List[str]) -> bool:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from pydantic import TypeAdapter
+
+T = TypeVar('T')
+
+
+class IQueryCache(ABC):
+
+    @abstractmethod
+    async def get_or_load(self, namespace: str, key: str, load: Callable[[], Awaitable[T]],
+                          adapter: TypeAdapter[T]) -> T:
+        pass
+
+    @abstractmethod
+    async def invalidate(self, *namespaces: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
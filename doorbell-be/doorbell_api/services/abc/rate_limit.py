@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+
+class IRateLimitService(ABC):
+
+    @abstractmethod
+    def get_limit(self, event_type: str) -> Optional[Tuple[int, float]]:
+        pass
+
+    @abstractmethod
+    async def allow(self, user_id: str, event_type: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
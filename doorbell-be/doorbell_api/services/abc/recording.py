@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class IRecordingService(ABC):
+
+    @property
+    @abstractmethod
+    def enabled(self) -> bool:
+        pass
+
+    @abstractmethod
+    async def start(self, room_id: str, receiver: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def stop(self, room_id: str) -> None:
+        pass
@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class IWebRTCRelayService(ABC):
+
+    @property
+    @abstractmethod
+    def enabled(self) -> bool:
+        pass
+
+    @abstractmethod
+    def set_sender(self, sender: Callable[[str, Dict[str, Any]], Awaitable[bool]]) -> None:
+        pass
+
+    @abstractmethod
+    def get_relay_id(self, room_id: str) -> str:
+        pass
+
+    @abstractmethod
+    def is_relay_id(self, connection_id: Optional[str]) -> bool:
+        pass
+
+    @abstractmethod
+    def is_relayed_viewer(self, connection_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def handle_viewer_offer(self, room_id: str, broadcaster_id: str, viewer_id: str, sdp: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def handle_viewer_ice_candidate(self, viewer_id: str, candidate: Optional[dict]) -> None:
+        pass
+
+    @abstractmethod
+    async def handle_upstream_answer(self, relay_id: str, sdp: str) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_viewer(self, viewer_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def close_room(self, room_id: str) -> None:
+        pass
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+
+class IRetentionService(ABC):
+
+    @abstractmethod
+    def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def run_once(self) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+class IFCMTokenCache(ABC):
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[List[str]]:
+        pass
+
+    @abstractmethod
+    def set(self, user_id: int, fcm_tokens: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate(self, user_id: int) -> None:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
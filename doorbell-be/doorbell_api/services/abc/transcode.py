@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class IImageTranscodeService(ABC):
+
+    @abstractmethod
+    async def negotiate(self, capture_path: str, accept: Optional[str], width: Optional[int],
+                        quality: Optional[int]) -> Tuple[str, str]:
+        pass
+
+    @abstractmethod
+    async def get_variant(self, capture_path: str, accept: Optional[str], width: Optional[int],
+                          quality: Optional[int]) -> Tuple[Path, str, str]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
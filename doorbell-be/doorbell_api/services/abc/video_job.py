@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+
+class IVideoJobService(ABC):
+
+    @abstractmethod
+    async def submit(self, paths: list[str], background: bool = False) -> str:
+        pass
+
+    @abstractmethod
+    async def open_stream(self, paths: list[str]) -> Tuple[str, AsyncGenerator[bytes, None]]:
+        pass
+
+    @abstractmethod
+    async def wait(self, job_id: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_paths(self, job_id: str) -> Optional[List[str]]:
+        pass
+
+    @abstractmethod
+    def get_video_path(self, job_id: str) -> Optional[Path]:
+        pass
+
+    @abstractmethod
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, Any]:
+        pass
@@ -4,7 +4,25 @@ from .notification import NotificationService
 from .crud import CaptureService, SettingsService
 from .msg_handler import MessageHandler
 from .signaling import WebRTCSignalingService
+from .relay import WebRTCRelayService
+from .recording import RecordingService
 from .device import DeviceService
+from .ingest import IngestService
+from .batch import InsertBatcher
+from .event_link import EventLinkService
+from .rate_limit import RateLimitService
+from .push import PushService
+from .token_cache import FCMTokenCache
+from .pregenerate import VideoPregenerateService
+from .video_job import VideoJobService
+from .transcode import ImageTranscodeService
+from .media_url import MediaUrlService
+from .capture_storage import CaptureStorageService
+from .object_storage import LocalObjectStorage, S3ObjectStorage
+from .retention import RetentionService
+from .capture_archive import CaptureArchiveService
+from .query_cache import QueryCache
+from .device_channel import DeviceChannelService
 
 __all__ = [
     'AuthService',
@@ -14,5 +32,24 @@ __all__ = [
     'SettingsService',
     'MessageHandler',
     'WebRTCSignalingService',
+    'WebRTCRelayService',
+    'RecordingService',
     'DeviceService',
+    'IngestService',
+    'InsertBatcher',
+    'EventLinkService',
+    'RateLimitService',
+    'PushService',
+    'FCMTokenCache',
+    'VideoPregenerateService',
+    'VideoJobService',
+    'ImageTranscodeService',
+    'MediaUrlService',
+    'CaptureStorageService',
+    'LocalObjectStorage',
+    'S3ObjectStorage',
+    'RetentionService',
+    'CaptureArchiveService',
+    'QueryCache',
+    'DeviceChannelService',
 ]
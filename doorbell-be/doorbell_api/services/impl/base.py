@@ -1,10 +1,12 @@
 import datetime
-from typing import TypeVar, List, Dict, Any, Generic, Optional
-from pydantic import BaseModel
+import hashlib
+import json
+from typing import TypeVar, List, Dict, Any, Generic, Optional, Tuple
+from pydantic import BaseModel, TypeAdapter
 
 from doorbell_api.mappers.abc import IMapper
 from doorbell_api.repositories import IBaseRepository
-from doorbell_api.services import IBaseService
+from doorbell_api.services import IBaseService, IInsertBatcher, IQueryCache
 from doorbell_api.configs.db import Base, transactional
 
 TDTO = TypeVar('TDTO', bound=BaseModel)
@@ -14,26 +16,91 @@ TRepository = TypeVar('TRepository', bound=IBaseRepository)
 
 class BaseService(IBaseService[TDTO, TModel], Generic[TDTO, TModel]):
 
-    def __init__(self, mapper: IMapper[TDTO, TModel], repo: IBaseRepository[TModel]):
+    def __init__(
+            self,
+            mapper: IMapper[TDTO, TModel],
+            repo: IBaseRepository[TModel],
+            batcher: Optional[IInsertBatcher[TModel]] = None,
+            cache: Optional[IQueryCache] = None,
+            invalidates: Tuple[str, ...] = ()
+    ):
         self._mapper = mapper
         self._repo = repo
+        self._batcher = batcher
+        self._cache = cache
+        if cache is not None:
+            # Reads are cached per table, writes also invalidate the tables whose DTOs embed this one
+            self._cache_namespace = mapper.orm_model.__tablename__
+            self._invalidates = (self._cache_namespace, *invalidates)
+            self._dto_adapter = TypeAdapter(mapper.dto_model)
+            self._list_adapter = TypeAdapter(List[mapper.dto_model])
+            self._page_adapter = TypeAdapter(Tuple[List[mapper.dto_model], Optional[str]])
+
+    @staticmethod
+    def _query_key(kind: str, data: Dict[str, Any]) -> str:
+        query = json.dumps(data, sort_keys=True, default=str)
+        return f"{kind}:{hashlib.sha256(query.encode('utf-8')).hexdigest()}"
+
+    async def _invalidate(self) -> None:
+        # Called once the write committed, before that a reader could cache the old rows again
+        if self._cache is not None:
+            await self._cache.invalidate(*self._invalidates)
 
     async def get_all(self, **data: Dict[str, any]) -> List[TDTO]:
+        if self._cache is None:
+            return await self._get_all(**data)
+        return await self._cache.get_or_load(
+            self._cache_namespace, self._query_key("all", data), lambda: self._get_all(**data), self._list_adapter
+        )
+
+    async def _get_all(self, **data: Dict[str, any]) -> List[TDTO]:
         models = await self._repo.get_all_models(**data)
         return [self._mapper.to_dto(model) for model in models]
 
+    async def get_page(self, **data: Dict[str, Any]) -> Tuple[List[TDTO], Optional[str]]:
+        if self._cache is None:
+            return await self._get_page(**data)
+        return await self._cache.get_or_load(
+            self._cache_namespace, self._query_key("page", data), lambda: self._get_page(**data), self._page_adapter
+        )
+
+    async def _get_page(self, **data: Dict[str, Any]) -> Tuple[List[TDTO], Optional[str]]:
+        models, next_cursor = await self._repo.get_page_models(**data)
+        return [self._mapper.to_dto(model) for model in models], next_cursor
+
     async def get_by_id(self, model_id: int) -> TDTO:
+        if self._cache is None:
+            return await self._get_by_id(model_id)
+        return await self._cache.get_or_load(
+            self._cache_namespace, f"id:{model_id}", lambda: self._get_by_id(model_id), self._dto_adapter
+        )
+
+    async def _get_by_id(self, model_id: int) -> TDTO:
         model = await self._repo.get_model_by_id(model_id)
         return self._mapper.to_dto(model)
 
-    @transactional
     async def create(self, dto: TDTO) -> TDTO:
+        if self._batcher:
+            new_model = await self._batcher.insert(self._mapper.to_orm(dto))
+            created = self._mapper.to_dto(new_model)
+        else:
+            created = await self._create(dto)
+        await self._invalidate()
+        return created
+
+    @transactional
+    async def _create(self, dto: TDTO) -> TDTO:
         model = self._mapper.to_orm(dto)
         new_model = await self._repo.create_model(model)
         return self._mapper.to_dto(new_model)
 
-    @transactional
     async def update_by_id(self, model_id: int, dto: TDTO) -> TDTO:
+        updated = await self._update_by_id(model_id, dto)
+        await self._invalidate()
+        return updated
+
+    @transactional
+    async def _update_by_id(self, model_id: int, dto: TDTO) -> TDTO:
         kwargs = self._mapper.dto_kwargs(dto)
         kwargs.pop('id', None)
         kwargs.pop('created_at', None)
@@ -41,12 +108,21 @@ class BaseService(IBaseService[TDTO, TModel], Generic[TDTO, TModel]):
         updated_model = await self._repo.update_model_by_id(model_id, kwargs)
         return self._mapper.to_dto(updated_model)
 
-    @transactional
     async def delete_by_id(self, model_id: int) -> None:
-        await self._repo.delete_model_by_id(model_id)
+        await self._delete_by_id(model_id)
+        await self._invalidate()
 
     @transactional
+    async def _delete_by_id(self, model_id: int) -> None:
+        await self._repo.delete_model_by_id(model_id)
+
     async def delete_by_ids(self, model_ids: List[int]) -> int:
+        deleted = await self._delete_by_ids(model_ids)
+        await self._invalidate()
+        return deleted
+
+    @transactional
+    async def _delete_by_ids(self, model_ids: List[int]) -> int:
         return await self._repo.delete_models_by_ids(model_ids)
 
     async def count_all(self, filter_by: Optional[Dict[str, Any]] = None) -> int:
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import deque
+from logging import getLogger
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.helpers import MetricsHelper
+from doorbell_api.repositories import IBaseRepository
+from doorbell_api.services import IInsertBatcher
+from doorbell_api.services.abc.batch import TModel
+
+METRIC_SAMPLES = 512
+
+
+class InsertBatcher(IInsertBatcher[TModel]):
+    """Write-behind inserts, rows wait up to max_delay_ms and are flushed together in one transaction."""
+
+    def __init__(self, name: str, repo: IBaseRepository[TModel], max_rows: int, max_delay_ms: int):
+        self._name = name
+        self._repo = repo
+        self._max_rows = max(1, max_rows)
+        self._max_delay = max(0, max_delay_ms) / 1000
+        self._pending: List[Tuple[TModel, asyncio.Future]] = []
+        self._has_rows = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._logger = getLogger(__name__)
+
+        self._rows = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._flush_seconds = 0.0
+        self._batch_sizes: Deque[int] = deque(maxlen=METRIC_SAMPLES)
+        self._flush_ms: Deque[float] = deque(maxlen=METRIC_SAMPLES)
+
+    async def insert(self, model: TModel) -> TModel:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"insert-batcher-{self._name}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((model, future))
+        self._has_rows.set()
+        if len(self._pending) >= self._max_rows:
+            self._batch_full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_rows.wait()
+            if len(self._pending) < self._max_rows:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self._max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self._pending = self._pending[:self._max_rows], self._pending[self._max_rows:]
+            self._batch_full.clear()
+            if not self._pending:
+                self._has_rows.clear()
+            elif len(self._pending) >= self._max_rows:
+                self._batch_full.set()
+
+            # Rows arriving while this batch is written make up the next one
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[TModel, asyncio.Future]]) -> None:
+        started_at = time.perf_counter()
+        try:
+            async with own_session():
+                models = await self._insert_all([model for model, _ in batch])
+        except Exception as e:
+            self._failed_batches += 1
+            self._logger.error(f"Batched insert of {len(batch)} {self._name} rows failed: {e}", exc_info=True)
+            if len(batch) > 1:
+                # One bad row must not fail everyone else's insert
+                for item in batch:
+                    await self._flush([item])
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started_at
+        self._rows += len(models)
+        self._batches += 1
+        self._flush_seconds += elapsed
+        self._batch_sizes.append(len(models))
+        self._flush_ms.append(elapsed * 1000)
+        self._logger.debug(f"Inserted {len(models)} {self._name} rows in {elapsed * 1000:.1f} ms")
+
+        for model, (_, future) in zip(models, batch):
+            if not future.done():
+                future.set_result(model)
+
+    @transactional
+    async def _insert_all(self, models: List[TModel]) -> List[TModel]:
+        return await self._repo.create_models(models)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "rows": self._rows,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "pending": len(self._pending),
+            "batch_size": MetricsHelper.percentiles(self._batch_sizes),
+            "flush_ms": MetricsHelper.percentiles(self._flush_ms),
+            "rows_per_sec": round(self._rows / self._flush_seconds, 1) if self._flush_seconds else None
+        }
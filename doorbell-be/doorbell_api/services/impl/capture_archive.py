@@ -0,0 +1,250 @@
+import asyncio
+import io
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import IO, Any, AsyncGenerator, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.helpers import TTLCache
+from doorbell_api.repositories import ICaptureArchiveRepository
+from doorbell_api.services import ICaptureArchiveService, IObjectStorage
+
+STARTUP_DELAY_SECONDS = 90
+GC_BATCH_SIZE = 100
+ARCHIVE_PREFIX = "archives"
+# Archives larger than this are spooled to disk while they are packed
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class CaptureArchiveService(ICaptureArchiveService):
+    """Packs the files of old notifications into one tar each, frames are read back with a ranged read."""
+
+    @inject
+    def __init__(
+            self,
+            object_storage: IObjectStorage = Provide['object_storage'],
+            capture_archive_repo: ICaptureArchiveRepository = Provide['capture_archive_repo'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._storage = object_storage
+        self._archive_repo = capture_archive_repo
+        self._logger = getLogger(__name__)
+
+        archive_config = config.get('archive', {}) or {}
+        self._enabled = str(archive_config.get('enabled', 'false')).lower() in ('1', 'true', 'yes')
+        self._after_days = max(1, int(archive_config.get('after_days') or 30))
+        self._interval_seconds = max(1, int(archive_config.get('interval_minutes') or 60)) * 60
+        self._batch_size = max(1, int(archive_config.get('batch_size') or 50))
+
+        # Members never move, only a collected archive invalidates an entry and that read fails anyway
+        self._locations: TTLCache[str, Tuple[str, int, int]] = TTLCache(4096, 300)
+        self._task: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self._archived = 0
+        self._packed_files = 0
+        self._packed_bytes = 0
+        self._collected = 0
+        self._archive_reads = 0
+        self._last_report: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        if not self._enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever(), name="capture-archive")
+        self._logger.info(f"Captures of notifications older than {self._after_days} day(s) get archived")
+
+    async def _run_forever(self) -> None:
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._logger.error(f"Archive run failed: {e}", exc_info=True)
+            await asyncio.sleep(self._interval_seconds)
+
+    async def run_once(self) -> Dict[str, Any]:
+        async with self._running:
+            started = time.perf_counter()
+            before = datetime.now() - timedelta(days=self._after_days)
+            report = {"archives": 0, "files": 0, "bytes": 0, "collected": 0}
+
+            failed = set()
+            while True:
+                async with own_session():
+                    candidates = await self._find_candidates(before)
+                notification_ids = [notification_id for notification_id in candidates if notification_id not in failed]
+                for notification_id in notification_ids:
+                    try:
+                        files, size = await self._archive_notification(notification_id)
+                    except Exception as e:
+                        # Left loose and retried on the next run, the others still get archived
+                        failed.add(notification_id)
+                        self._logger.error(f"Archiving notification {notification_id} failed: {e}", exc_info=True)
+                        continue
+                    report["archives"] += 1
+                    report["files"] += files
+                    report["bytes"] += size
+                if len(notification_ids) < self._batch_size:
+                    break
+
+            report["collected"] = await self._collect_garbage()
+            report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._last_report = report
+            if report["archives"] or report["collected"]:
+                self._logger.info(f"Archive run finished: {report}")
+            return report
+
+    @transactional
+    async def _find_candidates(self, before: datetime) -> List[int]:
+        return await self._archive_repo.find_candidates(before, self._batch_size)
+
+    @transactional
+    async def _find_files(self, notification_id: int) -> List[Tuple[str, str, Optional[dict]]]:
+        return await self._archive_repo.find_files(notification_id)
+
+    async def _archive_notification(self, notification_id: int) -> Tuple[int, int]:
+        entries: Dict[str, str] = {}
+        async with own_session():
+            found = await self._find_files(notification_id)
+        for path, digest, variants in found:
+            entries[path] = digest
+            for variant_path in (variants or {}).values():
+                entries[variant_path] = digest
+
+        offsets: Dict[str, Tuple[int, int]] = {}
+        loose: List[str] = []
+        key = f"{ARCHIVE_PREFIX}/{uuid4().hex[:2]}/{notification_id}-{uuid4().hex}.tar"
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            # Files are fetched and packed one at a time, only the tar itself grows with the notification
+            with tarfile.open(fileobj=spool, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+                for path in entries:
+                    try:
+                        data = await self._storage.get(path)
+                        loose.append(path)
+                    except FileNotFoundError:
+                        try:
+                            # Shared with a notification archived before, this archive gets its own copy
+                            data = await self.read(path)
+                        except FileNotFoundError:
+                            self._logger.warning(f"Capture file {path} of notification {notification_id} is missing")
+                            continue
+                    offsets[path] = await asyncio.to_thread(self._pack, tar, path, data)
+            if not offsets:
+                raise FileNotFoundError(f"No capture file of notification {notification_id} is left to archive")
+
+            spool.seek(0)
+            size = await self._storage.put_stream(key, self._read_spool(spool), "application/x-tar")
+        members = [
+            {"path": path, "digest": entries[path], "offset": offset, "size": member_size}
+            for path, (offset, member_size) in offsets.items()
+        ]
+        try:
+            async with own_session():
+                await self._save_archive(notification_id, key, size, members)
+        except BaseException:
+            await self._storage.delete([key])
+            raise
+
+        # Only after the index committed, until then every read still finds the loose file
+        await self._storage.delete(loose)
+        self._archived += 1
+        self._packed_files += len(members)
+        self._packed_bytes += size
+        return len(members), size
+
+    @staticmethod
+    def _pack(tar: tarfile.TarFile, path: str, data: bytes) -> Tuple[int, int]:
+        # Plain tar, the images are compressed already and every member stays readable with one seek
+        info = tarfile.TarInfo(path)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        # The data starts right after the header, addfile does not record where on the TarInfo
+        header = info.tobuf(tarfile.USTAR_FORMAT, tar.encoding, tar.errors)
+        offset = tar.offset + len(header)
+        tar.addfile(info, io.BytesIO(data))
+        return offset, len(data)
+
+    @staticmethod
+    async def _read_spool(spool: IO[bytes]) -> AsyncGenerator[bytes, None]:
+        while chunk := await asyncio.to_thread(spool.read, UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    @transactional
+    async def _save_archive(self, notification_id: int, key: str, size: int, members: List[Dict[str, Any]]) -> None:
+        await self._archive_repo.create_archive(notification_id, key, size, members)
+
+    async def read(self, path: str) -> bytes:
+        try:
+            return await self._storage.get(path)
+        except FileNotFoundError:
+            pass
+        location = await self.locate(path)
+        if location is None:
+            raise FileNotFoundError(path)
+        key, offset, size = location
+        try:
+            data = await self._storage.get_range(key, offset, size)
+        except FileNotFoundError:
+            self._locations.pop(path)
+            raise FileNotFoundError(path)
+        self._archive_reads += 1
+        return data
+
+    async def locate(self, path: str) -> Optional[Tuple[str, int, int]]:
+        location = self._locations.get(path)
+        if location is None:
+            async with own_session():
+                location = (await self._locate([path])).get(path)
+            if location is not None:
+                self._locations.set(path, location)
+        return location
+
+    @transactional
+    async def _locate(self, paths: List[str]) -> Dict[str, Tuple[str, int, int]]:
+        return await self._archive_repo.locate(paths)
+
+    async def _collect_garbage(self) -> int:
+        collected = 0
+        async with own_session():
+            await self._delete_orphaned_members()
+        while True:
+            async with own_session():
+                batch = await self._collect_batch()
+            collected += batch
+            if batch < GC_BATCH_SIZE:
+                break
+        self._collected += collected
+        return collected
+
+    @transactional
+    async def _delete_orphaned_members(self) -> int:
+        return await self._archive_repo.delete_orphaned_members()
+
+    @transactional
+    async def _collect_batch(self) -> int:
+        # Archives go once none of their blobs is referenced, partly dead ones are kept whole
+        archives = await self._archive_repo.lock_empty(GC_BATCH_SIZE)
+        if not archives:
+            return 0
+        await self._storage.delete([archive.key for archive in archives])
+        return await self._archive_repo.delete_archives([archive.id for archive in archives])
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._enabled,
+            "after_days": self._after_days,
+            "archived": self._archived,
+            "packed_files": self._packed_files,
+            "packed_bytes": self._packed_bytes,
+            "collected": self._collected,
+            "archive_reads": self._archive_reads,
+            "running": self._running.locked(),
+            "last_run": self._last_report
+        }
@@ -0,0 +1,157 @@
+import hashlib
+from logging import getLogger
+from typing import Any, Dict, List, Tuple
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import transactional
+from doorbell_api.helpers import BoundedExecutor, ImageHelper
+from doorbell_api.helpers.image import VARIANT_FORMATS
+from doorbell_api.repositories import IBlobRepository
+from doorbell_api.services import ICaptureStorageService, IObjectStorage
+
+CAPTURE_EXTENSION = "png"
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "jpg": "image/jpeg", "avif": "image/avif"}
+GC_BATCH_SIZE = 500
+
+
+class CaptureStorageService(ICaptureStorageService):
+    """Stores frames under the hash of their PNG, identical frames share one file reference counted in blobs."""
+
+    @inject
+    def __init__(
+            self,
+            object_storage: IObjectStorage = Provide['object_storage'],
+            blob_repo: IBlobRepository = Provide['blob_repo'],
+            image_executor: BoundedExecutor = Provide['image_executor'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._storage = object_storage
+        self._blob_repo = blob_repo
+        self._executor = image_executor
+        self._logger = getLogger(__name__)
+
+        capture_config = config.get('capture', {}) or {}
+        self._variants = self._parse_variants(capture_config.get('variants') or "")
+        self._variant_quality = int(capture_config.get('variant_quality') or 75)
+
+        self._stored = 0
+        self._deduplicated = 0
+        self._collected = 0
+        self._reclaimed = 0
+
+    @staticmethod
+    def _parse_variants(spec: str) -> List[Tuple[int, str]]:
+        # "160:webp,480:jpeg" -> a 160px wide WebP and a 480px wide JPEG next to every capture
+        variants = []
+        for entry in spec.split(','):
+            if not entry.strip():
+                continue
+            width, variant_format = entry.split(':')
+            variant_format = variant_format.strip().lower()
+            if variant_format not in VARIANT_FORMATS:
+                raise ValueError(f"Unsupported capture variant format '{variant_format}'")
+            variants.append((int(width), variant_format))
+        return variants
+
+    @staticmethod
+    def _blob_key(digest: str, name: str) -> str:
+        # Two levels of 256 directories keep every directory small even with millions of blobs
+        return f"{digest[:2]}/{digest[2:4]}/{name}"
+
+    async def store_yuv420(self, data: bytes, width: int, height: int) -> Dict[str, Any]:
+        image, png = await self._executor.run(self._encode_frame, data, width, height)
+        digest = hashlib.sha256(png).hexdigest()
+        stored = await self._write_files(image, png, digest)
+        ref_count = await self._acquire(digest, stored["path"], stored["size"])
+        if ref_count == 1:
+            # Garbage collection of an earlier blob with this hash may have listed its prefix before our write,
+            # taking the reference waited for it to finish, so whatever is missing now is written again
+            stored = await self._write_files(image, png, digest)
+
+        self._stored += 1
+        if ref_count > 1:
+            self._deduplicated += 1
+        return {
+            "path": stored["path"],
+            "content_hash": digest,
+            "variants": stored["variants"],
+            "deduplicated": ref_count > 1
+        }
+
+    async def release(self, content_hash: str) -> None:
+        # Only drops the count, the files go with the next garbage collection like any other unreferenced blob
+        await self._release(content_hash)
+
+    async def _write_files(self, image, png: bytes, digest: str) -> Dict[str, Any]:
+        path = self._blob_key(digest, f"{digest}.{CAPTURE_EXTENSION}")
+
+        # Same name means same content, a copy stored earlier is as good as ours
+        created = not await self._storage.exists(path)
+        if created:
+            await self._storage.put(path, png, MEDIA_TYPES[CAPTURE_EXTENSION])
+
+        variants = {
+            f"{w}_{f}": self._blob_key(digest, f"{digest}_{w}.{VARIANT_FORMATS[f][1]}")
+            for w, f in self._variants if w < image.width
+        }
+        # A frame seen before already has its thumbnails, only ones added to the config since get encoded
+        missing = [(w, f) for w, f in self._variants
+                   if f"{w}_{f}" in variants and (created or not await self._storage.exists(variants[f"{w}_{f}"]))]
+        if missing:
+            encoded = await self._executor.run(ImageHelper.encode_variants, image, missing, self._variant_quality)
+            for name, (extension, variant_data) in encoded.items():
+                await self._storage.put(variants[name], variant_data, MEDIA_TYPES.get(extension))
+
+        return {"path": path, "size": len(png), "variants": variants}
+
+    @staticmethod
+    def _encode_frame(data: bytes, width: int, height: int):
+        image = ImageHelper.yuv420_to_image(data, width, height)
+        return image, ImageHelper.encode_png(image)
+
+    @transactional
+    async def _acquire(self, digest: str, path: str, size: int) -> int:
+        return await self._blob_repo.acquire(digest, path, size)
+
+    @transactional
+    async def _release(self, digest: str) -> None:
+        await self._blob_repo.release([digest])
+
+    async def collect_garbage(self) -> Tuple[int, int]:
+        collected = 0
+        reclaimed = 0
+        while True:
+            batch, batch_bytes = await self._collect_batch()
+            collected += batch
+            reclaimed += batch_bytes
+            if batch < GC_BATCH_SIZE:
+                break
+        if collected:
+            self._collected += collected
+            self._reclaimed += reclaimed
+            self._logger.info(f"Removed {collected} capture blob(s) no capture refers to anymore, {reclaimed} bytes")
+        return collected, reclaimed
+
+    @transactional
+    async def _collect_batch(self) -> Tuple[int, int]:
+        blobs = await self._blob_repo.lock_unreferenced(GC_BATCH_SIZE)
+        if not blobs:
+            return 0, 0
+        digests = [blob.digest for blob in blobs]
+        reclaimed = 0
+        # Files go while the rows are locked, a capture taking a new reference waits and writes them again
+        for digest in digests:
+            _, removed_bytes = await self._storage.delete_prefix(self._blob_key(digest, digest))
+            reclaimed += removed_bytes
+        await self._blob_repo.delete_unreferenced(digests)
+        return len(digests), reclaimed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._storage.get_metrics(),
+            "stored": self._stored,
+            "deduplicated": self._deduplicated,
+            "collected": self._collected,
+            "reclaimed_bytes": self._reclaimed
+        }
@@ -1,21 +1,44 @@
 import asyncio
-import os
-import tempfile
+import hashlib
+import json
+from collections import deque
+from contextlib import aclosing
 from logging import getLogger
-from typing import Any, AsyncGenerator
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Deque, List, Optional, Set
 
 import aiofiles
+from sqlalchemy.exc import NoResultFound
 from ...dtos import CaptureDTO, SettingsDTO
-from ...models import Capture, Settings
-from ...services import ICaptureService, ISettingsService
+from ...helpers import DiskLRUCache
+from ...models import Capture, Notification, Settings
+from ...services import (
+    ICaptureService, ISettingsService, IInsertBatcher, ICaptureStorageService, IObjectStorage, ICaptureArchiveService,
+    IQueryCache
+)
 from ...repositories import (
-    ICaptureRepository, ISettingsRepository
+    ICaptureRepository, ISettingsRepository, IBlobRepository
 )
 from dependency_injector.wiring import inject, Provide
 
+from ...configs.db import transactional
 from ...mappers import IMapper
 from .base import BaseService
 
+VIDEO_CHUNK_SIZE = 64 * 1024
+VIDEO_STORAGE_PREFIX = "videos/"
+FRAME_READ_AHEAD = 4
+VIDEO_ENCODE_PARAMS = {
+    'frame_rate': 8,
+    'codec': 'libx264',
+    'pix_fmt': 'yuv420p',
+    'crf': 18,
+    'preset': 'veryfast'
+}
+
+# Uploads outlive the request that encoded the video, the loop itself only keeps weak references
+_video_uploads: Set[asyncio.Task] = set()
+
 
 class CaptureService(BaseService[CaptureDTO, Capture], ICaptureService):
 
@@ -24,99 +47,260 @@ class CaptureService(BaseService[CaptureDTO, Capture], ICaptureService):
         self,
         mapper: IMapper[CaptureDTO, Capture] = Provide['capture_mapper'],
         repo: ICaptureRepository = Provide['capture_repo'],
-        config: dict[str, Any] = Provide['config'],
+        batcher: IInsertBatcher[Capture] = Provide['capture_batcher'],
+        video_cache: DiskLRUCache = Provide['video_cache'],
+        blob_repo: IBlobRepository = Provide['blob_repo'],
+        capture_storage_service: ICaptureStorageService = Provide['capture_storage_service'],
+        object_storage: IObjectStorage = Provide['object_storage'],
+        capture_archive_service: ICaptureArchiveService = Provide['capture_archive_service'],
+        query_cache: IQueryCache = Provide['query_cache'],
     ):
-        super().__init__(mapper, repo)
+        # Notifications embed their captures
+        super().__init__(mapper, repo, batcher, query_cache, invalidates=(Notification.__tablename__,))
         self._repo = repo
-        self._capture_dir = config['capture_dir']
+        self._video_cache = video_cache
+        self._blob_repo = blob_repo
+        self._capture_storage_service = capture_storage_service
+        self._storage = object_storage
+        self._archive = capture_archive_service
         self._logger = getLogger()
 
-    async def generate_video(self, paths: list[str]) -> AsyncGenerator[bytes, None]:
-        """
-            Generate stop motion video from capture paths using ffmpeg
-            Returns an async generator that yields video bytes
-        """
+    async def delete_by_id(self, model_id: int) -> None:
+        if not await self.delete_releasing_blobs([model_id]):
+            raise NoResultFound(f"No Capture found with id {model_id}")
+        await self._collect_blobs()
+
+    async def delete_by_ids(self, model_ids: List[int]) -> int:
+        deleted = await self.delete_releasing_blobs(model_ids)
+        await self._collect_blobs()
+        return deleted
+
+    async def delete_releasing_blobs(self, model_ids: List[int]) -> int:
+        deleted = await self._delete_releasing_blobs(model_ids)
+        await self._invalidate()
+        return deleted
+
+    @transactional
+    async def _delete_releasing_blobs(self, model_ids: List[int]) -> int:
+        # Counts drop in the same transaction as the rows, files are only removed once that committed
+        content_hashes = await self._repo.delete_returning_content_hashes(model_ids)
+        await self._blob_repo.release([content_hash for content_hash in content_hashes if content_hash])
+        return len(content_hashes)
+
+    async def _collect_blobs(self) -> None:
+        try:
+            await self._capture_storage_service.collect_garbage()
+        except Exception as e:
+            # The captures are gone either way, a later delete collects the leftovers
+            self._logger.warning(f"Could not remove unreferenced capture blobs: {e}")
+
+    @transactional
+    async def filter_owned(self, paths: List[str], user_id: str) -> List[str]:
+        owned = {
+            capture.path for capture, owner_id in await self._repo.find_with_owner(list(set(paths)))
+            # Same rule as signed links, captures of another user's notifications are treated as missing
+            if owner_id is None or str(owner_id) == str(user_id)
+        }
+        return [path for path in paths if path in owned]
+
+    async def get_video_key(self, paths: list[str]) -> str:
+        return self._video_key(await self._resolve_frames(paths))
+
+    @staticmethod
+    def _video_key(frame_paths: list[str]) -> str:
+        # Changing any encode parameter has to produce new keys, otherwise old encodes would be served
+        key_source = json.dumps({"frames": frame_paths, "encode": VIDEO_ENCODE_PARAMS}, sort_keys=True)
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    async def _resolve_frames(self, paths: list[str]) -> list[str]:
         if not paths:
             raise ValueError("No paths provided")
 
-        temp_dir = None
+        # Missing frames must not end up in the video key, a video of them would be cached under it
+        found = await asyncio.gather(*(self._frame_exists(path) for path in paths))
+        frame_keys = [path for path, exists in zip(paths, found) if exists]
+
+        if not frame_keys:
+            raise ValueError("Failed to process any images")
+        return frame_keys
+
+    async def _frame_exists(self, path: str) -> bool:
         try:
-            temp_dir = tempfile.mkdtemp(prefix="stop_motion_")
+            self._storage.local_path(path)
+        except FileNotFoundError:
+            self._logger.warning(f"Capture path outside of the storage: {path}")
+            return False
+        # An archived frame has no object of its own, the archive knows where it went
+        if await self._storage.exists(path) or await self._archive.locate(path) is not None:
+            return True
+        self._logger.warning(f"Capture not found, leaving it out of the video: {path}")
+        return False
+
+    async def generate_video(
+            self, paths: list[str], progress: Optional[Callable[[int, int], None]] = None,
+            spool: Optional[Callable[[Path], None]] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """
+            Generate stop motion video from capture paths using ffmpeg
+            A cached encode of the same frames is served from disk, otherwise the fragmented MP4 is
+            yielded as ffmpeg produces it and kept in the cache once it completes
+            progress is called with the number of frames handed to ffmpeg so far and the total
+            spool is called with the file the video is written to, every chunk is in it before it is yielded
+        """
+        frame_paths = await self._resolve_frames(paths)
+        key = self._video_key(frame_paths)
 
-            image_paths = []
-            for i, path in enumerate(paths):
+        cached_path = self._video_cache.get(key)
+        if cached_path is not None:
+            try:
+                video_file = await aiofiles.open(cached_path, 'rb')
+            except FileNotFoundError:
+                # Evicted by another worker in between, encode it again
+                video_file = None
+            if video_file is not None:
+                self._logger.info(f"Serving cached stop motion video {key}")
+                if progress:
+                    progress(len(frame_paths), len(frame_paths))
                 try:
-                    full_path = os.path.join(self._capture_dir, path) if not os.path.isabs(path) else path
+                    while chunk := await video_file.read(VIDEO_CHUNK_SIZE):
+                        yield chunk
+                finally:
+                    await video_file.close()
+                return
 
-                    if not os.path.exists(full_path):
-                        print(f"File not found: {full_path}")
-                        continue
+        shared_key = f"{VIDEO_STORAGE_PREFIX}{key}.mp4"
+        # With shared storage another API node may have encoded these frames already
+        shared = not self._storage.is_local and await self._storage.exists(shared_key)
+        if shared:
+            self._logger.info(f"Serving stop motion video {key} from shared storage")
+            if progress:
+                progress(len(frame_paths), len(frame_paths))
+            source = self._storage.stream(shared_key, VIDEO_CHUNK_SIZE)
+        else:
+            source = self._encode(frame_paths, progress)
 
-                    filename = f"frame_{i:04d}.png"
-                    dest_path = os.path.join(temp_dir, filename)
+        temp_path = self._video_cache.temp_path(key)
+        committed = False
+        try:
+            async with aiofiles.open(temp_path, 'wb') as cache_file, aclosing(source) as video:
+                if spool:
+                    spool(temp_path)
+                async for chunk in video:
+                    await cache_file.write(chunk)
+                    if spool:
+                        await cache_file.flush()
+                    yield chunk
+            video_path = await asyncio.to_thread(self._video_cache.commit, key, temp_path)
+            committed = True
+        finally:
+            # Failed encodes and clients that left mid stream leave only a partial file behind
+            if not committed:
+                self._video_cache.discard(temp_path)
 
-                    import shutil
-                    shutil.copy2(full_path, dest_path)
+        if not self._storage.is_local and not shared:
+            upload = asyncio.create_task(self._share_video(shared_key, video_path))
+            _video_uploads.add(upload)
+            upload.add_done_callback(_video_uploads.discard)
 
-                    image_paths.append(dest_path)
+    async def _share_video(self, shared_key: str, video_path: Path) -> None:
+        try:
+            async with aiofiles.open(video_path, 'rb') as video_file:
+                async def chunks():
+                    while chunk := await video_file.read(VIDEO_CHUNK_SIZE):
+                        yield chunk
+                size = await self._storage.put_stream(shared_key, chunks(), "video/mp4")
+            self._logger.info(f"Shared stop motion video {shared_key} ({size} bytes) with the other nodes")
+        except Exception as e:
+            self._logger.warning(f"Could not upload stop motion video {shared_key}: {e}")
 
-                except Exception as e:
-                    self._logger.error(f"Failed to process capture {path}: {e}")
-                    continue
+    async def _encode(
+            self, frame_paths: list[str], progress: Optional[Callable[[int, int], None]]
+    ) -> AsyncGenerator[bytes, None]:
+        self._logger.info(f"Streaming {len(frame_paths)} images as stop motion video")
 
-            if not image_paths:
-                raise ValueError("Failed to process any images")
-
-            self._logger.info(f"Processing {len(image_paths)} images for stop motion video")
-
-            output_path = os.path.join(temp_dir, "stop_motion_output.mp4")
-            input_pattern = os.path.join(temp_dir, "frame_%04d.png")
-
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-r', '8',
-                '-i', input_pattern,
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-crf', '18',
-                '-preset', 'medium',
-                '-movflags', '+faststart',
-                '-y',
-                output_path
-            ]
-
-            process = await asyncio.create_subprocess_exec(
-                *ffmpeg_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=temp_dir
-            )
-
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                raise RuntimeError(f"FFmpeg failed: {stderr.decode()}")
-
-            if not os.path.exists(output_path):
-                raise RuntimeError("FFmpeg completed but no output file was created")
-
-            async with aiofiles.open(output_path, 'rb') as video_file:
-                while True:
-                    chunk = await video_file.read(8192)
-                    if not chunk:
-                        break
-                    yield chunk
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-hide_banner', '-loglevel', 'error', '-nostats',
+            '-f', 'image2pipe',
+            '-framerate', str(VIDEO_ENCODE_PARAMS['frame_rate']),
+            '-i', 'pipe:0',
+            '-c:v', VIDEO_ENCODE_PARAMS['codec'],
+            '-pix_fmt', VIDEO_ENCODE_PARAMS['pix_fmt'],
+            '-crf', str(VIDEO_ENCODE_PARAMS['crf']),
+            '-preset', VIDEO_ENCODE_PARAMS['preset'],
+            '-g', str(VIDEO_ENCODE_PARAMS['frame_rate']),
+            # Fragmented MP4 needs no seek back to write the index, so it can go straight to stdout
+            '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+            '-f', 'mp4',
+            'pipe:1'
+        ]
+
+        process = await asyncio.create_subprocess_exec(
+            *ffmpeg_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        feeder = asyncio.create_task(self._feed_frames(process.stdin, frame_paths, progress))
+        stderr_reader = asyncio.create_task(process.stderr.read())
 
+        try:
+            while True:
+                chunk = await process.stdout.read(VIDEO_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+            await feeder
+            stderr = await stderr_reader
+            if await process.wait() != 0:
+                raise RuntimeError(f"FFmpeg failed: {stderr.decode(errors='replace')}")
         except Exception as e:
-            self._logger.error(f"Error in generate_video: {e}")
+            self._logger.error(f"Error encoding stop motion video: {e}")
             raise
         finally:
-            if temp_dir and os.path.exists(temp_dir):
+            # Also reached when the client goes away mid stream
+            feeder.cancel()
+            stderr_reader.cancel()
+            if process.returncode is None:
+                process.kill()
+                # wait() alone never returns while a full stdout buffer keeps the pipe paused
+                await process.communicate()
+
+    async def _feed_frames(
+            self, stdin: asyncio.StreamWriter, frame_paths: list[str],
+            progress: Optional[Callable[[int, int], None]]
+    ) -> None:
+        # A few frames are fetched ahead, so object store latency overlaps with ffmpeg reading the previous one
+        reads: Deque[asyncio.Task] = deque()
+        keys = iter(frame_paths)
+        try:
+            for frame_path in keys:
+                reads.append(asyncio.create_task(self._archive.read(frame_path)))
+                if len(reads) >= FRAME_READ_AHEAD:
+                    break
+            frames_done = 0
+            while reads:
+                read = reads.popleft()
+                next_path = next(keys, None)
+                if next_path is not None:
+                    reads.append(asyncio.create_task(self._archive.read(next_path)))
+                frames_done += 1
                 try:
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                except Exception as cleanup_error:
-                    self._logger.error(f"Failed to cleanup temp directory: {cleanup_error}")
+                    stdin.write(await read)
+                except Exception as e:
+                    self._logger.error(f"Failed to process capture: {e}")
+                    continue
+                await stdin.drain()
+                if progress:
+                    progress(frames_done, len(frame_paths))
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early, its exit code is reported by _encode
+            return
+        finally:
+            for read in reads:
+                read.cancel()
+            stdin.close()
 
 
 class SettingsService(BaseService[SettingsDTO, Settings], ISettingsService):
@@ -125,7 +309,8 @@ class SettingsService(BaseService[SettingsDTO, Settings], ISettingsService):
     def __init__(
         self,
         mapper: IMapper[SettingsDTO, Settings] = Provide['settings_mapper'],
-        repo: ISettingsRepository = Provide['settings_repo']
+        repo: ISettingsRepository = Provide['settings_repo'],
+        query_cache: IQueryCache = Provide['query_cache']
     ):
-        super().__init__(mapper, repo)
+        super().__init__(mapper, repo, cache=query_cache)
         self._repo = repo
@@ -3,7 +3,7 @@ from typing import Optional, List
 from dependency_injector.wiring import inject, Provide
 
 from ...configs.db import transactional
-from ...services import IDeviceService
+from ...services import IDeviceService, IFCMTokenCache
 from ...repositories import IFCMDeviceRepository
 
 logger = logging.getLogger(__name__)
@@ -11,8 +11,13 @@ logger = logging.getLogger(__name__)
 class DeviceService(IDeviceService):
 
     @inject
-    def __init__(self, fcm_device_repo: IFCMDeviceRepository = Provide['fcm_device_repo']):
+    def __init__(
+        self,
+        fcm_device_repo: IFCMDeviceRepository = Provide['fcm_device_repo'],
+        token_cache: IFCMTokenCache = Provide['fcm_token_cache']
+    ):
         self._fcm_device_repo = fcm_device_repo
+        self._token_cache = token_cache
 
 
     @transactional
@@ -52,10 +57,12 @@ class DeviceService(IDeviceService):
                     device_type=device_type,
                     app_version=app_version
                 )
+            await self._tokens_changed(user_id)
         except Exception as e:
             logger.error(f"Error in register_or_update_fcm_device for user {user_id}: {e}", exc_info=True)
             raise
 
+    @transactional
     async def unregister_fcm_device(
         self,
         user_id: int,
@@ -67,6 +74,7 @@ class DeviceService(IDeviceService):
                 physical_device_id=physical_device_id
             )
             if success:
+                await self._tokens_changed(user_id)
                 logger.info(f"Unregistered FCM device for user {user_id}, physical_device_id {physical_device_id}")
             else:
                 logger.warning(f"Attempt to unregister non-existent FCM device for user {user_id}, physical_device_id {physical_device_id}")
@@ -74,9 +82,17 @@ class DeviceService(IDeviceService):
             logger.error(f"Error in unregister_fcm_device for user {user_id}: {e}", exc_info=True)
             raise
 
+    async def _tokens_changed(self, user_id: int) -> None:
+        self._token_cache.invalidate(user_id)
+        await self._fcm_device_repo.notify_tokens_changed(user_id)
+
     async def get_fcm_tokens_for_user(self, user_id: int) -> List[str]:
+        tokens = self._token_cache.get(user_id)
+        if tokens is not None:
+            return tokens
         try:
             tokens = await self._fcm_device_repo.get_tokens_by_user_id(user_id=user_id)
+            self._token_cache.set(user_id, tokens)
             logger.debug(f"Found {len(tokens)} FCM tokens for user_id {user_id}")
             return tokens
         except Exception as e:
@@ -0,0 +1,58 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.services import IDeviceChannelService
+from doorbell_shared.models import Message, MessageType
+from .msg_handler import RP_I_OWNER_USER_ID_FOR_FCM
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class DeviceChannelService(IDeviceChannelService):
+    """Doorbells connected to /messages, requests sent to them are answered by a reply carrying reply_to."""
+
+    @inject
+    def __init__(self, config: dict[str, Any] = Provide['config']):
+        self._logger = getLogger(__name__)
+        device_config = config.get('device_request', {}) or {}
+        self._timeout_seconds = float(device_config.get('timeout_seconds') or 5)
+        # connection id -> (owner user id, send), only the worker holding the socket can reach the doorbell
+        self._connections: Dict[str, Tuple[str, Send]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def register(self, connection_id: str, device_id: str, send: Send) -> None:
+        owner_id = str(RP_I_OWNER_USER_ID_FOR_FCM) if device_id == "rpi" else str(device_id)
+        self._connections[connection_id] = (owner_id, send)
+
+    def unregister(self, connection_id: str) -> None:
+        self._connections.pop(connection_id, None)
+
+    def resolve(self, message: Message) -> bool:
+        future = self._pending.pop(message.reply_to, None) if message.reply_to else None
+        if future is None:
+            return False
+        if not future.done():
+            future.set_result(message)
+        return True
+
+    async def request(self, user_id: str, msg_type: MessageType, payload: Optional[Dict[str, Any]] = None) -> Message:
+        # The most recent connection wins, an old one may be a socket that has not noticed it is dead yet
+        send = next(
+            (send for owner_id, send in reversed(self._connections.values()) if owner_id == str(user_id)), None
+        )
+        if send is None:
+            raise LookupError(f"No doorbell of user {user_id} is connected")
+
+        message = Message(msg_type=msg_type, payload=payload)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message.msg_id] = future
+        try:
+            await send(message.model_dump(exclude_none=True))
+            return await asyncio.wait_for(future, self._timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Doorbell did not answer {msg_type.name} within {self._timeout_seconds:g}s")
+        finally:
+            self._pending.pop(message.msg_id, None)
@@ -0,0 +1,140 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.helpers import TTLCache
+from doorbell_api.models import Capture, Notification
+from doorbell_api.repositories import ICaptureRepository, INotificationRepository
+from doorbell_api.services import IEventLinkService, IQueryCache, IVideoPregenerateService
+
+EventKey = Tuple[str, Optional[str]]
+
+
+class EventLinkService(IEventLinkService):
+    """Maps RPi event ids to notification ids, captures that arrive first are linked once the notification exists."""
+
+    @inject
+    def __init__(
+            self,
+            notification_repo: INotificationRepository = Provide['notification_repo'],
+            capture_repo: ICaptureRepository = Provide['capture_repo'],
+            video_pregenerate_service: IVideoPregenerateService = Provide['video_pregenerate_service'],
+            query_cache: IQueryCache = Provide['query_cache'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._notification_repo = notification_repo
+        self._capture_repo = capture_repo
+        self._video_pregenerate_service = video_pregenerate_service
+        self._query_cache = query_cache
+        self._logger = getLogger(__name__)
+
+        link_config = config.get('event_link', {}) or {}
+        self._links: TTLCache[EventKey, int] = TTLCache(
+            int(link_config.get('cache_size') or 1024), int(link_config.get('ttl_seconds') or 600)
+        )
+        self._wait_seconds = float(link_config.get('wait_seconds') or 5)
+
+        self._pending: Dict[EventKey, List[int]] = {}
+        self._expiry_tasks: Dict[EventKey, asyncio.Task] = {}
+        self._linked_late = 0
+        self._left_unlinked = 0
+
+    @staticmethod
+    def _key(rpi_event_id: str, user_id: Optional[Any]) -> EventKey:
+        return rpi_event_id, str(user_id) if user_id is not None else None
+
+    def remember(self, rpi_event_id: Optional[str], user_id: Optional[str], notification_id: int) -> None:
+        if not rpi_event_id:
+            return
+        key = self._key(rpi_event_id, user_id)
+        self._links.set(key, notification_id)
+
+        capture_ids = self._pending.pop(key, None)
+        expiry = self._expiry_tasks.pop(key, None)
+        if expiry:
+            expiry.cancel()
+        if capture_ids:
+            asyncio.create_task(self._link(capture_ids, notification_id, rpi_event_id))
+
+    async def resolve(self, rpi_event_id: str, user_id: Optional[str]) -> Optional[int]:
+        key = self._key(rpi_event_id, user_id)
+        notification_id = self._links.get(key)
+        if notification_id is not None:
+            return notification_id
+        if key in self._pending:
+            # Already looked up for an earlier capture of this event, the link happens once it shows up
+            return None
+
+        notification = await self._notification_repo.find_by_rpi_event_id(rpi_event_id, user_id)
+        if notification:
+            self._links.set(key, notification.id)
+            return notification.id
+        return None
+
+    def defer(self, capture_id: int, rpi_event_id: str, user_id: Optional[str]) -> None:
+        key = self._key(rpi_event_id, user_id)
+        notification_id = self._links.get(key)
+        if notification_id is not None:
+            # The notification was created while the capture was being stored
+            asyncio.create_task(self._link([capture_id], notification_id, rpi_event_id))
+            return
+
+        self._pending.setdefault(key, []).append(capture_id)
+        if key not in self._expiry_tasks:
+            self._expiry_tasks[key] = asyncio.create_task(self._expire(key))
+
+    async def _expire(self, key: EventKey) -> None:
+        await asyncio.sleep(self._wait_seconds)
+        self._expiry_tasks.pop(key, None)
+        capture_ids = self._pending.pop(key, None)
+        if not capture_ids:
+            return
+
+        rpi_event_id, user_id = key
+        # The notification may come from another worker process, check the DB once before giving up
+        async with own_session():
+            notification_id = await self._find_notification_id(rpi_event_id, user_id)
+        if notification_id is not None:
+            self._links.set(key, notification_id)
+            await self._link(capture_ids, notification_id, rpi_event_id)
+            return
+
+        self._left_unlinked += len(capture_ids)
+        self._logger.warning(
+            f"No notification for RPi event {rpi_event_id} after {self._wait_seconds}s, "
+            f"{len(capture_ids)} capture(s) left unlinked"
+        )
+
+    async def _link(self, capture_ids: List[int], notification_id: int, rpi_event_id: str) -> None:
+        try:
+            async with own_session():
+                linked = await self._link_captures(capture_ids, notification_id)
+            self._linked_late += linked
+            await self._query_cache.invalidate(Capture.__tablename__, Notification.__tablename__)
+            self._video_pregenerate_service.touch(notification_id)
+            self._logger.info(f"Linked {linked} late capture(s) of RPi event {rpi_event_id} "
+                              f"to notification {notification_id}")
+        except Exception as e:
+            self._logger.error(f"Could not link captures {capture_ids} to notification {notification_id}: {e}",
+                               exc_info=True)
+
+    @transactional
+    async def _find_notification_id(self, rpi_event_id: str, user_id: Optional[str]) -> Optional[int]:
+        notification = await self._notification_repo.find_by_rpi_event_id(rpi_event_id, user_id)
+        return notification.id if notification else None
+
+    @transactional
+    async def _link_captures(self, capture_ids: List[int], notification_id: int) -> int:
+        return await self._capture_repo.link_to_notification(capture_ids, notification_id)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "cache": self._links.stats(),
+            "pending_events": len(self._pending),
+            "pending_captures": sum(len(ids) for ids in self._pending.values()),
+            "linked_late": self._linked_late,
+            "left_unlinked": self._left_unlinked
+        }
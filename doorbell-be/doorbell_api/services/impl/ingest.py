@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import deque
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session
+from doorbell_api.helpers import MetricsHelper
+from doorbell_api.services import IIngestService
+from doorbell_shared.models import Message, MessageType
+
+EVENTS_LANE = "events"
+CAPTURES_LANE = "captures"
+LATENCY_SAMPLES = 512
+EVENT_WAIT_SECONDS = 10
+
+
+class LaneMetrics:
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.backpressure_waits = 0
+        self._wait_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._total_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, wait_ms: float, total_ms: float, failed: bool) -> None:
+        self.processed += 1
+        if failed:
+            self.failed += 1
+        self._wait_ms.append(wait_ms)
+        self._total_ms.append(total_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "backpressure_waits": self.backpressure_waits,
+            "queue_wait_ms": MetricsHelper.percentiles(self._wait_ms),
+            "latency_ms": MetricsHelper.percentiles(self._total_ms)
+        }
+
+
+class IngestPipeline:
+    """Per connection intake, the receive loop only enqueues and workers always drain events before captures."""
+
+    def __init__(
+            self,
+            connection_id: str,
+            process: Callable[[Message, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+            reply: Callable[[Dict[str, Any]], Awaitable[None]],
+            workers: int,
+            queue_size: int,
+            metrics: Dict[str, LaneMetrics]
+    ):
+        self._connection_id = connection_id
+        self._process = process
+        self._reply = reply
+        self._metrics = metrics
+        self._lanes: Dict[str, asyncio.Queue] = {
+            EVENTS_LANE: asyncio.Queue(maxsize=queue_size),
+            CAPTURES_LANE: asyncio.Queue(maxsize=queue_size)
+        }
+        self._available = asyncio.Semaphore(0)
+        # msg_id of queued or running events, captures associated to them wait so they can be linked
+        self._pending_events: Dict[str, asyncio.Event] = {}
+        self._logger = getLogger(__name__)
+        self._workers = [
+            asyncio.create_task(self._run_worker(), name=f"ingest-{connection_id}-{i}") for i in range(workers)
+        ]
+
+    @staticmethod
+    def lane_for(message: Message) -> str:
+        return CAPTURES_LANE if message.msg_type == MessageType.CAPTURE else EVENTS_LANE
+
+    async def submit(self, message: Message, jwt_payload: Dict[str, Any]) -> None:
+        lane = self.lane_for(message)
+        queue = self._lanes[lane]
+        metrics = self._metrics[lane]
+
+        if lane == EVENTS_LANE and message.msg_id:
+            self._pending_events[message.msg_id] = asyncio.Event()
+
+        if queue.full():
+            # Blocking here stops the receive loop, so the socket pushes back on the RPi
+            metrics.backpressure_waits += 1
+            self._logger.debug(f"Ingest {self._connection_id}: {lane} lane full, applying backpressure")
+        await queue.put((message, jwt_payload, time.perf_counter()))
+        metrics.queue_depth += 1
+        self._available.release()
+
+    async def close(self) -> None:
+        # Whatever was already received is still persisted, only the acks are lost
+        for queue in self._lanes.values():
+            await queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def _take(self) -> Tuple[str, Tuple[Message, Dict[str, Any], float]]:
+        for lane in (EVENTS_LANE, CAPTURES_LANE):
+            if not self._lanes[lane].empty():
+                return lane, self._lanes[lane].get_nowait()
+        raise RuntimeError("Ingest worker woke up without queued work")
+
+    async def _run_worker(self) -> None:
+        while True:
+            await self._available.acquire()
+            lane, (message, jwt_payload, enqueued_at) = self._take()
+            metrics = self._metrics[lane]
+            metrics.queue_depth -= 1
+            metrics.in_flight += 1
+            started_at = time.perf_counter()
+            failed = False
+            try:
+                if lane == CAPTURES_LANE:
+                    await self._wait_for_event(message)
+                # Workers run concurrently, each job needs a scoped session of its own
+                async with own_session():
+                    reply = await self._process(message, jwt_payload)
+                if reply:
+                    await self._send_reply(reply)
+            except Exception as e:
+                failed = True
+                self._logger.error(f"Ingest {self._connection_id}: failed to process {message.msg_type}: {e}",
+                                   exc_info=True)
+            finally:
+                if lane == EVENTS_LANE and message.msg_id in self._pending_events:
+                    self._pending_events.pop(message.msg_id).set()
+                finished_at = time.perf_counter()
+                metrics.in_flight -= 1
+                metrics.record((started_at - enqueued_at) * 1000, (finished_at - enqueued_at) * 1000, failed)
+                self._lanes[lane].task_done()
+
+    async def _wait_for_event(self, message: Message) -> None:
+        associated_to = (message.payload or {}).get("associated_to")
+        pending = self._pending_events.get(associated_to) if associated_to else None
+        if pending:
+            try:
+                await asyncio.wait_for(pending.wait(), EVENT_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                self._logger.warning(f"Ingest {self._connection_id}: event {associated_to} still running, "
+                                     f"capture {message.msg_id} processed without waiting")
+
+    async def _send_reply(self, reply: Dict[str, Any]) -> None:
+        try:
+            await self._reply(reply)
+        except Exception as e:
+            self._logger.info(f"Ingest {self._connection_id}: could not send ack, connection gone: {e}")
+
+
+class IngestService(IIngestService):
+
+    @inject
+    def __init__(self, config: dict[str, Any] = Provide['config']):
+        ingest_config = config.get('ingest', {}) or {}
+        self._workers = max(1, int(ingest_config.get('workers') or 4))
+        self._queue_size = max(1, int(ingest_config.get('queue_size') or 32))
+        self._metrics: Dict[str, LaneMetrics] = {EVENTS_LANE: LaneMetrics(), CAPTURES_LANE: LaneMetrics()}
+
+    def open_pipeline(
+            self,
+            connection_id: str,
+            process: Callable[[Message, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+            reply: Callable[[Dict[str, Any]], Awaitable[None]]
+    ) -> IngestPipeline:
+        return IngestPipeline(connection_id, process, reply, self._workers, self._queue_size, self._metrics)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "workers_per_connection": self._workers,
+            "queue_size_per_lane": self._queue_size,
+            "lanes": {lane: metrics.to_dict() for lane, metrics in self._metrics.items()}
+        }
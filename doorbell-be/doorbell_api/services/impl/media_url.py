@@ -0,0 +1,113 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import transactional
+from doorbell_api.helpers import SignedUrlHelper
+from doorbell_api.repositories import ICaptureArchiveRepository, ICaptureRepository
+from doorbell_api.services import IMediaUrlService, IObjectStorage
+
+SECURE_LINK = "secure_link"
+ACCEL = "accel"
+INTERNAL = "internal"
+MODES = (SECURE_LINK, ACCEL, INTERNAL)
+API_MEDIA_PATH = "/api/capture/media"
+
+
+class MediaUrlService(IMediaUrlService):
+    """Mints short lived signed URLs, checked by nginx, the media route or the object store holding the file."""
+
+    @inject
+    def __init__(
+            self,
+            capture_repo: ICaptureRepository = Provide['capture_repo'],
+            capture_archive_repo: ICaptureArchiveRepository = Provide['capture_archive_repo'],
+            object_storage: IObjectStorage = Provide['object_storage'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._capture_repo = capture_repo
+        self._archive_repo = capture_archive_repo
+        self._storage = object_storage
+        self._capture_dir = Path(config['capture_dir']).resolve()
+
+        media_config = config.get('media_url', {}) or {}
+        self._mode = (media_config.get('mode') or INTERNAL).lower()
+        if self._mode not in MODES:
+            raise ValueError(f"MEDIA_URL_MODE must be one of {', '.join(MODES)}, got '{self._mode}'")
+        self._secret = media_config.get('secret') or ''
+        if not self._secret:
+            if self._mode == SECURE_LINK:
+                raise ValueError("MEDIA_URL_SECRET has to be set, nginx needs the same secret to check links")
+            self._secret = config['jwt']['access']['key']
+        self._ttl_seconds = int(media_config.get('ttl_seconds') or 300)
+        self._base = (media_config.get('base') or '/media').rstrip('/')
+        self._accel_prefix = (media_config.get('accel_prefix') or '/protected').rstrip('/')
+
+    @transactional
+    async def sign_captures(self, paths: List[str], user_id: str) -> Dict[str, Dict[str, Any]]:
+        captures = [
+            capture for capture, owner_id in await self._capture_repo.find_with_owner(list(set(paths)))
+            # Captures of another user's notifications are left out as if they did not exist
+            if owner_id is None or str(owner_id) == str(user_id)
+        ]
+        archived = await self._archive_repo.locate([
+            path for capture in captures for path in [capture.path, *(capture.variants or {}).values()]
+        ])
+
+        signed = {}
+        for capture in captures:
+            entry = await self._sign_capture(capture.path, user_id, capture.path in archived)
+            entry["variants"] = {
+                name: (await self._sign_capture(variant_path, user_id, variant_path in archived))["url"]
+                for name, variant_path in (capture.variants or {}).items()
+            }
+            signed[capture.path] = entry
+        return signed
+
+    async def _sign_capture(self, path: str, user_id: str, archived: bool = False) -> Dict[str, Any]:
+        if archived:
+            # nginx and the object store only know the whole archive, the media route reads the member out of it
+            return self._sign(path, user_id, via_api=True)
+        if self._storage.is_local:
+            return self._sign(path, user_id)
+        # Captures in an object store are fetched from it directly, with its own presigned URL
+        expires = int(time.time()) + self._ttl_seconds
+        return {"url": await self._storage.presign(path, self._ttl_seconds), "expires": expires}
+
+    def sign_file(self, file_path: Path, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            relative_path = file_path.resolve().relative_to(self._capture_dir)
+        except ValueError:
+            # Only capture_dir is reachable through nginx and the media route
+            return None
+        return self._sign(relative_path.as_posix(), user_id)
+
+    def _sign(self, path: str, user_id: str, via_api: bool = False) -> Dict[str, Any]:
+        expires = int(time.time()) + self._ttl_seconds
+        user_id = str(user_id)
+        if self._mode == SECURE_LINK and not via_api:
+            signature = SignedUrlHelper.nginx_signature(f"{self._base}/{path}", expires, user_id, self._secret)
+            url = f"{self._base}/{quote(path)}?md5={signature}&expires={expires}&u={quote(user_id)}"
+        else:
+            signature = SignedUrlHelper.hmac_signature(path, expires, user_id, self._secret)
+            url = f"{API_MEDIA_PATH}/{quote(path)}?expires={expires}&u={quote(user_id)}&sig={signature}"
+        return {"url": url, "expires": expires}
+
+    def verify(self, path: str, expires: int, user_id: str, signature: str) -> bool:
+        return SignedUrlHelper.verify_hmac(path, expires, user_id, signature, self._secret, time.time())
+
+    def resolve(self, path: str, expires: int, user_id: str, signature: str) -> Optional[Path]:
+        if self._mode == SECURE_LINK:
+            return None
+        if not self.verify(path, expires, user_id, signature):
+            return None
+        file_path = (self._capture_dir / path).resolve()
+        if not file_path.is_relative_to(self._capture_dir) or not file_path.is_file():
+            return None
+        return file_path
+
+    def accel_redirect(self, path: str) -> Optional[str]:
+        return f"{self._accel_prefix}/{quote(path)}" if self._mode == ACCEL else None
@@ -1,8 +1,4 @@
 import base64
-import os
-import subprocess
-import tempfile
-import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional, Any
@@ -12,11 +8,20 @@ from logging import getLogger
 from dependency_injector.wiring import Provide, inject
 
 from doorbell_api.dtos import CaptureDTO
-from doorbell_api.repositories import INotificationRepository
-from doorbell_api.services import IMessageHandler, INotificationService, ICaptureService
+from doorbell_api.services import (
+    IMessageHandler, INotificationService, ICaptureService, IEventLinkService, IRateLimitService,
+    IVideoPregenerateService, ICaptureStorageService
+)
 from doorbell_shared.models import Message, MessageType
 
 RP_I_OWNER_USER_ID_FOR_FCM: int = 1  # TODO: Hardcoded, implement a proper way to do this
+CAPTURE_WIDTH = 1280
+CAPTURE_HEIGHT = 720
+NOTIFICATION_TYPES = {
+    MessageType.MOTION_DETECTED: ("motion_detected", "Motion Detected"),
+    MessageType.FACE_DETECTED: ("face_detected", "Face Detected"),
+    MessageType.BUTTON_PRESSED: ("button_pressed", "Doorbell Pressed"),
+}
 
 
 class MessageHandler(IMessageHandler):
@@ -26,21 +31,29 @@ class MessageHandler(IMessageHandler):
             self,
             notification_service: INotificationService = Provide['notification_service'],
             capture_service: ICaptureService = Provide['capture_service'],
-            notification_repo: INotificationRepository = Provide['notification_repo'],
+            capture_storage_service: ICaptureStorageService = Provide['capture_storage_service'],
+            event_link_service: IEventLinkService = Provide['event_link_service'],
+            rate_limit_service: IRateLimitService = Provide['rate_limit_service'],
+            video_pregenerate_service: IVideoPregenerateService = Provide['video_pregenerate_service'],
             config: dict[str, Any] = Provide['config']
     ):
         self.notification_service = notification_service
+        self.capture_storage_service = capture_storage_service
+        self.event_link_service = event_link_service
+        self.rate_limit_service = rate_limit_service
+        self.video_pregenerate_service = video_pregenerate_service
         self.capture_service = capture_service
-        self.notification_repo = notification_repo
         self.captures_base_path = Path(config['capture_dir'])
         self.captures_base_path.mkdir(parents=True, exist_ok=True)
         self.logger = getLogger(__name__)
 
-        # Rate limiting configuration
-        self.motion_rate_limit_minutes = config.get('motion_rate_limit_minutes', 1)
-
     async def handle_camera_events(self, message: Message, jwt_payload: Dict[str, any]) -> Optional[Dict[str, Any]]:
         try:
+            if message.msg_type == MessageType.STREAM_STATS:
+                # Replies to pending requests never get here, this one came after its request timed out
+                self.logger.debug(f"Late stream stats from RPi: {str(message.payload)[:200]}")
+                return None
+
             response_payload: Optional[Dict[str, Any]] = None
             response_type = MessageType.ERROR
 
@@ -66,20 +79,21 @@ class MessageHandler(IMessageHandler):
                 response_payload = {"error": "Cannot determine RPi owner user."}
 
             if response_payload is None:
-                if message.msg_type in [MessageType.MOTION_DETECTED, MessageType.FACE_DETECTED,
-                                        MessageType.BUTTON_PRESSED]:
-                    if message.msg_type == MessageType.MOTION_DETECTED:
-                        should_process = await self.notification_repo.is_rate_limited(user_id_str_for_payloads)
-                        if not should_process:
-                            self.logger.info(
-                                f"Motion event rate limited for user {user_id_str_for_payloads}. "
-                                f"Less than {self.motion_rate_limit_minutes} minute(s) since last notification."
-                            )
-                            response_payload = {
-                                "status": "rate_limited",
-                                "message": f"Motion notifications are rate limited to {self.motion_rate_limit_minutes} minute(s)"
-                            }
-                            response_type = MessageType.NOTIFICATION_ACK
+                if message.msg_type in NOTIFICATION_TYPES:
+                    notification_type_str = NOTIFICATION_TYPES[message.msg_type][0]
+                    should_process = await self.rate_limit_service.allow(user_id_str_for_payloads, notification_type_str)
+                    if not should_process:
+                        max_events, window_seconds = self.rate_limit_service.get_limit(notification_type_str)
+                        self.logger.info(
+                            f"{notification_type_str} event rate limited for user {user_id_str_for_payloads}. "
+                            f"Already {max_events} notification(s) in the last {window_seconds:g} second(s)."
+                        )
+                        response_payload = {
+                            "status": "rate_limited",
+                            "message": f"{NOTIFICATION_TYPES[message.msg_type][1]} notifications are rate limited "
+                                       f"to {max_events} per {window_seconds:g} second(s)"
+                        }
+                        response_type = MessageType.NOTIFICATION_ACK
 
                     if response_payload is None:
                         notification_payload_for_dto = await self._create_notification_payload(message,user_id=user_id_str_for_payloads)
@@ -105,20 +119,19 @@ class MessageHandler(IMessageHandler):
                         rpi_event_id_for_capture = message.payload.get("associated_to")
                         actual_notification_id_to_link: Optional[int] = None
 
-                        if rpi_event_id_for_capture and self.notification_repo:
-                            notification_obj = await self.notification_repo.find_by_rpi_event_id(
+                        if rpi_event_id_for_capture:
+                            actual_notification_id_to_link = await self.event_link_service.resolve(
                                 rpi_event_id_for_capture, user_id_str_for_payloads
                             )
-                            if notification_obj:
-                                actual_notification_id_to_link = notification_obj.id
+                            if actual_notification_id_to_link is not None:
                                 self.logger.info(
                                     f"Found Notification DB ID {actual_notification_id_to_link} to link capture for RPi event {rpi_event_id_for_capture}")
                             else:
-                                self.logger.warning(
-                                    f"CAPTURE: No Notification found for RPi event ID {rpi_event_id_for_capture} and user {user_id_str_for_payloads}. Capture will be unlinked.")
+                                self.logger.info(
+                                    f"CAPTURE: No Notification yet for RPi event ID {rpi_event_id_for_capture} and user {user_id_str_for_payloads}. Capture will be linked once it exists.")
                         else:
                             self.logger.warning(
-                                "CAPTURE: RPi event ID missing or notification_repo not available. Cannot link to notification by RPi event ID.")
+                                "CAPTURE: RPi event ID missing. Cannot link to notification by RPi event ID.")
 
                         saved_capture_info = await self._save_capture_from_payload(
                             message.payload, user_id_str_for_dto=user_id_str_for_payloads,
@@ -132,6 +145,12 @@ class MessageHandler(IMessageHandler):
                             }
                             if actual_notification_id_to_link is not None:
                                 response_payload["linked_to_notification_id"] = str(actual_notification_id_to_link)
+                                self.video_pregenerate_service.touch(actual_notification_id_to_link)
+                            elif rpi_event_id_for_capture and saved_capture_info.get("id") is not None:
+                                self.event_link_service.defer(
+                                    saved_capture_info["id"], rpi_event_id_for_capture, user_id_str_for_payloads
+                                )
+                                response_payload["link_pending"] = True
                             response_type = MessageType.CAPTURE_ACK
                         else:
                             response_payload = {"error": "Failed to save capture data"}
@@ -161,18 +180,10 @@ class MessageHandler(IMessageHandler):
     async def _create_notification_payload(self, message: Message, user_id: Optional[str]) -> Optional[Dict]:
         rpi_event_id_to_store: Optional[str] = message.msg_id
 
-        if message.msg_type == MessageType.MOTION_DETECTED:
-            notification_type_str = "motion_detected"
-            title = "Motion Detected"
-        elif message.msg_type == MessageType.FACE_DETECTED:
-            notification_type_str = "face_detected"
-            title = "Face Detected"
-        elif message.msg_type == MessageType.BUTTON_PRESSED:
-            notification_type_str = "button_pressed"
-            title = "Doorbell Pressed"
-        else:
+        if message.msg_type not in NOTIFICATION_TYPES:
             self.logger.warning(f"Cannot create notification payload for unknown message type: {message.msg_type}")
             return None
+        notification_type_str, title = NOTIFICATION_TYPES[message.msg_type]
 
         payload_for_dto = {
             "title": title,
@@ -200,38 +211,24 @@ class MessageHandler(IMessageHandler):
                 except ValueError:
                     self.logger.warning(f"Bad capture timestamp '{timestamp_str}'")
 
-            file_stem = f"capture_{capture_datetime.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}"
-
-            with tempfile.NamedTemporaryFile(suffix='.yuv', delete=False) as temp_yuv:
-                temp_yuv.write(image_bytes)
-                temp_yuv_path = temp_yuv.name
-
-            try:
-                file_name = f"{file_stem}.png"
-                file_path_on_fs = self.captures_base_path / file_name
-                path_for_db_or_dto = file_name
-
-                cmd = [
-                    'ffmpeg',
-                    '-f', 'rawvideo',
-                    '-pix_fmt', 'yuv420p',
-                    '-s', '1280x720',
-                    '-i', temp_yuv_path,
-                    '-vframes', '1',
-                    '-y',
-                    str(file_path_on_fs)
-                ]
-
-                subprocess.run(cmd, check=True, capture_output=True)
-
-            finally:
-                os.unlink(temp_yuv_path)
+            # Named by content, a frame identical to an earlier one reuses its file and thumbnails
+            stored = await self.capture_storage_service.store_yuv420(
+                image_bytes,
+                int(capture_payload.get("width", CAPTURE_WIDTH)),
+                int(capture_payload.get("height", CAPTURE_HEIGHT))
+            )
+            path_for_db_or_dto = stored["path"]
 
-            self.logger.info(f"Capture image saved to FS: {file_path_on_fs}")
+            self.logger.info(
+                f"Capture image stored as {path_for_db_or_dto}"
+                f"{' (deduplicated)' if stored['deduplicated'] else ''}"
+            )
 
             if self.capture_service:
                 capture_dto_data = {
                     "path": path_for_db_or_dto,
+                    "variants": stored["variants"],
+                    "content_hash": stored["content_hash"],
                     "timestamp": capture_datetime,
                     "user_id": user_id_str_for_dto,
                     "notification_id": notification_db_id_to_link
@@ -243,9 +240,15 @@ class MessageHandler(IMessageHandler):
                     self.logger.error(
                         f"Pydantic validation error for CaptureDTO: {pydantic_exc}. Data: {capture_dto_data}"
                     )
+                    await self.capture_storage_service.release(stored["content_hash"])
                     return None
 
-                created_capture_dto = await self.capture_service.create(dto_instance)
+                try:
+                    created_capture_dto = await self.capture_service.create(dto_instance)
+                except Exception:
+                    # No capture refers to the blob, without its reference garbage collection can have it
+                    await self.capture_storage_service.release(stored["content_hash"])
+                    raise
                 self.logger.info(
                     f"Capture record created in DB: ID {created_capture_dto.id}, linked to Notification ID: {notification_db_id_to_link}"
                 )
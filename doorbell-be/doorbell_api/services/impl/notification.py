@@ -1,11 +1,13 @@
 from logging import getLogger
 from typing import Dict, Any, Optional
-from firebase_admin import messaging
 from dependency_injector.wiring import inject, Provide
 
 from doorbell_api.dtos import NotificationDTO
 from doorbell_api.models import Notification
-from doorbell_api.services import INotificationService, IDeviceService
+from doorbell_api.services import (
+    INotificationService, IDeviceService, IInsertBatcher, IEventLinkService, IPushService, IVideoPregenerateService,
+    IQueryCache
+)
 from doorbell_api.repositories import INotificationRepository
 from doorbell_api.mappers import IMapper
 from .base import BaseService
@@ -17,9 +19,17 @@ class NotificationService(BaseService[NotificationDTO, Notification], INotificat
         mapper: IMapper[NotificationDTO, Notification] = Provide['notification_mapper'],
         repo: INotificationRepository = Provide['notification_repo'],
         device_service: IDeviceService = Provide['device_service'],
+        batcher: IInsertBatcher[Notification] = Provide['notification_batcher'],
+        event_link_service: IEventLinkService = Provide['event_link_service'],
+        push_service: IPushService = Provide['push_service'],
+        video_pregenerate_service: IVideoPregenerateService = Provide['video_pregenerate_service'],
+        query_cache: IQueryCache = Provide['query_cache'],
     ):
-        super().__init__(mapper, repo)
+        super().__init__(mapper, repo, batcher, query_cache)
         self._repo = repo
+        self._event_link_service = event_link_service
+        self._push_service = push_service
+        self._video_pregenerate_service = video_pregenerate_service
         self._device_service = device_service
         self._logger = getLogger(__name__)
 
@@ -33,6 +43,10 @@ class NotificationService(BaseService[NotificationDTO, Notification], INotificat
             self._logger.info(
                 f"Notification DB record created: ID {created_dto_from_db.id} for RPi Event ID {created_dto_from_db.rpi_event_id}"
             )
+            self._event_link_service.remember(
+                created_dto_from_db.rpi_event_id, notification_dto.user_id, created_dto_from_db.id
+            )
+            self._video_pregenerate_service.touch(created_dto_from_db.id)
 
             if user_id_for_fcm_lookup:
                 fcm_tokens = await self._device_service.get_fcm_tokens_for_user(user_id_for_fcm_lookup)
@@ -47,12 +61,7 @@ class NotificationService(BaseService[NotificationDTO, Notification], INotificat
                     }
                     title_for_fcm = str(notification_payload_dict.get("title", "Doorbell Alert"))
 
-                    for token in fcm_tokens:
-                        self._send_to_fcm(
-                            title=title_for_fcm,
-                            data_payload=fcm_data_payload,
-                            device_token=token
-                        )
+                    self._push_service.enqueue(title_for_fcm, fcm_data_payload, fcm_tokens)
                 else:
                     self._logger.info(f"No active FCM tokens found for user {user_id_for_fcm_lookup}.")
             else:
@@ -62,16 +71,3 @@ class NotificationService(BaseService[NotificationDTO, Notification], INotificat
         except Exception as e:
             self._logger.error(f"Error in NotificationService.create_notification: {e}", exc_info=True)
             return None
-
-    def _send_to_fcm(self, title: str, data_payload: Dict[str, str], device_token: str):
-        try:
-            message = messaging.Message(
-                notification=messaging.Notification(title=title),
-                data=data_payload,
-                token=device_token,
-            )
-            response = messaging.send(message)
-            return response
-        except Exception as e:
-            self._logger.error(f"Error sending FCM to token {device_token[:10]}...: {e}", exc_info=True)
-            return None
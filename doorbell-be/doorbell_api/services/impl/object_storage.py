@@ -0,0 +1,463 @@
+import asyncio
+import os
+import threading
+from contextlib import AsyncExitStack
+from logging import getLogger
+from pathlib import Path
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+import aiofiles
+
+from doorbell_api.services import IObjectStorage
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+    from botocore.exceptions import ClientError
+except ImportError:  # Only needed with STORAGE_BACKEND=s3
+    get_session = None
+
+FSYNC_NONE = "none"
+FSYNC_BATCH = "batch"
+FSYNC_ALWAYS = "always"
+FSYNC_MODES = (FSYNC_NONE, FSYNC_BATCH, FSYNC_ALWAYS)
+TEMP_SUFFIX = ".tmp"
+MIN_PART_SIZE = 5 * 1024 * 1024
+DELETE_BATCH_SIZE = 1000
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+class LocalObjectStorage(IObjectStorage):
+    """Objects as files under one directory, written to a temp file and renamed into place."""
+
+    def __init__(self, directory: str, fsync: str = FSYNC_BATCH, fsync_interval_ms: int = 200):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"CAPTURE_FSYNC must be one of {', '.join(FSYNC_MODES)}, got '{fsync}'")
+        self._directory = Path(directory).resolve()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._fsync = fsync
+        self._fsync_interval = max(0, fsync_interval_ms) / 1000
+
+        self._lock = threading.Lock()
+        self._pending_files: Set[str] = set()
+        self._pending_dirs: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+
+        self._written = 0
+        self._removed = 0
+        self._syncs = 0
+
+    @property
+    def is_local(self) -> bool:
+        return True
+
+    def local_path(self, key: str) -> Optional[Path]:
+        path = (self._directory / key).resolve()
+        # Keys come from clients too, nothing outside the directory is reachable
+        if not path.is_relative_to(self._directory) or path == self._directory:
+            raise FileNotFoundError(key)
+        return path
+
+    async def exists(self, key: str) -> bool:
+        try:
+            return self.local_path(key).is_file()
+        except FileNotFoundError:
+            return False
+
+    async def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        await asyncio.to_thread(self._write, self.local_path(key), data)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._temp_path(path)
+        try:
+            with open(temp_path, 'wb') as temp_file:
+                temp_file.write(data)
+                if self._fsync == FSYNC_ALWAYS:
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+            self._commit(temp_path, path)
+        except BaseException:
+            self._discard(temp_path)
+            raise
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: Optional[str] = None) -> int:
+        path = self.local_path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        temp_path = self._temp_path(path)
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as temp_file:
+                async for chunk in chunks:
+                    await temp_file.write(chunk)
+                    size += len(chunk)
+                if self._fsync == FSYNC_ALWAYS:
+                    await temp_file.flush()
+                    await asyncio.to_thread(os.fsync, temp_file.fileno())
+            await asyncio.to_thread(self._commit, temp_path, path)
+        except BaseException:
+            self._discard(temp_path)
+            raise
+        return size
+
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        return path.with_name(f".{path.name}.{uuid4().hex}{TEMP_SUFFIX}")
+
+    def _commit(self, temp_path: Path, path: Path) -> None:
+        # Readers only ever see the complete file or none at all
+        os.replace(temp_path, path)
+        self._written += 1
+        if self._fsync == FSYNC_ALWAYS:
+            self._sync_dir(str(path.parent))
+            self._syncs += 1
+        elif self._fsync == FSYNC_BATCH:
+            self._schedule_sync(str(path), str(path.parent))
+
+    @staticmethod
+    def _discard(temp_path: Path) -> None:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    async def get(self, key: str) -> bytes:
+        async with aiofiles.open(self.local_path(key), 'rb') as source:
+            return await source.read()
+
+    async def get_range(self, key: str, offset: int, length: int) -> bytes:
+        async with aiofiles.open(self.local_path(key), 'rb') as source:
+            await source.seek(offset)
+            data = await source.read(length)
+        if len(data) != length:
+            raise EOFError(f"{key} ends before {offset + length}")
+        return data
+
+    async def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncGenerator[bytes, None]:
+        async with aiofiles.open(self.local_path(key), 'rb') as source:
+            while chunk := await source.read(chunk_size):
+                yield chunk
+
+    async def delete(self, keys: List[str]) -> int:
+        return await asyncio.to_thread(self._remove, [self.local_path(key) for key in keys])
+
+    async def delete_prefix(self, prefix: str) -> Tuple[int, int]:
+        # Only prefixes within one directory are needed, e.g. a blob and the files derived from it
+        base = self.local_path(prefix)
+        return await asyncio.to_thread(self._remove_prefix, base.parent, base.name)
+
+    def _remove_prefix(self, directory: Path, name_prefix: str) -> Tuple[int, int]:
+        try:
+            with os.scandir(directory) as it:
+                entries = [(Path(entry.path), entry.stat().st_size) for entry in it
+                           if entry.name.startswith(name_prefix) and not entry.name.endswith(TEMP_SUFFIX)]
+        except FileNotFoundError:
+            return 0, 0
+        return self._remove([path for path, _ in entries]), sum(size for _, size in entries)
+
+    def _remove(self, paths: List[Path]) -> int:
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self._removed += removed
+        return removed
+
+    async def presign(self, key: str, expires_seconds: int) -> Optional[str]:
+        # Served by nginx or the media route, see MediaUrlService
+        return None
+
+    def _schedule_sync(self, file_path: str, dir_path: str) -> None:
+        with self._lock:
+            self._pending_files.add(file_path)
+            self._pending_dirs.add(dir_path)
+            if self._timer is None:
+                # One fsync pass covers every file written during the interval
+                self._timer = threading.Timer(self._fsync_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            files, self._pending_files = self._pending_files, set()
+            dirs, self._pending_dirs = self._pending_dirs, set()
+            self._timer = None
+        if not files and not dirs:
+            return
+
+        for file_path in files:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        # The renames are only durable once the directories holding them are synced too
+        for dir_path in dirs:
+            self._sync_dir(dir_path)
+        self._syncs += 1
+
+    @staticmethod
+    def _sync_dir(dir_path: str) -> None:
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            # Some filesystems do not support fsync on directories
+            pass
+        finally:
+            os.close(fd)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending_files)
+        return {
+            "backend": "local",
+            "fsync": self._fsync,
+            "written": self._written,
+            "removed": self._removed,
+            "syncs": self._syncs,
+            "pending_sync": pending
+        }
+
+
+class S3ObjectStorage(IObjectStorage):
+    """Objects in an S3 compatible bucket (AWS, MinIO), shared by every API node."""
+
+    def __init__(
+            self,
+            bucket: str,
+            endpoint_url: str = "",
+            region: str = "",
+            access_key: str = "",
+            secret_key: str = "",
+            prefix: str = "",
+            max_connections: int = 10,
+            part_size: int = 8 * 1024 * 1024
+    ):
+        if get_session is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs aiobotocore installed")
+        if not bucket:
+            raise ValueError("STORAGE_S3_BUCKET has to be set for STORAGE_BACKEND=s3")
+        self._bucket = bucket
+        self._endpoint_url = endpoint_url or None
+        self._region = region or None
+        self._access_key = access_key or None
+        self._secret_key = secret_key or None
+        self._prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self._max_connections = max(1, max_connections)
+        self._part_size = max(MIN_PART_SIZE, part_size)
+        self._logger = getLogger(__name__)
+
+        self._client = None
+        self._client_lock = asyncio.Lock()
+        self._exit_stack = AsyncExitStack()
+
+        self._puts = 0
+        self._multipart_uploads = 0
+        self._gets = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._removed = 0
+
+    @property
+    def is_local(self) -> bool:
+        return False
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return None
+
+    async def _get_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    # One client for the process, its pool caps the connections every request shares
+                    config = AioConfig(
+                        max_pool_connections=self._max_connections,
+                        s3={"addressing_style": "path"} if self._endpoint_url else None
+                    )
+                    self._client = await self._exit_stack.enter_async_context(get_session().create_client(
+                        's3',
+                        endpoint_url=self._endpoint_url,
+                        region_name=self._region,
+                        aws_access_key_id=self._access_key,
+                        aws_secret_access_key=self._secret_key,
+                        config=config
+                    ))
+        return self._client
+
+    def _key(self, key: str) -> str:
+        key = key.lstrip('/')
+        if not key or '..' in key.split('/'):
+            raise FileNotFoundError(key)
+        return f"{self._prefix}{key}"
+
+    def _object_args(self, key: str, content_type: Optional[str]) -> Dict[str, Any]:
+        args = {"Bucket": self._bucket, "Key": self._key(key)}
+        if content_type:
+            args["ContentType"] = content_type
+        return args
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        return error.response.get("Error", {}).get("Code") in NOT_FOUND_CODES
+
+    async def exists(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self._bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return False
+            raise
+        return True
+
+    async def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        client = await self._get_client()
+        await client.put_object(Body=data, **self._object_args(key, content_type))
+        self._puts += 1
+        self._bytes_in += len(data)
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: Optional[str] = None) -> int:
+        client = await self._get_client()
+        buffer = bytearray()
+        size = 0
+        upload_id: Optional[str] = None
+        parts: List[Dict[str, Any]] = []
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                # Only one part is held in memory, however large the object gets
+                while len(buffer) >= self._part_size:
+                    if upload_id is None:
+                        created = await client.create_multipart_upload(**self._object_args(key, content_type))
+                        upload_id = created["UploadId"]
+                    part = bytes(buffer[:self._part_size])
+                    del buffer[:self._part_size]
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, part))
+
+            if upload_id is None:
+                # Smaller than one part, a single request is cheaper
+                await client.put_object(Body=bytes(buffer), **self._object_args(key, content_type))
+            else:
+                if buffer:
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+                await client.complete_multipart_upload(
+                    Bucket=self._bucket, Key=self._key(key), UploadId=upload_id, MultipartUpload={"Parts": parts}
+                )
+                self._multipart_uploads += 1
+        except BaseException:
+            if upload_id is not None:
+                await self._abort(client, key, upload_id)
+            raise
+        self._puts += 1
+        self._bytes_in += size
+        return size
+
+    async def _upload_part(self, client, key: str, upload_id: str, number: int, data: bytes) -> Dict[str, Any]:
+        response = await client.upload_part(
+            Bucket=self._bucket, Key=self._key(key), UploadId=upload_id, PartNumber=number, Body=data
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    async def _abort(self, client, key: str, upload_id: str) -> None:
+        try:
+            # Shielded so a cancelled upload still frees the parts stored so far
+            await asyncio.shield(client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key(key), UploadId=upload_id
+            ))
+        except Exception as e:
+            self._logger.warning(f"Could not abort multipart upload of {key}, the bucket lifecycle has to: {e}")
+
+    async def _open(self, key: str, byte_range: Optional[str] = None):
+        client = await self._get_client()
+        range_args = {"Range": byte_range} if byte_range else {}
+        try:
+            response = await client.get_object(Bucket=self._bucket, Key=self._key(key), **range_args)
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+        self._gets += 1
+        return response["Body"]
+
+    async def get(self, key: str) -> bytes:
+        async with await self._open(key) as body:
+            data = await body.read()
+        self._bytes_out += len(data)
+        return data
+
+    async def get_range(self, key: str, offset: int, length: int) -> bytes:
+        async with await self._open(key, f"bytes={offset}-{offset + length - 1}") as body:
+            data = await body.read()
+        self._bytes_out += len(data)
+        if len(data) != length:
+            raise EOFError(f"{key} ends before {offset + length}")
+        return data
+
+    async def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncGenerator[bytes, None]:
+        async with await self._open(key) as body:
+            while chunk := await body.read(chunk_size):
+                self._bytes_out += len(chunk)
+                yield chunk
+
+    async def delete(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        client = await self._get_client()
+        removed = 0
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = await client.delete_objects(
+                Bucket=self._bucket,
+                Delete={"Objects": [{"Key": self._key(key)} for key in batch], "Quiet": True}
+            )
+            errors = response.get("Errors", [])
+            for error in errors:
+                self._logger.warning(f"Could not delete {error.get('Key')}: {error.get('Message')}")
+            removed += len(batch) - len(errors)
+        self._removed += removed
+        return removed
+
+    async def delete_prefix(self, prefix: str) -> Tuple[int, int]:
+        client = await self._get_client()
+        full_prefix = self._key(prefix)
+        keys = []
+        size = 0
+        paginator = client.get_paginator('list_objects_v2')
+        async for page in paginator.paginate(Bucket=self._bucket, Prefix=full_prefix):
+            for entry in page.get("Contents", []):
+                keys.append(entry["Key"][len(self._prefix):])
+                size += entry.get("Size", 0)
+        return await self.delete(keys), size
+
+    async def presign(self, key: str, expires_seconds: int) -> Optional[str]:
+        client = await self._get_client()
+        # Signed locally, no request to the store
+        return await client.generate_presigned_url(
+            'get_object', Params={"Bucket": self._bucket, "Key": self._key(key)}, ExpiresIn=expires_seconds
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "backend": "s3",
+            "bucket": self._bucket,
+            "max_connections": self._max_connections,
+            "part_size": self._part_size,
+            "puts": self._puts,
+            "multipart_uploads": self._multipart_uploads,
+            "gets": self._gets,
+            "bytes_in": self._bytes_in,
+            "bytes_out": self._bytes_out,
+            "removed": self._removed
+        }
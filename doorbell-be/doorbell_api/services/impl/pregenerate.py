@@ -0,0 +1,92 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Dict, List
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.helpers import DiskLRUCache
+from doorbell_api.repositories import ICaptureRepository
+from doorbell_api.services import ICaptureService, IVideoJobService, IVideoPregenerateService
+
+
+class VideoPregenerateService(IVideoPregenerateService):
+    """Encodes a notification's video into the cache once no capture arrived for it for delay_seconds."""
+
+    @inject
+    def __init__(
+            self,
+            capture_service: ICaptureService = Provide['capture_service'],
+            video_job_service: IVideoJobService = Provide['video_job_service'],
+            capture_repo: ICaptureRepository = Provide['capture_repo'],
+            video_cache: DiskLRUCache = Provide['video_cache'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._capture_service = capture_service
+        self._video_job_service = video_job_service
+        self._capture_repo = capture_repo
+        self._video_cache = video_cache
+        self._logger = getLogger(__name__)
+
+        video_config = config.get('video', {}) or {}
+        self._delay_seconds = float(video_config.get('pregenerate_delay_seconds') or 0)
+        # Background jobs take turns so they never hold more than one encoder slot
+        self._encode_slot = asyncio.Semaphore(1)
+        self._timers: Dict[int, asyncio.Task] = {}
+
+        self._generated = 0
+        self._already_cached = 0
+        self._failed = 0
+
+    def touch(self, notification_id: int) -> None:
+        if self._delay_seconds <= 0 or notification_id is None:
+            return
+        # Every new capture of the notification pushes its recording window further out
+        timer = self._timers.pop(notification_id, None)
+        if timer:
+            timer.cancel()
+        self._timers[notification_id] = asyncio.create_task(
+            self._generate_later(notification_id), name=f"video-pregenerate-{notification_id}"
+        )
+
+    async def _generate_later(self, notification_id: int) -> None:
+        await asyncio.sleep(self._delay_seconds)
+        self._timers.pop(notification_id, None)
+
+        async with self._encode_slot:
+            try:
+                async with own_session():
+                    paths = await self._get_paths(notification_id)
+                if not paths:
+                    return
+                if self._video_cache.contains(await self._capture_service.get_video_key(paths)):
+                    self._already_cached += 1
+                    return
+                job_id = await self._video_job_service.submit(paths, background=True)
+                state = await self._video_job_service.wait(job_id)
+                if state != "done":
+                    self._failed += 1
+                    self._logger.warning(f"Pregenerating video of notification {notification_id} ended {state}")
+                    return
+                self._generated += 1
+                self._logger.info(f"Pregenerated stop motion video of notification {notification_id} "
+                                  f"from {len(paths)} capture(s)")
+            except Exception as e:
+                self._failed += 1
+                self._logger.error(f"Could not pregenerate video of notification {notification_id}: {e}",
+                                   exc_info=True)
+
+    @transactional
+    async def _get_paths(self, notification_id: int) -> List[str]:
+        return await self._capture_repo.get_paths_for_notification(notification_id)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "cache": self._video_cache.stats(),
+            "pregenerate": {
+                "waiting": len(self._timers),
+                "generated": self._generated,
+                "already_cached": self._already_cached,
+                "failed": self._failed
+            }
+        }
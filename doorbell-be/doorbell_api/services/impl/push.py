@@ -0,0 +1,234 @@
+import asyncio
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Any, Deque, Dict, List, Optional
+
+from dependency_injector.wiring import Provide, inject
+from firebase_admin import exceptions, messaging
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.helpers import MetricsHelper
+from doorbell_api.repositories import IFCMDeviceRepository
+from doorbell_api.services import IPushService, IFCMTokenCache
+
+FCM_MULTICAST_LIMIT = 500
+METRIC_SAMPLES = 512
+
+DELIVERED = "delivered"
+INVALID_TOKEN = "invalid_token"
+RETRY = "retry"
+FAILED = "failed"
+
+# INVALID_ARGUMENT is also what a malformed message gets, only errors naming the token prune the device
+_INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+_RETRYABLE_ERRORS = (
+    messaging.QuotaExceededError, exceptions.UnavailableError, exceptions.InternalError,
+    exceptions.DeadlineExceededError
+)
+
+
+class PushJob:
+    def __init__(self, title: str, data: Dict[str, str], fcm_tokens: List[str], attempt: int = 0):
+        self.title = title
+        self.data = data
+        self.fcm_tokens = fcm_tokens
+        self.attempt = attempt
+        self.enqueued_at = time.perf_counter()
+
+
+class FirebaseSender:
+
+    def send(self, job: PushJob) -> List[str]:
+        response = messaging.send_each_for_multicast(messaging.MulticastMessage(
+            notification=messaging.Notification(title=job.title),
+            data=job.data,
+            tokens=job.fcm_tokens
+        ))
+        return [self._classify(result) for result in response.responses]
+
+    @staticmethod
+    def _classify(result: messaging.SendResponse) -> str:
+        if result.success:
+            return DELIVERED
+        if isinstance(result.exception, _INVALID_TOKEN_ERRORS):
+            return INVALID_TOKEN
+        if isinstance(result.exception, _RETRYABLE_ERRORS):
+            return RETRY
+        return FAILED
+
+
+class HttpEndpointSender:
+    """Speaks the FCM v1 send API to another endpoint without credentials, used with scripts/fake_fcm.py."""
+
+    def __init__(self, endpoint: str, executor: ThreadPoolExecutor):
+        self._url = f"{endpoint.rstrip('/')}/v1/projects/doorbell/messages:send"
+        self._executor = executor
+
+    def send(self, job: PushJob) -> List[str]:
+        # Already on a pool thread, the per token requests go out in parallel like send_each does
+        return list(self._executor.map(lambda token: self._send_one(job, token), job.fcm_tokens))
+
+    def _send_one(self, job: PushJob, fcm_token: str) -> str:
+        body = json.dumps({
+            "message": {"token": fcm_token, "notification": {"title": job.title}, "data": job.data}
+        }).encode("utf-8")
+        request = urllib.request.Request(self._url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=10):
+                return DELIVERED
+        except urllib.error.HTTPError as e:
+            if e.code == 404 or self._error_code(e) == "UNREGISTERED":
+                return INVALID_TOKEN
+            if e.code == 429 or e.code >= 500:
+                return RETRY
+            return FAILED
+        except OSError:
+            return RETRY
+
+    @staticmethod
+    def _error_code(error: urllib.error.HTTPError) -> Optional[str]:
+        # {"error": {"status": "INVALID_ARGUMENT", "details": [{"@type": "...FcmError", "errorCode": "UNREGISTERED"}]}}
+        try:
+            details = json.loads(error.read() or b"{}").get("error", {}).get("details", [])
+        except (OSError, ValueError, AttributeError):
+            return None
+        for detail in details:
+            if isinstance(detail, dict) and detail.get("errorCode"):
+                return detail["errorCode"]
+        return None
+
+
+class PushService(IPushService):
+    """Queues FCM deliveries so notifications never wait on Google, workers send multicast batches off the loop."""
+
+    @inject
+    def __init__(
+            self,
+            fcm_device_repo: IFCMDeviceRepository = Provide['fcm_device_repo'],
+            token_cache: IFCMTokenCache = Provide['fcm_token_cache'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._fcm_device_repo = fcm_device_repo
+        self._token_cache = token_cache
+        self._logger = getLogger(__name__)
+
+        fcm_config = config.get('fcm', {}) or {}
+        self._workers = max(1, int(fcm_config.get('workers') or 2))
+        self._max_retries = int(fcm_config.get('max_retries') or 3)
+        self._retry_base = float(fcm_config.get('retry_base_seconds') or 1)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=int(fcm_config.get('queue_size') or 1000))
+        self._executor = ThreadPoolExecutor(max_workers=self._workers * 4, thread_name_prefix="fcm-send")
+
+        endpoint = fcm_config.get('endpoint')
+        self._sender = HttpEndpointSender(endpoint, self._executor) if endpoint else FirebaseSender()
+        self._tasks: List[asyncio.Task] = []
+
+        self._counts = {DELIVERED: 0, INVALID_TOKEN: 0, RETRY: 0, FAILED: 0}
+        self._dropped = 0
+        self._gave_up = 0
+        self._pruned = 0
+        self._send_ms: Deque[float] = deque(maxlen=METRIC_SAMPLES)
+        self._delivery_ms: Deque[float] = deque(maxlen=METRIC_SAMPLES)
+
+    def enqueue(self, title: str, data: Dict[str, str], fcm_tokens: List[str]) -> bool:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_worker(), name=f"fcm-worker-{i}") for i in range(self._workers)]
+
+        queued = True
+        for start in range(0, len(fcm_tokens), FCM_MULTICAST_LIMIT):
+            queued = self._put(PushJob(title, data, fcm_tokens[start:start + FCM_MULTICAST_LIMIT])) and queued
+        return queued
+
+    def _put(self, job: PushJob) -> bool:
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            self._dropped += len(job.fcm_tokens)
+            self._logger.error(f"FCM queue full, dropped push '{job.title}' for {len(job.fcm_tokens)} device(s)")
+            return False
+
+    async def _run_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                started_at = time.perf_counter()
+                results = await loop.run_in_executor(self._executor, self._sender.send, job)
+                finished_at = time.perf_counter()
+                self._send_ms.append((finished_at - started_at) * 1000)
+                self._delivery_ms.append((finished_at - job.enqueued_at) * 1000)
+                await self._handle_results(job, results)
+            except Exception as e:
+                self._logger.error(f"FCM send of '{job.title}' to {len(job.fcm_tokens)} device(s) failed: {e}",
+                                   exc_info=True)
+                await self._handle_results(job, [RETRY] * len(job.fcm_tokens))
+            finally:
+                self._queue.task_done()
+
+    async def _handle_results(self, job: PushJob, results: List[str]) -> None:
+        retry_tokens = []
+        invalid_tokens = []
+        for fcm_token, result in zip(job.fcm_tokens, results):
+            self._counts[result] += 1
+            if result == RETRY:
+                retry_tokens.append(fcm_token)
+            elif result == INVALID_TOKEN:
+                invalid_tokens.append(fcm_token)
+
+        if invalid_tokens:
+            await self._prune(invalid_tokens)
+
+        if retry_tokens:
+            if job.attempt >= self._max_retries:
+                self._gave_up += len(retry_tokens)
+                self._logger.warning(f"Giving up on '{job.title}' for {len(retry_tokens)} device(s) "
+                                     f"after {job.attempt} retries")
+                return
+            delay = self._retry_base * 2 ** job.attempt * (1 + random.random() / 2)
+            asyncio.create_task(self._retry_later(PushJob(job.title, job.data, retry_tokens, job.attempt + 1), delay))
+
+    async def _retry_later(self, job: PushJob, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._put(job)
+
+    async def _prune(self, fcm_tokens: List[str]) -> None:
+        try:
+            async with own_session():
+                user_ids = await self._delete_tokens(fcm_tokens)
+            for user_id in set(user_ids):
+                self._token_cache.invalidate(user_id)
+            self._pruned += len(user_ids)
+            self._logger.info(f"Pruned {len(user_ids)} unregistered FCM device(s)")
+        except Exception as e:
+            self._logger.error(f"Could not prune {len(fcm_tokens)} invalid FCM token(s): {e}", exc_info=True)
+
+    @transactional
+    async def _delete_tokens(self, fcm_tokens: List[str]) -> List[int]:
+        user_ids = await self._fcm_device_repo.delete_by_tokens(fcm_tokens)
+        for user_id in set(user_ids):
+            await self._fcm_device_repo.notify_tokens_changed(user_id)
+        return user_ids
+
+    def get_metrics(self) -> Dict[str, Any]:
+        attempts = sum(self._counts.values())
+        failures = attempts - self._counts[DELIVERED]
+        return {
+            "queued": self._queue.qsize(),
+            "delivered": self._counts[DELIVERED],
+            "invalid_tokens": self._counts[INVALID_TOKEN],
+            "retried": self._counts[RETRY],
+            "failed": self._counts[FAILED],
+            "gave_up": self._gave_up,
+            "dropped": self._dropped,
+            "pruned": self._pruned,
+            "failure_rate": round(failures / attempts, 4) if attempts else None,
+            "send_ms": MetricsHelper.percentiles(self._send_ms),
+            "delivery_ms": MetricsHelper.percentiles(self._delivery_ms)
+        }
@@ -0,0 +1,144 @@
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
+
+from dependency_injector.wiring import Provide, inject
+from pydantic import TypeAdapter
+
+from doorbell_api.helpers import TTLCache
+from doorbell_api.services import IQueryCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed when several API workers share their cache
+    aioredis = None
+
+T = TypeVar('T')
+REDIS_PREFIX = "doorbell:cache:"
+
+
+class MemoryQueryCacheBackend:
+    """Serialized results in an LRU, only visible to the current worker."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._entries: TTLCache[str, bytes] = TTLCache(max_entries, ttl_seconds)
+        self._generations: Dict[str, int] = {}
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries.set(key, value)
+
+    async def bump(self, namespaces: Iterable[str]) -> None:
+        # Entries of older generations are never read again, the LRU pushes them out
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisQueryCacheBackend:
+    """Serialized results with a TTL, shared by every worker pointing at the same Redis."""
+
+    def __init__(self, url: str, ttl_seconds: int):
+        self._redis = aioredis.from_url(url)
+        self._ttl = ttl_seconds
+
+    async def generation(self, namespace: str) -> int:
+        return int(await self._redis.get(f"{REDIS_PREFIX}{namespace}:generation") or 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(f"{REDIS_PREFIX}{key}")
+
+    async def set(self, key: str, value: bytes) -> None:
+        # Redis' own maxmemory policy bounds the size, the TTL lets entries of older generations go
+        await self._redis.set(f"{REDIS_PREFIX}{key}", value, ex=self._ttl)
+
+    async def bump(self, namespaces: Iterable[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                pipe.incr(f"{REDIS_PREFIX}{namespace}:generation")
+            await pipe.execute()
+
+
+class QueryCache(IQueryCache):
+    """Read-through cache of service results, every write moves its namespace to a new generation."""
+
+    @inject
+    def __init__(self, config: dict[str, Any] = Provide['config']):
+        self._logger = getLogger(__name__)
+
+        cache_config = config.get('cache', {}) or {}
+        self._enabled = str(cache_config.get('enabled', 'true')).lower() in ('1', 'true', 'yes')
+        self._ttl_seconds = max(1, int(cache_config.get('ttl_seconds') or 30))
+        max_entries = int(cache_config.get('max_entries') or 1024)
+
+        redis_url = cache_config.get('redis_url')
+        if redis_url and aioredis is None:
+            self._logger.warning("CACHE_REDIS_URL is set but redis is not installed, the cache stays per worker.")
+        if redis_url and aioredis is not None:
+            self._backend = RedisQueryCacheBackend(redis_url, self._ttl_seconds)
+        else:
+            # Writes made by other workers are only seen once the TTL runs out
+            self._backend = MemoryQueryCacheBackend(max_entries, self._ttl_seconds)
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._errors = 0
+
+    async def get_or_load(self, namespace: str, key: str, load: Callable[[], Awaitable[T]],
+                          adapter: TypeAdapter[T]) -> T:
+        if not self._enabled:
+            return await load()
+
+        try:
+            # Taken before loading, a write committing meanwhile moves the namespace past what gets stored here
+            versioned_key = f"{namespace}:{await self._backend.generation(namespace)}:{key}"
+            cached = await self._backend.get(versioned_key)
+        except Exception as e:
+            self._errors += 1
+            self._logger.warning(f"Query cache read of {namespace} {key} failed, loading it directly: {e}")
+            return await load()
+
+        if cached is not None:
+            self._hits += 1
+            return adapter.validate_json(cached)
+
+        self._misses += 1
+        value = await load()
+        try:
+            await self._backend.set(versioned_key, adapter.dump_json(value))
+        except Exception as e:
+            self._errors += 1
+            self._logger.warning(f"Query cache write of {namespace} {key} failed: {e}")
+        return value
+
+    async def invalidate(self, *namespaces: str) -> None:
+        if not self._enabled or not namespaces:
+            return
+        self._invalidations += 1
+        try:
+            await self._backend.bump(namespaces)
+        except Exception as e:
+            self._errors += 1
+            self._logger.error(
+                f"Could not invalidate cached {', '.join(namespaces)}, they stay stale for up to {self._ttl_seconds}s: {e}"
+            )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        memory = isinstance(self._backend, MemoryQueryCacheBackend)
+        return {
+            "enabled": self._enabled,
+            "backend": "memory" if memory else "redis",
+            "ttl_seconds": self._ttl_seconds,
+            "size": len(self._backend) if memory else None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "invalidations": self._invalidations,
+            "errors": self._errors
+        }
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from logging import getLogger
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.repositories import INotificationRepository
+from doorbell_api.services import IRateLimitService
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed when several API workers share their limits
+    aioredis = None
+
+DEFAULT_LIMITS = "motion_detected=1/60"
+
+
+class MemoryRateLimitBackend:
+    """Sliding window log per key, only visible to the current worker."""
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+
+    async def hit(self, key: str, max_events: int, window_seconds: float, now: float) -> bool:
+        hits = self._hits.setdefault(key, deque())
+        while hits and hits[0] <= now - window_seconds:
+            hits.popleft()
+        if len(hits) >= max_events:
+            return False
+        hits.append(now)
+        return True
+
+    def seed(self, key: str, timestamps: Iterable[float]) -> None:
+        self._hits[key] = deque(sorted(timestamps))
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+
+class RedisRateLimitBackend:
+    """Sliding window log in a sorted set, shared by every worker pointing at the same Redis."""
+
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+
+    async def hit(self, key: str, max_events: int, window_seconds: float, now: float) -> bool:
+        redis_key = f"doorbell:rate_limit:{key}"
+        member = f"{now}:{uuid4().hex}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(redis_key, 0, now - window_seconds)
+            pipe.zadd(redis_key, {member: now})
+            pipe.zcard(redis_key)
+            pipe.expire(redis_key, int(window_seconds) + 1)
+            _, _, count, _ = await pipe.execute()
+        if count > max_events:
+            await self._redis.zrem(redis_key, member)
+            return False
+        return True
+
+
+class RateLimitService(IRateLimitService):
+
+    @inject
+    def __init__(
+            self,
+            notification_repo: INotificationRepository = Provide['notification_repo'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._notification_repo = notification_repo
+        self._logger = getLogger(__name__)
+
+        rate_limit_config = config.get('rate_limit', {}) or {}
+        self._limits = self._parse_limits(rate_limit_config.get('limits') or DEFAULT_LIMITS)
+
+        redis_url = rate_limit_config.get('redis_url')
+        if redis_url and aioredis is None:
+            self._logger.warning("RATE_LIMIT_REDIS_URL is set but redis is not installed, limits stay per worker.")
+        if redis_url and aioredis is not None:
+            self._backend = RedisRateLimitBackend(redis_url)
+            self._warmed_up = True
+        else:
+            self._backend = MemoryRateLimitBackend()
+            self._warmed_up = False
+        self._warm_up_lock = asyncio.Lock()
+
+        self._allowed = 0
+        self._limited = 0
+
+    @staticmethod
+    def _parse_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+        # "motion_detected=1/60,face_detected=3/120" -> at most 1 per 60s and 3 per 120s
+        limits = {}
+        for entry in spec.split(','):
+            if not entry.strip():
+                continue
+            event_type, rule = entry.split('=')
+            max_events, window_seconds = rule.split('/')
+            limits[event_type.strip()] = (int(max_events), float(window_seconds))
+        return limits
+
+    def get_limit(self, event_type: str) -> Optional[Tuple[int, float]]:
+        return self._limits.get(event_type)
+
+    async def allow(self, user_id: str, event_type: str) -> bool:
+        limit = self._limits.get(event_type)
+        if not limit:
+            return True
+
+        if not self._warmed_up:
+            await self._warm_up()
+
+        max_events, window_seconds = limit
+        allowed = await self._backend.hit(f"{user_id}:{event_type}", max_events, window_seconds, time.time())
+        if allowed:
+            self._allowed += 1
+        else:
+            self._limited += 1
+        return allowed
+
+    async def _warm_up(self) -> None:
+        # Without this a restart would let a burst through right after the last notification
+        async with self._warm_up_lock:
+            if self._warmed_up:
+                return
+            longest_window = max(window for _, window in self._limits.values())
+            since = datetime.fromtimestamp(time.time() - longest_window)
+
+            try:
+                async with own_session():
+                    recent = await self._find_recent(since)
+            except Exception as e:
+                self._logger.error(f"Rate limiter warm up failed, starting empty: {e}", exc_info=True)
+                recent = []
+
+            seeded: Dict[str, list] = {}
+            for user_id, type_str, created_at in recent:
+                limit = self._limits.get(type_str)
+                if limit and created_at.timestamp() > time.time() - limit[1]:
+                    seeded.setdefault(f"{user_id}:{type_str}", []).append(created_at.timestamp())
+            for key, timestamps in seeded.items():
+                self._backend.seed(key, timestamps)
+
+            self._warmed_up = True
+            self._logger.info(f"Rate limiter warmed up with {len(recent)} recent notifications")
+
+    @transactional
+    async def _find_recent(self, since: datetime):
+        notifications = await self._notification_repo.find_created_since(since, list(self._limits.keys()))
+        return [(n.user_id, n.type_str, n.created_at) for n in notifications]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if isinstance(self._backend, RedisRateLimitBackend) else "memory",
+            "limits": {event_type: {"max_events": m, "window_seconds": w} for event_type, (m, w) in self._limits.items()},
+            "allowed": self._allowed,
+            "limited": self._limited
+        }
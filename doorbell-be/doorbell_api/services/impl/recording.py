@@ -0,0 +1,393 @@
+import asyncio
+import queue
+import threading
+from datetime import datetime, timedelta
+from fractions import Fraction
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.models import LiveSession
+from doorbell_api.repositories import ILiveSessionRepository, INotificationRepository
+from doorbell_api.services import IRecordingService
+
+try:
+    import av
+    from aiortc import __version__ as aiortc_version
+except ImportError:  # Installed together with aiortc, recording is only possible through the relay
+    av = None
+    aiortc_version = None
+
+RTP_VIDEO_CLOCK_RATE = 90000
+RTP_TIMESTAMP_MODULO = 1 << 32
+H264_KEYFRAME_NAL_TYPES = (5, 7)  # IDR slice, SPS
+H264_SPS_NAL_TYPE = 7
+H264_PPS_NAL_TYPE = 8
+# Profiles whose SPS carries chroma format, bit depths and scaling matrices
+H264_HIGH_PROFILES = (100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135)
+# Encoded frames are copied out of a private attribute of RTCRtpReceiver, only these releases were checked for it
+TAPPED_AIORTC_VERSIONS = ("1.15",)
+DECODER_QUEUE_ATTRIBUTE = "_RTCRtpReceiver__decoder_queue"
+
+
+def _is_h264_keyframe(data: bytes) -> bool:
+    index = data.find(b"\x00\x00\x01")
+    while index != -1 and index + 3 < len(data):
+        if data[index + 3] & 0x1F in H264_KEYFRAME_NAL_TYPES:
+            return True
+        index = data.find(b"\x00\x00\x01", index + 3)
+    return False
+
+
+def _split_h264_nal_units(data: bytes) -> List[bytes]:
+    starts = []
+    index = data.find(b"\x00\x00\x01")
+    while index != -1:
+        starts.append(index + 3)
+        index = data.find(b"\x00\x00\x01", index + 3)
+    ends = [start - 3 for start in starts[1:]] + [len(data)]
+    # Zeros before a start code are the fourth byte of it or padding, never part of the unit
+    units = [data[start:end].rstrip(b"\x00") for start, end in zip(starts, ends)]
+    return [unit for unit in units if unit]
+
+
+class _BitReader:
+    def __init__(self, data: bytes):
+        # Emulation prevention bytes are not part of the syntax
+        self._data = data.replace(b"\x00\x00\x03", b"\x00\x00")
+        self._position = 0
+
+    def bits(self, count: int) -> int:
+        value = 0
+        for _ in range(count):
+            byte = self._data[self._position >> 3]
+            value = (value << 1) | ((byte >> (7 - (self._position & 7))) & 1)
+            self._position += 1
+        return value
+
+    def ue(self) -> int:
+        zeros = 0
+        while self.bits(1) == 0:
+            zeros += 1
+        return (1 << zeros) - 1 + self.bits(zeros)
+
+    def se(self) -> int:
+        value = self.ue()
+        return (value + 1) // 2 if value & 1 else -(value // 2)
+
+
+def _h264_sps_size(sps: bytes) -> Tuple[int, int]:
+    """Coded picture size of an SPS NAL unit, after cropping, as (width, height)."""
+    reader = _BitReader(sps[1:])
+    profile_idc = reader.bits(8)
+    reader.bits(16)  # Constraint flags, level
+    reader.ue()  # seq_parameter_set_id
+    chroma_format_idc = 1
+    separate_colour_plane = 0
+    if profile_idc in H264_HIGH_PROFILES:
+        chroma_format_idc = reader.ue()
+        if chroma_format_idc == 3:
+            separate_colour_plane = reader.bits(1)
+        reader.ue()  # bit_depth_luma_minus8
+        reader.ue()  # bit_depth_chroma_minus8
+        reader.bits(1)  # qpprime_y_zero_transform_bypass_flag
+        if reader.bits(1):  # seq_scaling_matrix_present_flag
+            for list_index in range(8 if chroma_format_idc != 3 else 12):
+                if reader.bits(1):
+                    last_scale = next_scale = 8
+                    for _ in range(16 if list_index < 6 else 64):
+                        if next_scale != 0:
+                            next_scale = (last_scale + reader.se() + 256) % 256
+                        last_scale = next_scale or last_scale
+    reader.ue()  # log2_max_frame_num_minus4
+    pic_order_cnt_type = reader.ue()
+    if pic_order_cnt_type == 0:
+        reader.ue()  # log2_max_pic_order_cnt_lsb_minus4
+    elif pic_order_cnt_type == 1:
+        reader.bits(1)  # delta_pic_order_always_zero_flag
+        reader.se()  # offset_for_non_ref_pic
+        reader.se()  # offset_for_top_to_bottom_field
+        for _ in range(reader.ue()):
+            reader.se()
+    reader.ue()  # max_num_ref_frames
+    reader.bits(1)  # gaps_in_frame_num_value_allowed_flag
+    width_in_mbs = reader.ue() + 1
+    height_in_map_units = reader.ue() + 1
+    frame_mbs_only = reader.bits(1)
+    if not frame_mbs_only:
+        reader.bits(1)  # mb_adaptive_frame_field_flag
+    reader.bits(1)  # direct_8x8_inference_flag
+
+    width = width_in_mbs * 16
+    height = (2 - frame_mbs_only) * height_in_map_units * 16
+    if reader.bits(1):  # frame_cropping_flag
+        left, right, top, bottom = reader.ue(), reader.ue(), reader.ue(), reader.ue()
+        if chroma_format_idc == 0 or separate_colour_plane:
+            crop_x, crop_y = 1, 2 - frame_mbs_only
+        else:
+            crop_x = 1 if chroma_format_idc == 3 else 2
+            crop_y = (2 if chroma_format_idc == 1 else 1) * (2 - frame_mbs_only)
+        width -= (left + right) * crop_x
+        height -= (top + bottom) * crop_y
+    return width, height
+
+
+def _unwrap_rtp_timestamp(timestamp: int, previous: Optional[int]) -> int:
+    # 32 bits wrap after about 13 hours at 90 kHz, the nearest value to the previous frame is the right one
+    if previous is None:
+        return timestamp
+    delta = (timestamp - previous) % RTP_TIMESTAMP_MODULO
+    if delta >= RTP_TIMESTAMP_MODULO // 2:
+        delta -= RTP_TIMESTAMP_MODULO
+    return previous + delta
+
+
+class SegmentedRecorder:
+    """Muxes H.264 access units into fixed-length MP4 segments on its own writer thread, without re-encoding."""
+
+    def __init__(self, directory: Path, segment_seconds: int, queue_size: int):
+        self.directory = directory
+        self.segment_count = 0
+        self.bytes_written = 0
+        self.dropped_frames = 0
+
+        self._segment_ticks = segment_seconds * RTP_VIDEO_CLOCK_RATE
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._waiting_for_keyframe = True
+        self._thread = threading.Thread(target=self._run, name=f"recorder-{directory.name}", daemon=True)
+        self._logger = getLogger(__name__)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, data: bytes, timestamp: int) -> None:
+        # Called from the media path, must never block
+        keyframe = _is_h264_keyframe(data)
+        if self._waiting_for_keyframe and not keyframe:
+            self.dropped_frames += 1
+            return
+
+        try:
+            self._queue.put_nowait((data, timestamp, keyframe))
+            self._waiting_for_keyframe = False
+        except queue.Full:
+            # Frames after a gap cannot be decoded, skip until the next keyframe
+            self.dropped_frames += 1
+            self._waiting_for_keyframe = True
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        container = None
+        stream = None
+        segment_start: Optional[int] = None
+        last_timestamp: Optional[int] = None
+        last_pts = -1
+        # Latest SPS and PPS of the camera, every segment starts with them so its avcC describes the real stream
+        parameter_sets: Dict[int, bytes] = {}
+        size: Optional[Tuple[int, int]] = None
+        segment_size: Optional[Tuple[int, int]] = None
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                data, timestamp, keyframe = item
+                timestamp = last_timestamp = _unwrap_rtp_timestamp(timestamp, last_timestamp)
+
+                carries_parameter_sets = False
+                if keyframe:
+                    for unit in _split_h264_nal_units(data):
+                        nal_type = unit[0] & 0x1F
+                        if nal_type == H264_SPS_NAL_TYPE:
+                            try:
+                                size = _h264_sps_size(unit)
+                            except IndexError:
+                                self._logger.warning(f"Recorder for {self.directory} got a truncated SPS")
+                                continue
+                        if nal_type in (H264_SPS_NAL_TYPE, H264_PPS_NAL_TYPE):
+                            parameter_sets[nal_type] = unit
+                            carries_parameter_sets = True
+
+                if keyframe and (
+                        container is None or size != segment_size
+                        or timestamp - segment_start >= self._segment_ticks
+                ):
+                    if size is None or len(parameter_sets) < 2:
+                        # Nothing to size the track with yet, wait for a keyframe that brings its SPS and PPS
+                        continue
+                    self._close_segment(container)
+                    container, stream = self._open_segment(*size)
+                    segment_start = timestamp
+                    segment_size = size
+                    last_pts = -1
+                    if not carries_parameter_sets:
+                        data = b"".join(b"\x00\x00\x00\x01" + parameter_sets[nal_type]
+                                        for nal_type in (H264_SPS_NAL_TYPE, H264_PPS_NAL_TYPE)) + data
+                if container is None:
+                    continue
+
+                pts = max(timestamp - segment_start, last_pts + 1)
+                last_pts = pts
+
+                packet = av.Packet(data)
+                packet.stream = stream
+                packet.pts = packet.dts = pts
+                packet.time_base = stream.time_base
+                if keyframe:
+                    packet.is_keyframe = True
+                container.mux(packet)
+        except Exception as e:
+            self._logger.error(f"Recorder for {self.directory} stopped: {e}", exc_info=True)
+        finally:
+            self._close_segment(container)
+
+    def _open_segment(self, width: int, height: int):
+        path = self.directory / f"segment_{self.segment_count:05d}.mp4"
+        container = av.open(str(path), mode="w", format="mp4")
+        # No codec context, add_stream would open an H.264 encoder whose SPS/PPS end up in the avcC instead.
+        # Without extradata the mp4 muxer takes them from the first packet, which always carries the camera's
+        stream = container.add_mux_stream("h264", width=width, height=height)
+        stream.time_base = Fraction(1, RTP_VIDEO_CLOCK_RATE)
+        self.segment_count += 1
+        return container, stream
+
+    def _close_segment(self, container) -> None:
+        if container is None:
+            return
+        try:
+            container.close()
+        except Exception as e:
+            self._logger.error(f"Error closing segment {container.name}: {e}")
+        path = Path(container.name)
+        if path.exists():
+            self.bytes_written += path.stat().st_size
+
+
+class RecordingService(IRecordingService):
+
+    @inject
+    def __init__(
+            self,
+            live_session_repo: ILiveSessionRepository = Provide['live_session_repo'],
+            notification_repo: INotificationRepository = Provide['notification_repo'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._live_session_repo = live_session_repo
+        self._notification_repo = notification_repo
+        self._logger = getLogger(__name__)
+
+        recording_config = config.get('recording', {}) or {}
+        requested = str(recording_config.get('enabled', 'false')).lower() in ('1', 'true', 'yes')
+        if requested and av is None:
+            self._logger.warning("RECORDING_ENABLED is set but PyAV is not installed, recording disabled.")
+        self._enabled = requested and av is not None
+        if self._enabled and not aiortc_version.startswith(tuple(f"{version}." for version in TAPPED_AIORTC_VERSIONS)):
+            raise RuntimeError(
+                f"RECORDING_ENABLED needs aiortc {' or '.join(TAPPED_AIORTC_VERSIONS)}, {aiortc_version} is installed. "
+                f"Recording reads encoded frames from RTCRtpReceiver.{DECODER_QUEUE_ATTRIBUTE}, "
+                f"check it still exists before adding a version."
+            )
+        if self._enabled and not hasattr(av.container.OutputContainer, "add_mux_stream"):
+            raise RuntimeError(
+                f"RECORDING_ENABLED needs a PyAV with OutputContainer.add_mux_stream, {av.__version__} is installed."
+            )
+
+        self._segment_seconds = int(recording_config.get('segment_seconds') or 60)
+        self._queue_size = int(recording_config.get('queue_size') or 300)
+        self._link_window = timedelta(minutes=int(recording_config.get('link_window_minutes') or 5))
+        self._base_path = Path(config['capture_dir'])
+
+        # room id -> (live session id, recorder, undo receiver tap)
+        self._recordings: Dict[str, Tuple[int, SegmentedRecorder, Callable[[], None]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    async def start(self, room_id: str, receiver: Any) -> None:
+        if not self._enabled or room_id in self._recordings:
+            return
+
+        started_at = datetime.now()
+        relative_path = Path("recordings") / f"{room_id}_{started_at:%Y%m%d_%H%M%S}"
+        directory = self._base_path / relative_path
+        directory.mkdir(parents=True, exist_ok=True)
+
+        async with own_session():
+            session_id = await self._create_session(room_id, str(relative_path), started_at)
+
+        recorder = SegmentedRecorder(directory, self._segment_seconds, self._queue_size)
+        recorder.start()
+        self._recordings[room_id] = (session_id, recorder, self._tap_receiver(receiver, recorder))
+        self._logger.info(f"Recording room {room_id} to {directory} (live session {session_id})")
+
+    async def stop(self, room_id: str) -> None:
+        entry = self._recordings.pop(room_id, None)
+        if not entry:
+            return
+
+        session_id, recorder, untap = entry
+        untap()
+        await asyncio.to_thread(recorder.close)
+        async with own_session():
+            await self._finish_session(
+                session_id, recorder.segment_count, recorder.bytes_written, recorder.dropped_frames
+            )
+        self._logger.info(
+            f"Recording of room {room_id} finished: {recorder.segment_count} segments, "
+            f"{recorder.bytes_written} bytes, {recorder.dropped_frames} dropped frames"
+        )
+
+    def _tap_receiver(self, receiver: Any, recorder: SegmentedRecorder) -> Callable[[], None]:
+        # aiortc only exposes decoded frames, the encoded ones are copied where they enter the decoder queue
+        decoder_queue = getattr(receiver, DECODER_QUEUE_ATTRIBUTE, None)
+        if decoder_queue is None:
+            raise RuntimeError(f"aiortc {aiortc_version} has no RTCRtpReceiver.{DECODER_QUEUE_ATTRIBUTE} to record from")
+        original_put = decoder_queue.put
+        warned = False
+
+        def put(item, *args, **kwargs):
+            nonlocal warned
+            original_put(item, *args, **kwargs)
+            if item is None:
+                return
+            codec, encoded_frame = item
+            if codec.mimeType.lower() != "video/h264":
+                if not warned:
+                    self._logger.warning(f"Cannot record {codec.mimeType} without re-encoding, expected H264")
+                    warned = True
+                return
+            recorder.submit(encoded_frame.data, encoded_frame.timestamp)
+
+        decoder_queue.put = put
+        return lambda: setattr(decoder_queue, "put", original_put)
+
+    @transactional
+    async def _create_session(self, room_id: str, path: str, started_at: datetime) -> int:
+        notification = await self._notification_repo.find_latest_since(started_at - self._link_window)
+        live_session = await self._live_session_repo.create_model(LiveSession(
+            room_id=room_id,
+            notification_id=notification.id if notification else None,
+            path=path,
+            started_at=started_at,
+            segment_count=0,
+            bytes_written=0,
+            dropped_frames=0
+        ))
+        return live_session.id
+
+    @transactional
+    async def _finish_session(self, session_id: int, segment_count: int, bytes_written: int, dropped_frames: int) -> None:
+        await self._live_session_repo.update_model_by_id(session_id, {
+            "ended_at": datetime.now(),
+            "segment_count": segment_count,
+            "bytes_written": bytes_written,
+            "dropped_frames": dropped_frames
+        })
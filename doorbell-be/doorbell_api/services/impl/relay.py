@@ -0,0 +1,246 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.services import IWebRTCRelayService, IRecordingService
+
+try:
+    from aiortc import RTCPeerConnection, RTCRtpReceiver, RTCSessionDescription, RTCConfiguration, RTCIceServer
+    from aiortc.contrib.media import MediaRelay
+    from aiortc.sdp import candidate_from_sdp
+except ImportError:  # The relay is optional, the API only forwards signaling without aiortc
+    RTCPeerConnection = None
+
+UPSTREAM_TIMEOUT_SECONDS = 15
+TURN_CREDENTIAL_TTL_SECONDS = 24 * 3600
+
+
+class RelayRoom:
+    def __init__(self, room_id: str, broadcaster_id: str):
+        self.room_id = room_id
+        self.relay_id = WebRTCRelayService.get_relay_id(room_id)
+        self.broadcaster_id = broadcaster_id
+        self.upstream: Optional["RTCPeerConnection"] = None
+        self.upstream_answer: Optional[asyncio.Future] = None
+        self.track = None
+        self.media_relay = MediaRelay()
+        self.viewers: Dict[str, "RTCPeerConnection"] = {}
+        self.lock = asyncio.Lock()
+
+
+class WebRTCRelayService(IWebRTCRelayService):
+    """Subscribes once to the broadcaster of a room and re-publishes its video to every viewer."""
+
+    @inject
+    def __init__(
+            self,
+            recording_service: IRecordingService = Provide['recording_service'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._logger = getLogger(__name__)
+        self._recording = recording_service
+        relay_config = config.get('webrtc_relay', {}) or {}
+        requested = str(relay_config.get('enabled', 'false')).lower() in ('1', 'true', 'yes')
+
+        if requested and RTCPeerConnection is None:
+            self._logger.warning("WEBRTC_RELAY_ENABLED is set but aiortc is not installed, relay disabled.")
+        self._enabled = requested and RTCPeerConnection is not None
+
+        turn_config = config.get('turn', {}) or {}
+        self._turn_host = turn_config.get('host')
+        self._turn_secret = turn_config.get('secret')
+
+        self._rooms: Dict[str, RelayRoom] = {}
+        self._viewer_rooms: Dict[str, str] = {}
+        self._send: Optional[Callable[[str, Dict[str, Any]], Awaitable[bool]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def set_sender(self, sender: Callable[[str, Dict[str, Any]], Awaitable[bool]]) -> None:
+        self._send = sender
+
+    @staticmethod
+    def get_relay_id(room_id: str) -> str:
+        return f"relay-{room_id}"
+
+    def is_relay_id(self, connection_id: Optional[str]) -> bool:
+        return any(room.relay_id == connection_id for room in self._rooms.values())
+
+    def is_relayed_viewer(self, connection_id: str) -> bool:
+        return connection_id in self._viewer_rooms
+
+    def _rtc_configuration(self) -> "RTCConfiguration":
+        ice_servers = []
+        if self._turn_host and self._turn_secret:
+            username = f"{int(time.time()) + TURN_CREDENTIAL_TTL_SECONDS}:doorbell_relay"
+            digest = hmac.new(self._turn_secret.encode('utf-8'), username.encode('utf-8'), hashlib.sha1).digest()
+            credential = base64.b64encode(digest).decode('utf-8')
+            ice_servers.append(RTCIceServer(f"turn:{self._turn_host}:3478?transport=udp", username, credential))
+        return RTCConfiguration(iceServers=ice_servers)
+
+    async def handle_viewer_offer(self, room_id: str, broadcaster_id: str, viewer_id: str, sdp: str) -> Optional[str]:
+        room = self._rooms.get(room_id)
+        if room is None or room.broadcaster_id != broadcaster_id:
+            if room is not None:
+                await self.close_room(room_id)
+            room = RelayRoom(room_id, broadcaster_id)
+            self._rooms[room_id] = room
+
+        await self._drop_viewer(viewer_id)
+
+        try:
+            async with room.lock:
+                track = await self._ensure_upstream(room)
+        except Exception as e:
+            self._logger.error(f"Relay could not subscribe to broadcaster {broadcaster_id} in room {room_id}: {e}")
+            await self._close_upstream(room)
+            return None
+
+        pc = RTCPeerConnection(configuration=self._rtc_configuration())
+        pc.addTrack(room.media_relay.subscribe(track, buffered=False))
+        room.viewers[viewer_id] = pc
+        self._viewer_rooms[viewer_id] = room_id
+
+        @pc.on("connectionstatechange")
+        async def on_connectionstatechange():
+            self._logger.info(f"Relay connection state for viewer {viewer_id} is {pc.connectionState}")
+            if pc.connectionState == "failed":
+                await self.remove_viewer(viewer_id)
+
+        try:
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type="offer"))
+            await pc.setLocalDescription(await pc.createAnswer())
+        except Exception as e:
+            self._logger.error(f"Relay failed to answer viewer {viewer_id}: {e}", exc_info=True)
+            await self.remove_viewer(viewer_id)
+            return None
+
+        self._logger.info(f"Relay serving viewer {viewer_id} in room {room_id} ({len(room.viewers)} viewers)")
+        return pc.localDescription.sdp
+
+    async def _ensure_upstream(self, room: RelayRoom):
+        if room.upstream and room.track and room.upstream.connectionState not in ("failed", "closed"):
+            return room.track
+
+        pc = RTCPeerConnection(configuration=self._rtc_configuration())
+        transceiver = pc.addTransceiver("video", direction="recvonly")
+        if self._recording.enabled:
+            # Recording copies the encoded stream into MP4, which needs H.264 from the broadcaster
+            transceiver.setCodecPreferences([
+                codec for codec in RTCRtpReceiver.getCapabilities("video").codecs if codec.mimeType == "video/H264"
+            ])
+        room.upstream = pc
+
+        loop = asyncio.get_running_loop()
+        room.upstream_answer = loop.create_future()
+        track_future = loop.create_future()
+
+        @pc.on("track")
+        def on_track(track):
+            if track.kind == "video" and not track_future.done():
+                track_future.set_result(track)
+
+        @pc.on("connectionstatechange")
+        async def on_connectionstatechange():
+            self._logger.info(f"Relay upstream state in room {room.room_id} is {pc.connectionState}")
+            if pc.connectionState == "failed" and room.upstream is pc:
+                await self.close_room(room.room_id)
+
+        await pc.setLocalDescription(await pc.createOffer())
+        sent = await self._send(room.broadcaster_id, {
+            "type": "offer",
+            "clientId": room.relay_id,
+            "target": room.broadcaster_id,
+            "roomId": room.room_id,
+            "sdp": pc.localDescription.sdp
+        })
+        if not sent:
+            raise ConnectionError(f"Broadcaster {room.broadcaster_id} is not connected")
+
+        answer_sdp = await asyncio.wait_for(room.upstream_answer, UPSTREAM_TIMEOUT_SECONDS)
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=answer_sdp, type="answer"))
+        room.track = await asyncio.wait_for(track_future, UPSTREAM_TIMEOUT_SECONDS)
+        self._logger.info(f"Relay subscribed to broadcaster {room.broadcaster_id} in room {room.room_id}")
+
+        if self._recording.enabled:
+            try:
+                await self._recording.start(room.room_id, transceiver.receiver)
+            except Exception as e:
+                self._logger.error(f"Could not start recording room {room.room_id}: {e}", exc_info=True)
+        return room.track
+
+    async def handle_upstream_answer(self, relay_id: str, sdp: str) -> None:
+        for room in self._rooms.values():
+            if room.relay_id == relay_id:
+                if room.upstream_answer and not room.upstream_answer.done():
+                    room.upstream_answer.set_result(sdp)
+                return
+        self._logger.warning(f"Answer for unknown relay {relay_id}")
+
+    async def handle_viewer_ice_candidate(self, viewer_id: str, candidate: Optional[dict]) -> None:
+        room_id = self._viewer_rooms.get(viewer_id)
+        pc = self._rooms[room_id].viewers.get(viewer_id) if room_id in self._rooms else None
+        if not pc or not candidate or not candidate.get("candidate"):
+            return
+
+        candidate_str = candidate["candidate"]
+        if candidate_str.startswith("candidate:"):
+            candidate_str = candidate_str[10:]
+        try:
+            ice = candidate_from_sdp(candidate_str)
+            ice.sdpMid = candidate.get("sdpMid")
+            ice.sdpMLineIndex = int(candidate.get("sdpMLineIndex") or 0)
+            await pc.addIceCandidate(ice)
+        except Exception as e:
+            self._logger.error(f"Relay could not add ICE candidate from {viewer_id}: {e}")
+
+    async def _drop_viewer(self, viewer_id: str) -> Optional[RelayRoom]:
+        room_id = self._viewer_rooms.pop(viewer_id, None)
+        room = self._rooms.get(room_id) if room_id else None
+        if not room:
+            return None
+
+        pc = room.viewers.pop(viewer_id, None)
+        if pc:
+            await pc.close()
+            self._logger.info(f"Relay dropped viewer {viewer_id} from room {room_id}")
+        return room
+
+    async def remove_viewer(self, viewer_id: str) -> None:
+        room = await self._drop_viewer(viewer_id)
+        if room and not room.viewers:
+            # Nobody is watching anymore, release the broadcaster uplink
+            await self._close_upstream(room)
+
+    async def _close_upstream(self, room: RelayRoom) -> None:
+        if room.upstream_answer and not room.upstream_answer.done():
+            room.upstream_answer.cancel()
+        upstream, room.upstream, room.track = room.upstream, None, None
+        if upstream:
+            try:
+                await self._recording.stop(room.room_id)
+            except Exception as e:
+                self._logger.error(f"Could not stop recording room {room.room_id}: {e}", exc_info=True)
+            await upstream.close()
+            if self._send:
+                await self._send(room.broadcaster_id, {"type": "client-left", "clientId": room.relay_id})
+
+    async def close_room(self, room_id: str) -> None:
+        room = self._rooms.pop(room_id, None)
+        if not room:
+            return
+
+        for viewer_id, pc in list(room.viewers.items()):
+            self._viewer_rooms.pop(viewer_id, None)
+            await pc.close()
+        room.viewers.clear()
+        await self._close_upstream(room)
+        self._logger.info(f"Relay for room {room_id} closed")
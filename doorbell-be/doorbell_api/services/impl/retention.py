@@ -0,0 +1,158 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import own_session, transactional
+from doorbell_api.models import Notification
+from doorbell_api.repositories import ICaptureRepository, ILiveSessionRepository, INotificationRepository
+from doorbell_api.services import ICaptureService, ICaptureStorageService, IQueryCache, IRetentionService
+
+STARTUP_DELAY_SECONDS = 60
+REPORT_KEYS = (
+    "downsampled_captures", "expired_captures", "expired_notifications", "blobs_removed", "bytes_reclaimed"
+)
+
+
+class RetentionService(IRetentionService):
+    """Thins out and then deletes old captures and notifications on a schedule, one bounded batch per transaction."""
+
+    @inject
+    def __init__(
+            self,
+            capture_service: ICaptureService = Provide['capture_service'],
+            capture_storage_service: ICaptureStorageService = Provide['capture_storage_service'],
+            capture_repo: ICaptureRepository = Provide['capture_repo'],
+            notification_repo: INotificationRepository = Provide['notification_repo'],
+            live_session_repo: ILiveSessionRepository = Provide['live_session_repo'],
+            query_cache: IQueryCache = Provide['query_cache'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._capture_service = capture_service
+        self._capture_storage_service = capture_storage_service
+        self._capture_repo = capture_repo
+        self._notification_repo = notification_repo
+        self._live_session_repo = live_session_repo
+        self._query_cache = query_cache
+        self._logger = getLogger(__name__)
+
+        retention_config = config.get('retention', {}) or {}
+        self._enabled = str(retention_config.get('enabled', 'false')).lower() in ('1', 'true', 'yes')
+        # 0 turns a stage off
+        self._full_days = int(retention_config.get('full_days') or 0)
+        self._keep_days = int(retention_config.get('keep_days') or 0)
+        self._interval_seconds = max(1, int(retention_config.get('interval_minutes') or 60)) * 60
+        self._batch_size = max(1, int(retention_config.get('batch_size') or 500))
+
+        self._task: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self._runs = 0
+        self._failed_runs = 0
+        self._totals = {key: 0 for key in REPORT_KEYS}
+        self._last_report: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        if not self._enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever(), name="retention")
+        self._logger.info(
+            f"Retention keeps captures at full resolution for {self._full_days or 'unlimited'} day(s) "
+            f"and deletes them after {self._keep_days or 'unlimited'} day(s)"
+        )
+
+    async def _run_forever(self) -> None:
+        # Leaves startup alone, then runs on every interval
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._failed_runs += 1
+                self._logger.error(f"Retention run failed: {e}", exc_info=True)
+            await asyncio.sleep(self._interval_seconds)
+
+    async def run_once(self) -> Dict[str, Any]:
+        async with self._running:
+            started = time.perf_counter()
+            now = datetime.now()
+            report = {key: 0 for key in REPORT_KEYS}
+
+            if self._full_days > 0:
+                # Past the full window a notification keeps its best frame and that frame's thumbnails
+                report["downsampled_captures"] = await self._delete_captures(
+                    self._capture_repo.find_downsample_candidates, now - timedelta(days=self._full_days)
+                )
+            if self._keep_days > 0:
+                before = now - timedelta(days=self._keep_days)
+                report["expired_captures"] = await self._delete_captures(self._capture_repo.find_expired_ids, before)
+                report["expired_notifications"] = await self._delete_notifications(before)
+
+            # Files are removed after the rows committed, by the collector user deletes go through as well
+            async with own_session():
+                blobs_removed, bytes_reclaimed = await self._capture_storage_service.collect_garbage()
+            report["blobs_removed"] = blobs_removed
+            report["bytes_reclaimed"] = bytes_reclaimed
+
+            self._runs += 1
+            for key in REPORT_KEYS:
+                self._totals[key] += report[key]
+            report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            report["finished_at"] = datetime.now().isoformat()
+            self._last_report = report
+            self._logger.info(f"Retention run finished: {report}")
+            return report
+
+    async def _delete_captures(self, find: Callable[[datetime, int], Awaitable[List[int]]], before: datetime) -> int:
+        deleted = 0
+        while True:
+            async with own_session():
+                capture_ids = await self._find_ids(find, before)
+            if not capture_ids:
+                return deleted
+            async with own_session():
+                deleted += await self._capture_service.delete_releasing_blobs(capture_ids)
+            if len(capture_ids) < self._batch_size:
+                return deleted
+            # Short transactions with a yield in between keep ingest from waiting on locks
+            await asyncio.sleep(0)
+
+    async def _delete_notifications(self, before: datetime) -> int:
+        deleted = 0
+        while True:
+            async with own_session():
+                batch = await self._delete_notification_batch(before)
+            deleted += batch
+            if batch:
+                # Captures go through the capture service, which invalidates on its own
+                await self._query_cache.invalidate(Notification.__tablename__)
+            if batch < self._batch_size:
+                return deleted
+            await asyncio.sleep(0)
+
+    @transactional
+    async def _find_ids(self, find: Callable[[datetime, int], Awaitable[List[int]]], before: datetime) -> List[int]:
+        return await find(before, self._batch_size)
+
+    @transactional
+    async def _delete_notification_batch(self, before: datetime) -> int:
+        notification_ids = await self._notification_repo.find_expired_ids(before, self._batch_size)
+        if not notification_ids:
+            return 0
+        # Recordings outlive the notification they were linked to
+        await self._live_session_repo.unlink_notifications(notification_ids)
+        return await self._notification_repo.delete_models_by_ids(notification_ids)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._enabled,
+            "full_days": self._full_days,
+            "keep_days": self._keep_days,
+            "runs": self._runs,
+            "failed_runs": self._failed_runs,
+            "running": self._running.locked(),
+            "totals": dict(self._totals),
+            "last_run": self._last_report
+        }
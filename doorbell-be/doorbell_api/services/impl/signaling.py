@@ -1,17 +1,21 @@
 from typing import Dict, Set, List, Optional
 from fastapi import WebSocket
+from dependency_injector.wiring import Provide, inject
 import logging
 import json
 
 from doorbell_api.dtos import ClientInfo, RoomInfo
-from doorbell_api.services import IWebRTCSignalingService
+from doorbell_api.services import IWebRTCSignalingService, IWebRTCRelayService
 
 
 class WebRTCSignalingService(IWebRTCSignalingService):
-    def __init__(self):
+    @inject
+    def __init__(self, relay_service: IWebRTCRelayService = Provide['relay_service']):
         self._clients: Dict[str, ClientInfo] = {}
         self._rooms: Dict[str, RoomInfo] = {}
         self._logger = logging.getLogger(__name__)
+        self._relay = relay_service
+        self._relay.set_sender(self._send_to_client)
 
     async def register_client(self, connection_id: str, websocket: WebSocket, user_id_from_token: str) -> None:
         if connection_id in self._clients:
@@ -46,6 +50,11 @@ class WebRTCSignalingService(IWebRTCSignalingService):
         if not message_type:
             return {"type": "error", "message": "Invalid message: missing type"}
 
+        if message_type in ["offer", "answer", "ice-candidate"] and self._relay.enabled:
+            relay_response = await self._handle_relay_message(sender_connection_id, message)
+            if relay_response is not False:
+                return relay_response
+
         if message_type in ["offer", "answer", "ice-candidate"]:
             target_specifier = message.get("target")
             room_id_context = message.get("roomId")
@@ -119,6 +128,69 @@ class WebRTCSignalingService(IWebRTCSignalingService):
             self._logger.warning(f"Unknown message type '{message_type}' from conn {sender_connection_id}")
             return {"type": "error", "message": f"Unknown message type: {message_type}"}
 
+    def _find_broadcaster_room(self, viewer_id: str, message: dict) -> Optional[tuple]:
+        target = message.get("target")
+        room_ids = [message["roomId"]] if message.get("roomId") else list(self._clients[viewer_id].rooms)
+
+        for room_id in room_ids:
+            room = self._rooms.get(room_id)
+            if not room or len(room.broadcasters) != 1:
+                continue
+            broadcaster_id = next(iter(room.broadcasters))
+            if target in ("broadcaster", broadcaster_id):
+                return room_id, broadcaster_id
+        return None
+
+    async def _handle_relay_message(self, sender_connection_id: str, message: dict):
+        """Returns False when the message is not for the relay and should be forwarded as usual."""
+        message_type = message.get("type")
+        target = message.get("target")
+
+        if message_type == "answer" and self._relay.is_relay_id(target):
+            await self._relay.handle_upstream_answer(target, message.get("sdp"))
+            return None
+
+        if message_type == "ice-candidate" and self._relay.is_relayed_viewer(sender_connection_id):
+            await self._relay.handle_viewer_ice_candidate(sender_connection_id, message.get("candidate"))
+            return None
+
+        if message_type == "offer":
+            client_info = self._clients[sender_connection_id]
+            located = self._find_broadcaster_room(sender_connection_id, message)
+            if not located:
+                return False
+            room_id, broadcaster_id = located
+            if client_info.role.get(room_id) == "broadcaster":
+                return False
+
+            answer_sdp = await self._relay.handle_viewer_offer(
+                room_id, broadcaster_id, sender_connection_id, message.get("sdp")
+            )
+            if not answer_sdp:
+                return {"type": "error", "message": f"Relay could not reach the broadcaster in room {room_id}"}
+
+            self._logger.info(f"Relay answered offer from conn {sender_connection_id} in room {room_id}")
+            return {
+                "type": "answer",
+                "clientId": self._relay.get_relay_id(room_id),
+                "target": sender_connection_id,
+                "roomId": room_id,
+                "sdp": answer_sdp
+            }
+
+        return False
+
+    async def _send_to_client(self, connection_id: str, message: dict) -> bool:
+        client_info = self._clients.get(connection_id)
+        if not client_info:
+            return False
+        try:
+            await client_info.websocket.send_text(json.dumps(message))
+            return True
+        except Exception as e:
+            self._logger.error(f"Error sending '{message.get('type')}' to conn {connection_id}: {e}")
+            return False
+
     async def join_room(self, connection_id: str, room_id: str, role: str = "viewer") -> dict:
         if connection_id not in self._clients:
             return {"type": "error", "message": "Client (connection) not registered"}
@@ -180,6 +252,12 @@ class WebRTCSignalingService(IWebRTCSignalingService):
         if role_left == "broadcaster": room.broadcasters.discard(connection_id)
         if role_left == "viewer": room.viewers.discard(connection_id)
 
+        if self._relay.enabled:
+            if role_left == "broadcaster":
+                await self._relay.close_room(room_id)
+            else:
+                await self._relay.remove_viewer(connection_id)
+
         self._logger.info(
             f"Connection {connection_id} (User: {client_info.user_id}, Role: {role_left}) left room {room_id}")
 
@@ -0,0 +1,87 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Dict, List, Optional
+
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.configs.db import DB
+from doorbell_api.helpers import TTLCache
+from doorbell_api.repositories.impl.device import FCM_TOKENS_CHANGED_CHANNEL
+from doorbell_api.services import IFCMTokenCache
+
+LISTENER_RETRY_SECONDS = 5
+
+
+class FCMTokenCache(IFCMTokenCache):
+    """FCM tokens per user, other workers announce changes through Postgres NOTIFY on commit."""
+
+    @inject
+    def __init__(self, db: DB = Provide['db'], config: dict[str, Any] = Provide['config']):
+        self._db = db
+        self._logger = getLogger(__name__)
+
+        cache_config = (config.get('fcm', {}) or {}).get('token_cache', {}) or {}
+        self._tokens: TTLCache[int, List[str]] = TTLCache(
+            int(cache_config.get('size') or 1024), int(cache_config.get('ttl_seconds') or 300)
+        )
+        self._invalidations = 0
+        self._remote_invalidations = 0
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_checked = False
+
+    def get(self, user_id: int) -> Optional[List[str]]:
+        self._ensure_listener()
+        fcm_tokens = self._tokens.get(user_id)
+        return list(fcm_tokens) if fcm_tokens is not None else None
+
+    def set(self, user_id: int, fcm_tokens: List[str]) -> None:
+        self._tokens.set(user_id, list(fcm_tokens))
+
+    def invalidate(self, user_id: int) -> None:
+        self._invalidations += 1
+        self._tokens.pop(user_id)
+
+    def _ensure_listener(self) -> None:
+        if self._listener_checked:
+            return
+        self._listener_checked = True
+        bind = self._db.session_factory.kw.get('bind')
+        # Without LISTEN/NOTIFY the TTL alone bounds how stale other workers can be
+        if bind is not None and bind.dialect.driver == 'asyncpg':
+            self._listener = asyncio.create_task(self._listen(bind), name="fcm-token-cache-listener")
+
+    async def _listen(self, engine) -> None:
+        while True:
+            try:
+                async with engine.connect() as connection:
+                    raw_connection = await connection.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+                    await driver_connection.add_listener(FCM_TOKENS_CHANGED_CHANNEL, self._on_notify)
+                    # Entries cached before the listener existed may have missed a change
+                    self._tokens.clear()
+                    self._logger.info(f"Listening on {FCM_TOKENS_CHANGED_CHANNEL} for FCM token changes")
+                    while not driver_connection.is_closed():
+                        await asyncio.sleep(LISTENER_RETRY_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.warning(f"FCM token cache listener failed, retrying: {e}")
+            self._tokens.clear()
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        try:
+            user_id = int(payload)
+        except ValueError:
+            self._logger.warning(f"Ignoring malformed FCM token change notification: {payload!r}")
+            return
+        self._remote_invalidations += 1
+        self._tokens.pop(user_id)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._tokens.stats(),
+            "invalidations": self._invalidations,
+            "remote_invalidations": self._remote_invalidations,
+            "cross_worker": self._listener is not None and not self._listener.done()
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import io
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from dependency_injector.wiring import Provide, inject
+from PIL import features
+
+from doorbell_api.helpers import BoundedExecutor, DiskLRUCache, ImageHelper
+from doorbell_api.services import ICaptureArchiveService, IImageTranscodeService, IObjectStorage
+
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+FALLBACK_FORMAT = "jpeg"
+DEFAULT_QUALITY = 75
+QUALITY_STEP = 5
+
+# (local source path or storage key, format, width, quality, cache key)
+Variant = Tuple[Union[Path, str], str, int, int, str]
+
+
+class ImageTranscodeService(IImageTranscodeService):
+    """Converts captures to the size and format a client asks for on first request, later ones come from disk."""
+
+    @inject
+    def __init__(
+            self,
+            image_cache: DiskLRUCache = Provide['image_cache'],
+            transcode_executor: BoundedExecutor = Provide['transcode_executor'],
+            object_storage: IObjectStorage = Provide['object_storage'],
+            capture_archive_service: ICaptureArchiveService = Provide['capture_archive_service'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._image_cache = image_cache
+        self._executor = transcode_executor
+        self._storage = object_storage
+        self._archive = capture_archive_service
+        self._logger = getLogger(__name__)
+
+        image_config = config.get('image', {}) or {}
+        # Widths are rounded up to one of these so arbitrary w= values cannot fill the cache
+        self._widths = sorted(int(w) for w in str(image_config.get('widths') or "160,320,480,720,1280").split(','))
+        # Preferred first, AVIF only when this Pillow build can write it
+        self._formats: List[str] = [f for f in ("avif", "webp", "jpeg") if f != "avif" or features.check("avif")]
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._transcoded = 0
+        self._collapsed = 0
+
+    async def _source(self, capture_path: str) -> Tuple[Union[Path, str], str]:
+        source = self._storage.local_path(capture_path)
+        if source is None:
+            # Objects in a remote store are never rewritten in place, their key alone identifies the content
+            return capture_path, capture_path
+        if not source.is_file():
+            # Archived, read out of the archive like a remote object, its members never change either
+            if await self._archive.locate(capture_path) is None:
+                raise FileNotFoundError(capture_path)
+            return capture_path, capture_path
+        # The source's size and mtime are part of the key, a replaced capture never matches an old ETag
+        stat = source.stat()
+        return source, f"{capture_path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _choose_format(self, accept: Optional[str]) -> str:
+        accepted = {}
+        for entry in (accept or "").split(','):
+            media_type, _, params = entry.strip().partition(';')
+            weight = 1.0
+            for param in params.split(';'):
+                name, _, value = param.strip().partition('=')
+                if name == 'q':
+                    try:
+                        weight = float(value)
+                    except ValueError:
+                        weight = 0.0
+            accepted[media_type.strip().lower()] = weight
+
+        for image_format in self._formats:
+            if accepted.get(MEDIA_TYPES[image_format], 0) > 0:
+                return image_format
+        # Wildcards and clients that send no Accept get the format every decoder has
+        return FALLBACK_FORMAT
+
+    async def _resolve(self, capture_path: str, accept: Optional[str], width: Optional[int],
+                       quality: Optional[int]) -> Variant:
+        source, source_key = await self._source(capture_path)
+        image_format = self._choose_format(accept)
+        width = next((w for w in self._widths if w >= (width or self._widths[-1])), self._widths[-1])
+        quality = min(100, max(QUALITY_STEP, round((quality or DEFAULT_QUALITY) / QUALITY_STEP) * QUALITY_STEP))
+
+        key_source = f"{source_key}|{image_format}|{width}|{quality}"
+        key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+        return source, image_format, width, quality, key
+
+    async def negotiate(self, capture_path: str, accept: Optional[str], width: Optional[int],
+                        quality: Optional[int]) -> Tuple[str, str]:
+        _, image_format, _, _, key = await self._resolve(capture_path, accept, width, quality)
+        return key, MEDIA_TYPES[image_format]
+
+    async def get_variant(self, capture_path: str, accept: Optional[str], width: Optional[int],
+                          quality: Optional[int]) -> Tuple[Path, str, str]:
+        variant = await self._resolve(capture_path, accept, width, quality)
+        _, image_format, _, _, key = variant
+        media_type = MEDIA_TYPES[image_format]
+
+        cached = self._image_cache.get(key)
+        if cached is not None:
+            return cached, key, media_type
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Someone is already converting this exact variant, share the result
+            self._collapsed += 1
+        else:
+            task = asyncio.create_task(self._transcode(variant))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a client that disconnects does not cancel the conversion for the others
+        return await asyncio.shield(task), key, media_type
+
+    async def _transcode(self, variant: Variant) -> Path:
+        source, image_format, width, quality, key = variant
+        if not isinstance(source, Path):
+            source = io.BytesIO(await self._archive.read(source))
+        temp_path = self._image_cache.temp_path(key)
+        try:
+            await self._executor.run(ImageHelper.transcode, source, temp_path, image_format, width, quality)
+            path = await asyncio.to_thread(self._image_cache.commit, key, temp_path)
+        except BaseException:
+            self._image_cache.discard(temp_path)
+            raise
+        self._transcoded += 1
+        self._logger.debug(f"Transcoded {variant[0]} to {image_format} {width}px q{quality}")
+        return path
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._image_cache.stats(),
+            "formats": self._formats,
+            "transcoded": self._transcoded,
+            "collapsed": self._collapsed,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,337 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import aclosing
+from logging import getLogger
+from pathlib import Path
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Tuple
+
+import aiofiles
+from dependency_injector.wiring import Provide, inject
+
+from doorbell_api.helpers import DiskLRUCache, MetricsHelper, TTLCache
+from doorbell_api.services import ICaptureService, IVideoJobService
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+METRIC_SAMPLES = 512
+VIDEO_CHUNK_SIZE = 64 * 1024
+
+
+class VideoJob:
+    """One ffmpeg encode, every request for the same video reads the chunks it produces from the start."""
+
+    def __init__(self, job_id: str, paths: list[str], background: bool, cached_path: Path):
+        self.id = job_id
+        self.paths = paths
+        self.background = background
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.subscribers = 0
+        self.frames_done = 0
+        self.frames_total = 0
+        self.enqueued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Only chunks some reader still needs stay in memory, the rest is read back from the file being written
+        self.spool: Optional[Path] = None
+        self._cached_path = cached_path
+        self._chunks: Deque[bytes] = deque()
+        self._first = 0
+        self._size = 0
+        self._positions: Dict[object, int] = {}
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def set_progress(self, frames_done: int, frames_total: int) -> None:
+        self.frames_done = frames_done
+        self.frames_total = frames_total
+
+    def set_spool(self, path: Path) -> None:
+        self.spool = path
+
+    async def append(self, chunk: bytes) -> None:
+        async with self._changed:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            self._trim()
+            self._changed.notify_all()
+
+    async def finish(self, state: str, error: Optional[str] = None) -> None:
+        async with self._changed:
+            self.state = state
+            self.error = error
+            self._changed.notify_all()
+
+    def read(self) -> AsyncGenerator[bytes, None]:
+        # Counted from here, not from the first read, so chunks stay until this reader had them too
+        reader = object()
+        self._positions[reader] = 0
+        return self._read(reader)
+
+    async def _read(self, reader: object) -> AsyncGenerator[bytes, None]:
+        position = 0
+        try:
+            while True:
+                if position < self._first:
+                    # Joined after the start was dropped from memory
+                    async for chunk in self._replay(position, self._first):
+                        yield chunk
+                        position += len(chunk)
+                        self._positions[reader] = position
+                    continue
+                async with self._changed:
+                    await self._changed.wait_for(lambda: position < self._size or self.finished)
+                    chunks = self._held_from(position)
+                for chunk in chunks:
+                    yield chunk
+                    position += len(chunk)
+                    self._positions[reader] = position
+                self._trim()
+                if not chunks and self.finished:
+                    if self.state != DONE:
+                        raise RuntimeError(f"Video job {self.id} {self.state}: {self.error or 'no output'}")
+                    return
+        finally:
+            del self._positions[reader]
+            self._trim()
+
+    def _held_from(self, position: int) -> List[bytes]:
+        offset = self._first
+        for index, chunk in enumerate(self._chunks):
+            if offset >= position:
+                return list(itertools.islice(self._chunks, index, None))
+            offset += len(chunk)
+        return []
+
+    def _trim(self) -> None:
+        keep_from = min(self._positions.values(), default=self._size)
+        while self._chunks and self._first + len(self._chunks[0]) <= keep_from:
+            self._first += len(self._chunks.popleft())
+
+    async def _replay(self, start: int, end: int) -> AsyncGenerator[bytes, None]:
+        try:
+            video_file = await aiofiles.open(self.spool, 'rb') if self.spool else None
+        except FileNotFoundError:
+            video_file = None
+        if video_file is None:
+            try:
+                # Renamed into the cache once the encode completed
+                video_file = await aiofiles.open(self._cached_path, 'rb')
+            except FileNotFoundError:
+                raise RuntimeError(f"Video job {self.id} {self.state}: its output is gone") from None
+        try:
+            await video_file.seek(start)
+            while start < end:
+                chunk = await video_file.read(min(VIDEO_CHUNK_SIZE, end - start))
+                if not chunk:
+                    raise RuntimeError(f"Video job {self.id} {self.state}: its output is shorter than expected")
+                start += len(chunk)
+                yield chunk
+        finally:
+            await video_file.close()
+
+    def to_dict(self, queue_position: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "progress": round(self.frames_done / self.frames_total, 3) if self.frames_total else 0.0,
+            "frames_done": self.frames_done,
+            "frames_total": self.frames_total,
+            "queue_position": queue_position,
+            "subscribers": self.subscribers,
+            "background": self.background,
+            "error": self.error
+        }
+
+
+class VideoJobService(IVideoJobService):
+    """Bounded pool of ffmpeg encodes, requests for the same frames share a job and it stops once nobody reads it."""
+
+    @inject
+    def __init__(
+            self,
+            capture_service: ICaptureService = Provide['capture_service'],
+            video_cache: DiskLRUCache = Provide['video_cache'],
+            config: dict[str, Any] = Provide['config']
+    ):
+        self._capture_service = capture_service
+        self._video_cache = video_cache
+        self._logger = getLogger(__name__)
+
+        video_config = config.get('video', {}) or {}
+        self._workers = max(1, int(video_config.get('workers') or 2))
+        self._queue_size = max(1, int(video_config.get('queue_size') or 16))
+
+        self._jobs: Dict[str, VideoJob] = {}
+        self._finished: TTLCache[str, Dict[str, Any]] = TTLCache(256, 300)
+        # Kept past the job so the status route can still check who may see a finished video
+        self._paths: TTLCache[str, List[str]] = TTLCache(1024, 3600)
+        # Requests somebody is waiting on always go before pregenerated videos
+        self._interactive: Deque[VideoJob] = deque()
+        self._background: Deque[VideoJob] = deque()
+        self._available = asyncio.Semaphore(0)
+        self._tasks: List[asyncio.Task] = []
+
+        self._counts = {DONE: 0, FAILED: 0, CANCELLED: 0}
+        self._deduplicated = 0
+        self._rejected = 0
+        self._wait_ms: Deque[float] = deque(maxlen=METRIC_SAMPLES)
+        self._encode_ms: Deque[float] = deque(maxlen=METRIC_SAMPLES)
+
+    async def submit(self, paths: list[str], background: bool = False) -> str:
+        job_id = await self._capture_service.get_video_key(paths)
+        self._paths.set(job_id, paths)
+        job = self._jobs.get(job_id)
+        if job is not None:
+            self._deduplicated += 1
+            if job.background and not background and job.state == QUEUED:
+                self._background.remove(job)
+                self._interactive.append(job)
+            job.background = job.background and background
+            return job_id
+        if self._video_cache.contains(job_id):
+            return job_id
+
+        if self._count(QUEUED) >= self._queue_size:
+            self._rejected += 1
+            raise asyncio.QueueFull(f"{self._queue_size} videos are already waiting for an encoder")
+
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_worker(), name=f"video-worker-{i}") for i in range(self._workers)]
+
+        job = VideoJob(job_id, paths, background, self._video_cache.path_for(job_id))
+        self._jobs[job_id] = job
+        (self._background if background else self._interactive).append(job)
+        self._available.release()
+        return job_id
+
+    async def open_stream(self, paths: list[str]) -> Tuple[str, AsyncGenerator[bytes, None]]:
+        job_id = await self.submit(paths)
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Already cached, reading the file needs no encoder slot
+            return job_id, self._capture_service.generate_video(paths)
+        job.subscribers += 1
+        return job_id, self._subscribe(job, job.read())
+
+    async def _subscribe(self, job: VideoJob, reader: AsyncGenerator[bytes, None]) -> AsyncGenerator[bytes, None]:
+        try:
+            async with aclosing(reader) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            # Reached when the client disconnects too, the encode is only worth finishing for someone
+            job.subscribers -= 1
+            if job.subscribers == 0 and not job.background and not job.finished:
+                await self._cancel(job)
+
+    async def _cancel(self, job: VideoJob) -> None:
+        self._logger.info(f"Cancelling video job {job.id}, no client is waiting for it anymore")
+        if job.task is not None:
+            job.task.cancel()
+            await asyncio.wait({job.task})
+        else:
+            # Still queued, the worker that picks it up skips it
+            await self._complete(job, CANCELLED)
+
+    async def wait(self, job_id: str) -> Optional[str]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return DONE if self._video_cache.contains(job_id) else None
+        # Counts as a reader, so a client that shares the job and leaves does not cancel it
+        job.subscribers += 1
+        try:
+            async with aclosing(self._subscribe(job, job.read())) as chunks:
+                async for _ in chunks:
+                    pass
+        except RuntimeError:
+            pass
+        return job.state
+
+    def get_paths(self, job_id: str) -> Optional[List[str]]:
+        job = self._jobs.get(job_id)
+        return job.paths if job is not None else self._paths.get(job_id)
+
+    def get_video_path(self, job_id: str) -> Optional[Path]:
+        return self._video_cache.path_for(job_id) if self._video_cache.contains(job_id) else None
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(self._queue_position(job))
+        finished = self._finished.get(job_id)
+        if finished is not None and finished["state"] != DONE:
+            return finished
+        if self._video_cache.contains(job_id):
+            return {"id": job_id, "state": DONE, "progress": 1.0}
+        return None
+
+    def _queue_position(self, job: VideoJob) -> Optional[int]:
+        if job.state != QUEUED:
+            return None
+        waiting = [queued for lane in (self._interactive, self._background) for queued in lane if not queued.finished]
+        return waiting.index(job)
+
+    def _count(self, state: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.state == state)
+
+    def _take(self) -> VideoJob:
+        for lane in (self._interactive, self._background):
+            if lane:
+                return lane.popleft()
+        raise RuntimeError("Video worker woke up without queued jobs")
+
+    async def _run_worker(self) -> None:
+        while True:
+            await self._available.acquire()
+            job = self._take()
+            if job.finished:
+                continue
+            job.state = RUNNING
+            job.started_at = time.perf_counter()
+            self._wait_ms.append((job.started_at - job.enqueued_at) * 1000)
+            job.task = asyncio.create_task(self._encode(job), name=f"video-job-{job.id[:12]}")
+            # Waiting instead of awaiting keeps a cancelled job from cancelling the worker with it
+            await asyncio.wait({job.task})
+
+    async def _encode(self, job: VideoJob) -> None:
+        try:
+            async with aclosing(self._capture_service.generate_video(job.paths, job.set_progress, job.set_spool)) as video:
+                async for chunk in video:
+                    await job.append(chunk)
+            self._encode_ms.append((time.perf_counter() - job.started_at) * 1000)
+            await self._complete(job, DONE)
+        except asyncio.CancelledError:
+            await self._complete(job, CANCELLED)
+        except Exception as e:
+            self._logger.error(f"Video job {job.id} failed: {e}", exc_info=True)
+            await self._complete(job, FAILED, str(e))
+
+    async def _complete(self, job: VideoJob, state: str, error: Optional[str] = None) -> None:
+        await job.finish(state, error)
+        self._counts[state] += 1
+        if self._jobs.get(job.id) is job:
+            del self._jobs[job.id]
+        self._finished.set(job.id, job.to_dict())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self._workers,
+            "running": self._count(RUNNING),
+            "queued": self._count(QUEUED),
+            "completed": self._counts[DONE],
+            "failed": self._counts[FAILED],
+            "cancelled": self._counts[CANCELLED],
+            "deduplicated": self._deduplicated,
+            "rejected": self._rejected,
+            "queue_wait_ms": MetricsHelper.percentiles(self._wait_ms),
+            "encode_ms": MetricsHelper.percentiles(self._encode_ms)
+        }
@@ -90,6 +90,10 @@ class DoorbellController:
             MessageType.SETTINGS_REQUEST,
             self._handle_settings
         )
+        self._ws_client.register_handler(
+            MessageType.STREAM_STATS_REQUEST,
+            self._handle_stream_stats
+        )
 
     async def _should_suppress_motion_notification(self) -> bool:
         """Check if motion notifications should be suppressed due to active streaming"""
@@ -207,6 +211,28 @@ class DoorbellController:
                 reply_to=message.msg_id
             ))
 
+    async def _handle_stream_stats(self, message: Message):
+        try:
+            payload = message.payload or {}
+            stats = await self.camera_service.get_stream_stats(
+                payload.get('format', 'json'),
+                payload.get('history')
+            )
+
+            await self._ws_client.send_message(Message(
+                msg_type=MessageType.STREAM_STATS,
+                payload=stats,
+                reply_to=message.msg_id
+            ))
+
+        except Exception as e:
+            self._logger.error(f"Error handling stream stats request: {e}", exc_info=True)
+            await self._ws_client.send_message(Message(
+                msg_type=MessageType.ERROR,
+                payload={'error': str(e)},
+                reply_to=message.msg_id
+            ))
+
     def _signal_handler(self, signum, frame):
         self._logger.info(f'Received signal {signum}, initiating shutdown...')
         self._shutdown_event.set()
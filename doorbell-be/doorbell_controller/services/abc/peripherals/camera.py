@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class ICamera(ABC):
@@ -20,6 +20,10 @@ class ICamera(ABC):
     async def get_streaming_status(self) -> Dict[str, Any]:
         pass
 
+    @abstractmethod
+    async def get_stream_stats(self, output_format: str = "json", history_limit: Optional[int] = None) -> Dict[str, Any]:
+        pass
+
     @abstractmethod
     async def set_stop_motion_interval(self, value_seconds: float) -> None:
         pass
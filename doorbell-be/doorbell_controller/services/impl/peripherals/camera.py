@@ -105,7 +105,9 @@ class CameraService(IPeripheral, ICamera):
             self.picam2.configure(video_config)
             self._configured_resolution = (width, height)
             self.picam2.start()
-            self.webrtc_manager = WebRTCManager(self.picam2, self.turn_settings)
+            self.webrtc_manager = WebRTCManager(
+                self.picam2, self.turn_settings, self.webrtc_config.get("ice_candidate_pool_size", 1)
+            )
             self._OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
             self._logger.info(f"Camera setup completed. Captures will be saved to: {self._OUTPUT_DIR.resolve()}")
 
@@ -423,6 +425,13 @@ class CameraService(IPeripheral, ICamera):
             "signaling_ready": False
         }
 
+    async def get_stream_stats(self, output_format: str = "json", history_limit: Optional[int] = None) -> Dict[str, Any]:
+        if not self.webrtc_manager:
+            return {"latest": None, "history": []}
+        if output_format == "prometheus":
+            return {"prometheus": self.webrtc_manager.get_stream_stats_prometheus()}
+        return await self.webrtc_manager.get_stream_stats(history_limit)
+
     async def get_stop_motion_interval(self) -> float:
         return self._stop_motion_interval_seconds
 
@@ -3,15 +3,18 @@ from typing import Dict, Any, Optional
 
 from .peer_connection_manager import PeerConnectionManager
 from .signaling_client import SignalingClient
+from .stats import StreamStatsCollector
 
 logger = logging.getLogger(__name__)
 
 
 class WebRTCManager:
-    def __init__(self, picam2, turn_config: Optional[Dict[str, Any]] = None):
+    def __init__(self, picam2, turn_config: Optional[Dict[str, Any]] = None, ice_pool_size: int = 1):
         self.picam2 = picam2
+        self.ice_pool_size = ice_pool_size
         self.peer_manager: Optional[PeerConnectionManager] = None
         self.signaling_client: Optional[SignalingClient] = None
+        self.stats_collector: Optional[StreamStatsCollector] = None
         self.turn_config = turn_config if turn_config else {}
 
     async def start_streaming(self, signaling_server_url: str, room_id: str, auth_token: str) -> bool:
@@ -23,11 +26,15 @@ class WebRTCManager:
                 return True
 
             if not self.peer_manager:
-                self.peer_manager = PeerConnectionManager(self.picam2, self.turn_config)
+                self.peer_manager = PeerConnectionManager(self.picam2, self.turn_config, self.ice_pool_size)
 
             if not self.signaling_client:
                 self.signaling_client = SignalingClient(self.peer_manager, auth_token)
 
+            if not self.stats_collector:
+                self.stats_collector = StreamStatsCollector(self.peer_manager)
+            self.stats_collector.start()
+
             success = await self.signaling_client.connect(signaling_server_url, room_id)
             if success:
                 logger.info(f"WebRTC signaling client connected for room {room_id}.")
@@ -60,6 +67,10 @@ class WebRTCManager:
                 logger.info("No active signaling client to stop.")
 
 
+            if self.stats_collector:
+                await self.stats_collector.stop()
+                self.stats_collector = None
+
             if self.peer_manager:
                 logger.info("Cleaning up peer manager...")
                 await self.peer_manager.cleanup()
@@ -78,19 +89,35 @@ class WebRTCManager:
         active = self.signaling_client is not None and self.signaling_client.is_running
         connections_count = 0
         client_id = None
+        viewer_timings = {}
 
         if active and self.peer_manager:
             connections_count = self.peer_manager.get_connections_count()
             client_id = self.peer_manager.client_id
+            viewer_timings = self.peer_manager.get_timelines()
 
         status = {
             "active": active,
             "connections": connections_count,
             "client_id": client_id,
             "room_id": self.signaling_client.current_room_id if self.signaling_client else None,
+            "viewer_timings": viewer_timings,
         }
         return status
 
+    async def get_stream_stats(self, history_limit: Optional[int] = None) -> Dict[str, Any]:
+        if not self.stats_collector:
+            return {"latest": None, "history": []}
+        return {
+            "latest": self.stats_collector.latest(),
+            "history": self.stats_collector.history(history_limit),
+        }
+
+    def get_stream_stats_prometheus(self) -> str:
+        if not self.stats_collector:
+            return ""
+        return self.stats_collector.to_prometheus()
+
 __all__ = [
     "WebRTCManager"
 ]
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os
-from typing import Any, Dict, Optional, Callable, Awaitable, Tuple
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Callable, Awaitable, Tuple, List, Set
 
 from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
 from aiortc.sdp import candidate_from_sdp
 
 from .stream_track import PiCameraTrack  # type: ignore
+from .timeline import NegotiationTimeline
 
 import time
 import hmac
@@ -14,15 +17,48 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+TURN_CREDENTIAL_TTL_SECONDS = 24 * 3600
+TURN_CREDENTIAL_REFRESH_MARGIN_SECONDS = 3600
+WARM_CONNECTION_MAX_AGE_SECONDS = 300
+MAX_TIMELINES = 20
+MAX_PENDING_CANDIDATES = 64
+NEGOTIATION_TTL_SECONDS = 120
+
+
+class ViewerNegotiation:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.remote_description_set = False
+        self.pending_candidates: List[dict] = []
+        self.touched_at = time.monotonic()
+
 
 class PeerConnectionManager:
-    def __init__(self, picam2, turn_conf: Optional[Dict[str, Any]] = None):
+    def __init__(self, picam2, turn_conf: Optional[Dict[str, Any]] = None, ice_pool_size: int = 1):
         self.picam2 = picam2
         self.peer_connections: Dict[str, RTCPeerConnection] = {}
         self.client_id: Optional[str] = None
         self.on_ice_candidate_callback: Optional[Callable[[str, Any], Awaitable[None]]] = None
 
         _turn_conf = turn_conf if turn_conf else {}
+        self._turn_credential_ttl = int(_turn_conf.get("credential_ttl_seconds", TURN_CREDENTIAL_TTL_SECONDS))
+        self._turn_refresh_margin = int(
+            _turn_conf.get("credential_refresh_margin_seconds", TURN_CREDENTIAL_REFRESH_MARGIN_SECONDS)
+        )
+        # (username base, username, credential, expiry) of the last minted TURN credential
+        self._turn_credential: Optional[Tuple[str, str, str, int]] = None
+        self._rtc_configuration: Optional[RTCConfiguration] = None
+
+        # Peer connections whose ICE candidates were gathered before any viewer asked for them
+        self._ice_pool_size = max(0, int(ice_pool_size))
+        self._warm_pool: List[Tuple[float, RTCPeerConnection]] = []
+        self._prewarm_task: Optional[asyncio.Task] = None
+        # Stale pooled connections close in the background, the loop itself only keeps weak references
+        self._closing: Set[asyncio.Task] = set()
+        self._keyframe_warned = False
+
+        self.timelines: "OrderedDict[str, NegotiationTimeline]" = OrderedDict()
+        self.negotiations: Dict[str, ViewerNegotiation] = {}
 
         self._turn_host = os.getenv('TURN_HOST')
         self._turn_shared_secret = os.getenv('TURN_SECRET')
@@ -33,19 +69,43 @@ class PeerConnectionManager:
             logger.warning("TURN server secret provided but no host. TURN might not work.")
 
     @staticmethod
-    def _create_turn_credential(username_base: str, secret: str) -> Tuple[str, str]:
-        expiry = int(time.time()) + 24 * 3600  # 24 hours
+    def _create_turn_credential(username_base: str, secret: str, ttl: int = TURN_CREDENTIAL_TTL_SECONDS) -> Tuple[str, str]:
+        expiry = int(time.time()) + ttl
         username_with_expiry = f"{expiry}:{username_base}"
         hmac_obj = hmac.new(secret.encode('utf-8'), username_with_expiry.encode('utf-8'), hashlib.sha1)
         credential = base64.b64encode(hmac_obj.digest()).decode('utf-8')
         return username_with_expiry, credential
 
+    def _get_turn_credential(self) -> Tuple[str, str]:
+        turn_username_base = self.client_id if self.client_id else "doorbell_broadcaster"
+
+        if self._turn_credential:
+            cached_base, username, credential, expiry = self._turn_credential
+            if cached_base == turn_username_base and expiry - time.time() > self._turn_refresh_margin:
+                return username, credential
+
+        username, credential = self._create_turn_credential(
+            turn_username_base, self._turn_shared_secret, self._turn_credential_ttl
+        )
+        self._turn_credential = (turn_username_base, username, credential, int(time.time()) + self._turn_credential_ttl)
+        self._rtc_configuration = None
+        logger.info(f"Minted TURN credential for {turn_username_base}, valid for {self._turn_credential_ttl}s")
+        return username, credential
+
+    def _get_rtc_configuration(self) -> RTCConfiguration:
+        if self._turn_host and self._turn_shared_secret:
+            # Refreshes the credential (and drops the cached configuration) when close to expiry
+            self._get_turn_credential()
+
+        if self._rtc_configuration is None:
+            self._rtc_configuration = self._create_rtc_configuration()
+        return self._rtc_configuration
+
     def _create_rtc_configuration(self) -> RTCConfiguration:
         ice_servers = []
 
         if self._turn_host and self._turn_shared_secret:
-            turn_username_base = self.client_id if self.client_id else "doorbell_broadcaster"
-            username, credential = self._create_turn_credential(turn_username_base, self._turn_shared_secret)
+            username, credential = self._get_turn_credential()
 
             ice_servers.append(RTCIceServer(
                 f"turns:{self._turn_host}:5349?transport=tcp",
@@ -66,9 +126,101 @@ class PeerConnectionManager:
     def set_on_ice_candidate_callback(self, callback: Callable[[str, Any], Awaitable[None]]):
         self.on_ice_candidate_callback = callback
 
+    def _new_peer_connection(self) -> RTCPeerConnection:
+        pc = RTCPeerConnection(configuration=self._get_rtc_configuration())
+
+        if self.picam2:
+            video_track = PiCameraTrack(self.picam2)
+            pc.addTrack(video_track)
+        else:
+            logger.warning("PiCamera2 not available, cannot add video track.")
+        return pc
+
+    @staticmethod
+    async def _gather_candidates(pc: RTCPeerConnection) -> None:
+        # aiortc gathers once per ICE transport, so a later setLocalDescription reuses these candidates
+        for transceiver in pc.getTransceivers():
+            await transceiver.sender.transport.transport.iceGatherer.gather()
+
+    async def prewarm(self) -> None:
+        if self._ice_pool_size <= 0 or not self.picam2:
+            return
+        if self._prewarm_task and not self._prewarm_task.done():
+            return
+        self._prewarm_task = asyncio.create_task(self._fill_warm_pool(), name="WebRTCPrewarm")
+
+    async def _fill_warm_pool(self) -> None:
+        while len(self._warm_pool) < self._ice_pool_size:
+            pc = self._new_peer_connection()
+            started = time.monotonic()
+            try:
+                await self._gather_candidates(pc)
+            except Exception as e:
+                logger.warning(f"Failed to pre-gather ICE candidates: {e}")
+                await pc.close()
+                return
+            self._warm_pool.append((time.monotonic(), pc))
+            logger.info(f"Pre-warmed peer connection ready in {(time.monotonic() - started) * 1000:.1f} ms")
+
+    def _take_warm_connection(self) -> Optional[RTCPeerConnection]:
+        while self._warm_pool:
+            created_at, pc = self._warm_pool.pop(0)
+            if time.monotonic() - created_at <= WARM_CONNECTION_MAX_AGE_SECONDS and pc.connectionState == "new":
+                return pc
+            closing = asyncio.create_task(pc.close())
+            self._closing.add(closing)
+            closing.add_done_callback(self._closing.discard)
+        return None
+
+    async def _close_warm_pool(self) -> None:
+        if self._prewarm_task and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+            try:
+                await self._prewarm_task
+            except asyncio.CancelledError:
+                pass
+        self._prewarm_task = None
+
+        while self._warm_pool:
+            _, pc = self._warm_pool.pop()
+            await pc.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def start_timeline(self, viewer_id: str) -> NegotiationTimeline:
+        timeline = NegotiationTimeline(viewer_id)
+        timeline.mark("offer")
+        self.timelines.pop(viewer_id, None)
+        self.timelines[viewer_id] = timeline
+        while len(self.timelines) > MAX_TIMELINES:
+            self.timelines.popitem(last=False)
+        return timeline
+
+    def mark_timeline(self, viewer_id: str, stage: str) -> None:
+        timeline = self.timelines.get(viewer_id)
+        if timeline:
+            timeline.mark(stage)
+
+    def get_timelines(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {viewer_id: timeline.as_dict() for viewer_id, timeline in self.timelines.items()}
+
+    def _request_keyframe(self, pc: RTCPeerConnection) -> None:
+        for sender in pc.getSenders():
+            # Same path aiortc takes on an incoming PLI
+            send_keyframe = getattr(sender, "_send_keyframe", None)
+            if send_keyframe:
+                send_keyframe()
+            elif not self._keyframe_warned:
+                self._keyframe_warned = True
+                logger.warning("RTCRtpSender has no _send_keyframe in this aiortc, "
+                               "new viewers wait for the next regular keyframe.")
+
     async def create_peer_connection(self, viewer_id: str) -> RTCPeerConnection:
-        config = self._create_rtc_configuration()
-        pc = RTCPeerConnection(configuration=config)
+        pc = self._take_warm_connection()
+        if pc:
+            logger.info(f"Using pre-warmed PeerConnection for viewer {viewer_id}")
+        else:
+            pc = self._new_peer_connection()
 
         @pc.on("icecandidate")
         async def on_icecandidate(candidate):
@@ -81,58 +233,110 @@ class PeerConnectionManager:
         async def on_connectionstatechange():
             logger.info(f"Connection state for viewer {viewer_id} is {pc.connectionState}")
             if pc.connectionState == "failed":
-                if viewer_id in self.peer_connections:
+                if self.peer_connections.get(viewer_id) is pc:
                     del self.peer_connections[viewer_id]
                     logger.info(f"Removed failed PeerConnection for viewer {viewer_id}")
+                self._drop_negotiation(viewer_id)
                 await pc.close()
             elif pc.connectionState == "closed":
                 logger.info(f"PeerConnection for viewer {viewer_id} closed.")
+                self._drop_negotiation(viewer_id)
             elif pc.connectionState == "connected":
                 logger.info(f"PeerConnection for viewer {viewer_id} connected successfully!")
+                self.mark_timeline(viewer_id, "connected")
+                self._request_keyframe(pc)
 
-        if self.picam2:
-            video_track = PiCameraTrack(self.picam2)
-            pc.addTrack(video_track)
-        else:
-            logger.warning("PiCamera2 not available, cannot add video track.")
+        for sender in pc.getSenders():
+            if isinstance(sender.track, PiCameraTrack):
+                sender.track.on_first_frame = lambda: self.mark_timeline(viewer_id, "first_frame")
 
         self.peer_connections[viewer_id] = pc
         logger.info(f"PeerConnection created for viewer {viewer_id}")
+
+        await self.prewarm()
         return pc
 
+    def _get_negotiation(self, viewer_id: str) -> ViewerNegotiation:
+        self._prune_negotiations()
+        negotiation = self.negotiations.get(viewer_id)
+        if not negotiation:
+            negotiation = ViewerNegotiation()
+            self.negotiations[viewer_id] = negotiation
+        negotiation.touched_at = time.monotonic()
+        return negotiation
+
+    def _drop_negotiation(self, viewer_id: str) -> None:
+        negotiation = self.negotiations.get(viewer_id)
+        # A new offer closes the previous connection while it holds the lock, its negotiation has to stay
+        if negotiation and viewer_id not in self.peer_connections and not negotiation.lock.locked():
+            del self.negotiations[viewer_id]
+
+    def _prune_negotiations(self) -> None:
+        # Viewers that trickled candidates but never sent an offer, or vanished without a client-left
+        cutoff = time.monotonic() - NEGOTIATION_TTL_SECONDS
+        for viewer_id, negotiation in list(self.negotiations.items()):
+            if negotiation.touched_at < cutoff:
+                self._drop_negotiation(viewer_id)
+
     async def handle_offer(self, viewer_id: str, sdp: str) -> Optional[str]:
         logger.info(f"Handling offer from viewer: {viewer_id}")
+        negotiation = self._get_negotiation(viewer_id)
 
-        if viewer_id in self.peer_connections:
-            logger.info(f"Existing PeerConnection found for viewer {viewer_id}, closing it before creating new one.")
-            existing_pc = self.peer_connections.pop(viewer_id)
-            await existing_pc.close()
-
-        pc = await self.create_peer_connection(viewer_id)
+        async with negotiation.lock:
+            negotiation.remote_description_set = False
 
-        try:
-            offer = RTCSessionDescription(sdp=sdp, type="offer")
-            await pc.setRemoteDescription(offer)
-
-            answer = await pc.createAnswer()
-            await pc.setLocalDescription(answer)
-            return pc.localDescription.sdp if pc.localDescription else None
-        except Exception as e:
-            logger.error(f"Error handling offer for {viewer_id}: {e}", exc_info=True)
-            await pc.close()
             if viewer_id in self.peer_connections:
-                del self.peer_connections[viewer_id]
-            return None
+                logger.info(f"Existing PeerConnection found for viewer {viewer_id}, closing it before creating new one.")
+                existing_pc = self.peer_connections.pop(viewer_id)
+                await existing_pc.close()
+
+            self.start_timeline(viewer_id)
+            pc = await self.create_peer_connection(viewer_id)
+
+            try:
+                offer = RTCSessionDescription(sdp=sdp, type="offer")
+                await pc.setRemoteDescription(offer)
+                negotiation.remote_description_set = True
+                await self._flush_pending_candidates(viewer_id, pc, negotiation)
+
+                answer = await pc.createAnswer()
+                await pc.setLocalDescription(answer)
+                self.mark_timeline(viewer_id, "answer")
+                return pc.localDescription.sdp if pc.localDescription else None
+            except Exception as e:
+                logger.error(f"Error handling offer for {viewer_id}: {e}", exc_info=True)
+                await pc.close()
+                if self.peer_connections.get(viewer_id) is pc:
+                    del self.peer_connections[viewer_id]
+                return None
+
+    async def _flush_pending_candidates(self, viewer_id: str, pc: RTCPeerConnection, negotiation: ViewerNegotiation) -> None:
+        pending, negotiation.pending_candidates = negotiation.pending_candidates, []
+        if pending:
+            logger.info(f"Applying {len(pending)} buffered ICE candidates for viewer {viewer_id}")
+        for candidate_data in pending:
+            await self._add_ice_candidate(viewer_id, pc, candidate_data)
 
     async def handle_ice_candidate(self, viewer_id: str, candidate_data: Optional[dict]) -> None:
-        if viewer_id not in self.peer_connections:
-            logger.warning(f"Received ICE candidate for unknown or closed viewer {viewer_id}")
-            return
         if not candidate_data:
             logger.info(f"Received null ICE candidate from viewer {viewer_id}, likely end of candidates.")
             return
 
-        pc = self.peer_connections[viewer_id]
+        negotiation = self._get_negotiation(viewer_id)
+        pc = self.peer_connections.get(viewer_id)
+        if not pc or not negotiation.remote_description_set:
+            # Trickled ahead of the offer or while it is being applied, kept until the remote description is set
+            if len(negotiation.pending_candidates) >= MAX_PENDING_CANDIDATES:
+                logger.warning(f"Pending ICE candidate buffer full for viewer {viewer_id}, dropping oldest.")
+                negotiation.pending_candidates.pop(0)
+            negotiation.pending_candidates.append(candidate_data)
+            logger.debug(f"Buffered ICE candidate from {viewer_id} ({len(negotiation.pending_candidates)} pending)")
+            return
+
+        await self._add_ice_candidate(viewer_id, pc, candidate_data)
+
+    @staticmethod
+    async def _add_ice_candidate(viewer_id: str, pc: RTCPeerConnection, candidate_data: dict) -> None:
         try:
             candidate_str = candidate_data.get("candidate", "")
             sdp_mid = candidate_data.get("sdpMid")
@@ -159,6 +363,7 @@ class PeerConnectionManager:
 
     async def handle_client_left(self, client_id_left: str) -> None:
         logger.info(f"Handling client left: {client_id_left}")
+        self.negotiations.pop(client_id_left, None)
         if client_id_left in self.peer_connections:
             pc = self.peer_connections.pop(client_id_left)
             await pc.close()
@@ -168,6 +373,7 @@ class PeerConnectionManager:
 
     async def cleanup(self) -> None:
         logger.info("Cleaning up all peer connections...")
+        await self._close_warm_pool()
         for viewer_id in list(self.peer_connections.keys()):
             if viewer_id in self.peer_connections:
                 pc = self.peer_connections.pop(viewer_id)
@@ -179,6 +385,7 @@ class PeerConnectionManager:
                 except Exception as e:
                     logger.error(f"Error closing peer connection for {viewer_id} during cleanup: {e}")
         self.peer_connections.clear()
+        self.negotiations.clear()
         logger.info("All peer connections cleaned up.")
 
     def get_connections_count(self) -> int:
@@ -4,12 +4,12 @@ import asyncio
 import websockets  # type: ignore
 
 from typing import Optional, Dict, Any
-from aiortc import RTCSessionDescription
-from aiortc.sdp import candidate_from_sdp
 from .peer_connection_manager import PeerConnectionManager
 
 logger = logging.getLogger(__name__)
 
+VIEWER_QUEUE_IDLE_SECONDS = 120
+
 
 class SignalingClient:
     def __init__(self, peer_manager: PeerConnectionManager, auth_token: str):
@@ -21,6 +21,8 @@ class SignalingClient:
         self.current_signaling_url: Optional[str] = None
         self.current_room_id: Optional[str] = None
         self.current_viewer_id: Optional[str] = None
+        self._viewer_queues: Dict[str, asyncio.Queue] = {}
+        self._viewer_tasks: Dict[str, asyncio.Task] = {}
 
     def _is_websocket_open(self) -> bool:
         return self._ws is not None and getattr(self._ws, 'state', 0) == 1
@@ -53,6 +55,7 @@ class SignalingClient:
                 await self.processing_task
             except asyncio.CancelledError:
                 pass
+        await self._stop_viewer_workers()
         if self._ws and self._is_websocket_open():
             await self._ws.close()
         if self.peer_manager:
@@ -84,6 +87,7 @@ class SignalingClient:
             if reg_data.get("type") == "registered":
                 self.peer_manager.client_id = reg_data.get("clientId")
                 logger.info(f"Registered as: {self.peer_manager.client_id}")
+                await self.peer_manager.prewarm()
 
                 join_msg = {
                     "type": "join",
@@ -104,66 +108,9 @@ class SignalingClient:
                         msg_type = data.get("type")
                         logger.info(f"Message type: {msg_type}, target: {data.get('target')}, from: {data.get('clientId')}")
 
-                        if msg_type == "offer" and (data.get("target") == self.peer_manager.client_id or data.get("target") == "broadcaster"):
-                            logger.info("PROCESSING OFFER!")
-                            viewer_id = data.get("clientId")
-                            self.current_viewer_id = viewer_id
-
-                            if viewer_id in self.peer_manager.peer_connections:
-                                await self.peer_manager.peer_connections[viewer_id].close()
-
-                            logger.info(f"Creating peer connection for {viewer_id}")
-                            self.peer_manager.peer_connections[viewer_id] = await self.peer_manager.create_peer_connection(viewer_id)
-                            pc = self.peer_manager.peer_connections[viewer_id]
-
-                            sdp = data.get("sdp")
-                            if not sdp:
-                                logger.warning("No SDP in offer!")
-                                continue
-
-                            logger.info("Setting remote description and creating answer...")
-                            offer = RTCSessionDescription(sdp=sdp, type="offer")
-                            await pc.setRemoteDescription(offer)
-                            answer = await pc.createAnswer()
-                            await pc.setLocalDescription(answer)
-
-                            answer_msg = {
-                                "type": "answer",
-                                "clientId": self.peer_manager.client_id,
-                                "target": viewer_id,
-                                "sdp": pc.localDescription.sdp
-                            }
-                            logger.info(f"Sending answer: {json.dumps(answer_msg)[:200]}...")
-                            await self._ws.send(json.dumps(answer_msg))
-
-                        elif msg_type == "ice-candidate" and (data.get("target") == self.peer_manager.client_id or data.get("target") == "broadcaster"):
-                            logger.info("PROCESSING ICE CANDIDATE!")
-                            viewer_id = data.get("clientId")
-                            candidate_data = data.get("candidate")
-
-                            if viewer_id in self.peer_manager.peer_connections and candidate_data:
-                                try:
-                                    candidate_str = candidate_data.get("candidate", "")
-                                    if candidate_str.startswith("candidate:"):
-                                        candidate_str = candidate_str[10:]  # EXACT working script logic
-
-                                    ice = candidate_from_sdp(candidate_str)
-                                    ice.sdpMid = candidate_data.get("sdpMid", "")
-                                    ice.sdpMLineIndex = candidate_data.get("sdpMLineIndex", 0)
-                                    await self.peer_manager.peer_connections[viewer_id].addIceCandidate(ice)
-                                    logger.info(f"Added ICE candidate from {viewer_id}")
-                                except Exception as e:
-                                    logger.error(f"Error adding ICE candidate: {e}")
-
-                        elif msg_type == "client-left":
-                            logger.info("PROCESSING CLIENT LEFT!")
-                            departed_id = data.get("clientId")
-                            if departed_id in self.peer_manager.peer_connections:
-                                await self.peer_manager.peer_connections[departed_id].close()
-                                del self.peer_manager.peer_connections[departed_id]
-                                logger.info(f"Closed and removed peer connection for {departed_id}")
-                            else:
-                                logger.info(f"Client {departed_id} left but no peer connection found (already cleaned up)")
+                        is_for_us = data.get("target") in (self.peer_manager.client_id, "broadcaster")
+                        if (msg_type in ("offer", "ice-candidate") and is_for_us) or msg_type == "client-left":
+                            self._dispatch_to_viewer(data.get("clientId"), data)
                         else:
                             logger.info(f"Ignoring message type: {msg_type}")
 
@@ -180,3 +127,78 @@ class SignalingClient:
         finally:
             logger.info("Signaling process ended")
             self.is_running = False
+
+    def _dispatch_to_viewer(self, viewer_id: Optional[str], data: Dict[str, Any]) -> None:
+        if not viewer_id:
+            logger.warning(f"Dropping {data.get('type')} message without clientId")
+            return
+
+        queue = self._viewer_queues.get(viewer_id)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._viewer_queues[viewer_id] = queue
+            self._viewer_tasks[viewer_id] = asyncio.create_task(
+                self._run_viewer_worker(viewer_id, queue), name=f"Signaling-{viewer_id}"
+            )
+        queue.put_nowait(data)
+
+    async def _run_viewer_worker(self, viewer_id: str, queue: asyncio.Queue) -> None:
+        # Messages of one viewer are handled in order, different viewers negotiate concurrently
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=VIEWER_QUEUE_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        break
+                    continue
+
+                try:
+                    if await self._handle_viewer_message(viewer_id, data):
+                        break
+                except Exception as e:
+                    logger.error(f"Error handling {data.get('type')} from {viewer_id}: {e}", exc_info=True)
+        finally:
+            if self._viewer_queues.get(viewer_id) is queue:
+                del self._viewer_queues[viewer_id]
+                self._viewer_tasks.pop(viewer_id, None)
+
+    async def _handle_viewer_message(self, viewer_id: str, data: Dict[str, Any]) -> bool:
+        msg_type = data.get("type")
+
+        if msg_type == "offer":
+            self.current_viewer_id = viewer_id
+            sdp = data.get("sdp")
+            if not sdp:
+                logger.warning(f"No SDP in offer from {viewer_id}!")
+                return False
+
+            answer_sdp = await self.peer_manager.handle_offer(viewer_id, sdp)
+            if not answer_sdp or not self._is_websocket_open():
+                return False
+
+            answer_msg = {
+                "type": "answer",
+                "clientId": self.peer_manager.client_id,
+                "target": viewer_id,
+                "sdp": answer_sdp
+            }
+            logger.info(f"Sending answer: {json.dumps(answer_msg)[:200]}...")
+            await self._ws.send(json.dumps(answer_msg))
+
+        elif msg_type == "ice-candidate":
+            await self.peer_manager.handle_ice_candidate(viewer_id, data.get("candidate"))
+
+        elif msg_type == "client-left":
+            await self.peer_manager.handle_client_left(viewer_id)
+            return True
+
+        return False
+
+    async def _stop_viewer_workers(self) -> None:
+        tasks = list(self._viewer_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._viewer_tasks.clear()
+        self._viewer_queues.clear()
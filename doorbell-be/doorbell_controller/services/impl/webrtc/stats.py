@@ -0,0 +1,202 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from aiortc import RTCPeerConnection, RTCRtpSender
+from aiortc.rtp import RtcpPsfbPacket, RtcpRtpfbPacket, RTCP_PSFB_FIR, RTCP_PSFB_PLI, RTCP_RTPFB_NACK
+
+from .peer_connection_manager import PeerConnectionManager
+from .stream_track import PiCameraTrack  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+STATS_INTERVAL_SECONDS = 5.0
+STATS_HISTORY_SIZE = 120
+
+# Exported as doorbell_webrtc_<name>{viewer="...",...}
+PROMETHEUS_METRICS = {
+    "bitrate_kbps": ("gauge", "Outgoing video bitrate in kbit/s"),
+    "fps_sent": ("gauge", "Frames per second handed to the encoder"),
+    "rtt_ms": ("gauge", "Round trip time reported by the viewer in ms"),
+    "jitter": ("gauge", "Jitter reported by the viewer in RTP timestamp units"),
+    "packets_lost": ("counter", "Packets reported lost by the viewer"),
+    "fraction_lost": ("gauge", "Fraction of packets lost in the last receiver report"),
+    "nack_count": ("counter", "NACK packets received from the viewer"),
+    "pli_count": ("counter", "PLI/FIR keyframe requests received from the viewer"),
+}
+
+
+class SenderFeedbackCounter:
+    """Counts the RTCP feedback aiortc handles internally without exposing it in getStats."""
+
+    def __init__(self, sender: RTCRtpSender):
+        self.nack_count = 0
+        self.pli_count = 0
+        self._handle_rtcp_packet = sender._handle_rtcp_packet
+        sender._handle_rtcp_packet = self._count_and_handle
+
+    async def _count_and_handle(self, packet) -> None:
+        if isinstance(packet, RtcpRtpfbPacket) and packet.fmt == RTCP_RTPFB_NACK:
+            self.nack_count += 1
+        elif isinstance(packet, RtcpPsfbPacket) and packet.fmt in (RTCP_PSFB_FIR, RTCP_PSFB_PLI):
+            self.pli_count += 1
+        await self._handle_rtcp_packet(packet)
+
+
+class StreamStatsCollector:
+    def __init__(
+        self,
+        peer_manager: PeerConnectionManager,
+        interval: float = STATS_INTERVAL_SECONDS,
+        history_size: int = STATS_HISTORY_SIZE
+    ):
+        self.peer_manager = peer_manager
+        self.interval = interval
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._counters: Dict[int, SenderFeedbackCounter] = {}
+        # viewer id -> (monotonic time, bytes sent, frames sent) of the previous sample
+        self._previous: Dict[str, Tuple[float, int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(), name="WebRTCStatsCollector")
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Error collecting WebRTC stats: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def collect(self) -> Dict[str, Any]:
+        viewers = {}
+        active_senders = set()
+        for viewer_id, pc in list(self.peer_manager.peer_connections.items()):
+            if pc.connectionState == "closed":
+                continue
+            active_senders.update(id(sender) for sender in pc.getSenders())
+            viewers[viewer_id] = await self._collect_viewer(viewer_id, pc)
+
+        for sender_id in list(self._counters):
+            if sender_id not in active_senders:
+                del self._counters[sender_id]
+
+        for viewer_id in list(self._previous):
+            if viewer_id not in viewers:
+                del self._previous[viewer_id]
+
+        sample = {"timestamp": time.time(), "viewers": viewers}
+        self._history.append(sample)
+        return sample
+
+    async def _collect_viewer(self, viewer_id: str, pc: RTCPeerConnection) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "connection_state": pc.connectionState,
+            "bytes_sent": 0,
+            "packets_sent": 0,
+            "bitrate_kbps": None,
+            "fps_sent": None,
+            "rtt_ms": None,
+            "jitter": None,
+            "packets_lost": None,
+            "fraction_lost": None,
+            "nack_count": 0,
+            "pli_count": 0,
+            "local_candidate_type": None,
+            "remote_candidate_type": None,
+        }
+        frames_sent = 0
+
+        for sender in pc.getSenders():
+            counter = self._counters.get(id(sender))
+            if counter is None:
+                counter = SenderFeedbackCounter(sender)
+                self._counters[id(sender)] = counter
+            stats["nack_count"] += counter.nack_count
+            stats["pli_count"] += counter.pli_count
+
+            if isinstance(sender.track, PiCameraTrack):
+                frames_sent += sender.track.frames_sent
+
+            report = await sender.getStats()
+            for entry in report.values():
+                if entry.type == "outbound-rtp":
+                    stats["bytes_sent"] += entry.bytesSent
+                    stats["packets_sent"] += entry.packetsSent
+                elif entry.type == "remote-inbound-rtp":
+                    if entry.roundTripTime is not None:
+                        stats["rtt_ms"] = round(entry.roundTripTime * 1000, 1)
+                    stats["jitter"] = entry.jitter
+                    stats["packets_lost"] = entry.packetsLost
+                    stats["fraction_lost"] = entry.fractionLost
+
+            if stats["local_candidate_type"] is None:
+                stats["local_candidate_type"], stats["remote_candidate_type"] = self._selected_candidate_types(sender)
+
+        now = time.monotonic()
+        previous = self._previous.get(viewer_id)
+        if previous:
+            elapsed = now - previous[0]
+            if elapsed > 0:
+                stats["bitrate_kbps"] = round((stats["bytes_sent"] - previous[1]) * 8 / elapsed / 1000, 1)
+                stats["fps_sent"] = round((frames_sent - previous[2]) / elapsed, 1)
+        self._previous[viewer_id] = (now, stats["bytes_sent"], frames_sent)
+
+        return stats
+
+    @staticmethod
+    def _selected_candidate_types(sender: RTCRtpSender) -> Tuple[Optional[str], Optional[str]]:
+        # aiortc does not report candidate pairs, the nominated pair lives on the aioice connection
+        try:
+            connection = sender.transport.transport._connection
+            pair = next(iter(connection._nominated.values()), None)
+        except AttributeError:
+            return None, None
+        if pair is None:
+            return None, None
+        return pair.local_candidate.type, pair.remote_candidate.type
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self._history[-1] if self._history else None
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        samples = list(self._history)
+        return samples[-limit:] if limit else samples
+
+    def to_prometheus(self) -> str:
+        sample = self.latest()
+        viewers = sample["viewers"] if sample else {}
+
+        lines = [
+            "# HELP doorbell_webrtc_viewers Connected WebRTC viewers",
+            "# TYPE doorbell_webrtc_viewers gauge",
+            f"doorbell_webrtc_viewers {len(viewers)}",
+        ]
+        for name, (metric_type, description) in PROMETHEUS_METRICS.items():
+            lines.append(f"# HELP doorbell_webrtc_{name} {description}")
+            lines.append(f"# TYPE doorbell_webrtc_{name} {metric_type}")
+            for viewer_id, stats in viewers.items():
+                value = stats.get(name)
+                if value is None:
+                    continue
+                labels = (
+                    f'viewer="{viewer_id}",'
+                    f'local_candidate="{stats["local_candidate_type"] or "unknown"}",'
+                    f'remote_candidate="{stats["remote_candidate_type"] or "unknown"}"'
+                )
+                lines.append(f"doorbell_webrtc_{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
@@ -21,7 +21,9 @@ class PiCameraTrack(VideoStreamTrack):
         if not self._initialized:
             logger.warning("PiCameraTrack initialized without a Picamera2 instance. Will send blank frames.")
         self._task = None
-
+        self.on_first_frame = None
+        self._first_frame_sent = False
+        self.frames_sent = 0
 
     async def recv(self):
         pts = int(time.monotonic_ns() / 1000)
@@ -40,6 +42,12 @@ class PiCameraTrack(VideoStreamTrack):
             frame = av.VideoFrame.from_ndarray(img_array, format="yuv420p")
             frame.pts = pts
             frame.time_base = time_base
+            self.frames_sent += 1
+
+            if not self._first_frame_sent:
+                self._first_frame_sent = True
+                if self.on_first_frame:
+                    self.on_first_frame()
             return frame
         except Exception as e:
             logger.error(f"Error capturing frame from PiCamera2: {str(e)}", exc_info=True)
@@ -0,0 +1,37 @@
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NegotiationTimeline:
+    """Timestamps of the offer -> answer -> connected -> first frame path of one viewer."""
+
+    STAGES = ("offer", "answer", "connected", "first_frame")
+
+    def __init__(self, viewer_id: str):
+        self.viewer_id = viewer_id
+        self._marks: Dict[str, float] = {}
+
+    def mark(self, stage: str) -> None:
+        if stage not in self.STAGES or stage in self._marks:
+            return
+        self._marks[stage] = time.monotonic()
+
+        elapsed_ms = self.elapsed_ms(stage)
+        if elapsed_ms is not None and stage != "offer":
+            logger.info(f"Viewer {self.viewer_id}: offer -> {stage} took {elapsed_ms:.1f} ms")
+
+    def elapsed_ms(self, stage: str) -> Optional[float]:
+        start = self._marks.get("offer")
+        end = self._marks.get(stage)
+        if start is None or end is None:
+            return None
+        return (end - start) * 1000
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        return {
+            f"offer_to_{stage}_ms": self.elapsed_ms(stage)
+            for stage in self.STAGES[1:]
+        }
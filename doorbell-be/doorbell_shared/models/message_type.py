@@ -37,3 +37,6 @@ class MessageType(enum.Enum):
     CAPTURE_ACK = 17
 
     ERROR = 18
+
+    STREAM_STATS_REQUEST = 19
+    STREAM_STATS = 20
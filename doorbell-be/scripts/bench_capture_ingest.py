@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from doorbell_api.helpers.executor import BoundedExecutor
+from doorbell_api.helpers.image import ImageHelper
+
+WIDTH = 1280
+HEIGHT = 720
+
+
+def make_frame(seed: int) -> bytes:
+    # Gradient luma and flat chroma, close enough to a camera frame for PNG compression cost
+    luma = bytes((x + seed) % 220 + 16 for x in range(WIDTH)) * HEIGHT
+    chroma = bytes([128]) * (WIDTH * HEIGHT // 4)
+    return luma + chroma + chroma
+
+
+def ffmpeg_convert(data: bytes, out_path: Path) -> None:
+    # The previous ingestion path: temp file + ffmpeg subprocess per capture
+    with tempfile.NamedTemporaryFile(suffix=".yuv", delete=False) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "rawvideo", "-pixel_format", "yuv420p",
+            "-s", f"{WIDTH}x{HEIGHT}", "-i", tmp_path, str(out_path)
+        ], check=True, capture_output=True)
+    finally:
+        os.unlink(tmp_path)
+
+
+async def bench_subprocess(frames, out_dir: Path) -> float:
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        ffmpeg_convert(frame, out_dir / f"sub_{i}.png")
+    return len(frames) / (time.perf_counter() - start)
+
+
+async def bench_in_process(frames, out_dir: Path, workers: int, max_pending: int) -> float:
+    executor = BoundedExecutor(workers, max_pending, "bench")
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        executor.run(ImageHelper.save_yuv420_as_png, frame, WIDTH, HEIGHT, out_dir / f"inproc_{i}.png")
+        for i, frame in enumerate(frames)
+    ))
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return len(frames) / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Captures/sec of the capture ingestion paths")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=8)
+    args = parser.parse_args()
+
+    frames = [make_frame(i) for i in range(args.frames)]
+    out_dir = Path(tempfile.mkdtemp(prefix="capture_bench_"))
+    try:
+        if shutil.which("ffmpeg"):
+            print(f"ffmpeg subprocess: {await bench_subprocess(frames, out_dir):.1f} captures/sec")
+        else:
+            print("ffmpeg subprocess: skipped, ffmpeg not found")
+
+        rate = await bench_in_process(frames, out_dir, args.workers, args.max_pending)
+        print(f"in-process pool ({args.workers} workers): {rate:.1f} captures/sec")
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import random
+from itertools import count
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Stand-in for the FCM v1 send API, point the API at it with FCM_ENDPOINT=http://localhost:9099
+# Tokens starting with "invalid" are reported as unregistered, --error-rate of the rest get a 503
+
+app = FastAPI()
+message_ids = count(1)
+options = argparse.Namespace(latency_ms=50, error_rate=0.0)
+stats = {"delivered": 0, "unregistered": 0, "unavailable": 0}
+
+
+def fcm_error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=code, content={"error": {"code": code, "message": message, "status": status}})
+
+
+@app.post("/v1/projects/{project_id}/messages:send")
+async def send(project_id: str, request: Request):
+    message = (await request.json()).get("message", {})
+    await asyncio.sleep(random.uniform(0.5, 1.5) * options.latency_ms / 1000)
+
+    if str(message.get("token", "")).startswith("invalid"):
+        stats["unregistered"] += 1
+        return fcm_error(404, "NOT_FOUND", "Requested entity was not found.")
+    if random.random() < options.error_rate:
+        stats["unavailable"] += 1
+        return fcm_error(503, "UNAVAILABLE", "The service is currently unavailable.")
+
+    stats["delivered"] += 1
+    return {"name": f"projects/{project_id}/messages/{next(message_ids)}"}
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake FCM endpoint for load tests")
+    parser.add_argument("--port", type=int, default=9099)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    options = parser.parse_args()
+    uvicorn.run(app, host="0.0.0.0", port=options.port)
@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+# Set before doorbell_api is imported, creating the app reads them. ENV is forced so a shell pointing at a
+# real database never gets its tables dropped by a test run
+_work_dir = tempfile.mkdtemp(prefix="doorbell-tests-")
+os.environ["ENV"] = "TEST"
+os.environ["TEST_DB_CONNECTION_STRING"] = f"sqlite+aiosqlite:///{_work_dir}/doorbell.db"
+os.environ["CAPTURE_DIR"] = _work_dir
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("JWT_ACCESS_SECRET_KEY", "test-access")
+os.environ.setdefault("JWT_ACCESS_TOKEN_EXPIRE", "900")
+os.environ.setdefault("JWT_REFRESH_SECRET_KEY", "test-refresh")
+os.environ.setdefault("JWT_REFRESH_TOKEN_EXPIRE", "9000")
+
+import pytest  # noqa: E402
+
+import doorbell_api  # noqa: E402,F401  Builds and wires the container
+from doorbell_api.configs.db import Base  # noqa: E402
+from doorbell_api.configs.db.context import get_db_instance  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    db = get_db_instance()
+    engine = db.session_factory.kw["bind"]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield db
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
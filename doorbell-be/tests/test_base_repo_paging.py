@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from doorbell_api.configs.db import own_session
+from doorbell_api.helpers import CursorHelper
+from doorbell_api.models import Notification
+from doorbell_api.repositories.impl import NotificationRepository
+
+pytestmark = pytest.mark.anyio
+
+ROWS = 25
+
+
+@pytest.fixture
+async def notification_ids(db):
+    base = datetime(2026, 1, 1)
+    async with own_session():
+        session = db.scoped_session()
+        # Three rows share every created_at, so pages have to break ties on id
+        session.add_all([Notification(title=f"n{i}", created_at=base + timedelta(minutes=i // 3)) for i in range(ROWS)])
+        await session.commit()
+        return [notification.id for notification in await NotificationRepository().get_all(page_size=ROWS)]
+
+
+async def read_pages(sort_order: str, page_size: int):
+    repo = NotificationRepository()
+    pages, cursor = [], None
+    while True:
+        async with own_session():
+            models, cursor = await repo.get_page(page_size=page_size, cursor=cursor, sort_order=sort_order)
+        pages.append([model.id for model in models])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_pages_cover_every_row_once_in_order(notification_ids, sort_order):
+    pages = await read_pages(sort_order, page_size=10)
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    expected = sorted(notification_ids, reverse=sort_order == "desc")
+    assert [model_id for page in pages for model_id in page] == expected
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_exact_multiple_ends_without_an_empty_page(notification_ids, sort_order):
+    pages = await read_pages(sort_order, page_size=5)
+
+    assert [len(page) for page in pages] == [5] * (ROWS // 5)
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_cursor_names_the_last_row_of_its_page(notification_ids, sort_order):
+    repo = NotificationRepository()
+    async with own_session():
+        models, cursor = await repo.get_page(page_size=4, sort_order=sort_order)
+
+    assert CursorHelper.decode(cursor) == (models[-1].created_at, models[-1].id)
+
+    async with own_session():
+        following, _ = await repo.get_page(page_size=4, cursor=cursor, sort_order=sort_order)
+    expected = sorted(notification_ids, reverse=sort_order == "desc")
+    assert [model.id for model in models + following] == expected[:8]
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        CursorHelper.decode("not a cursor!")
@@ -0,0 +1,63 @@
+import pytest
+
+from doorbell_api.configs.db import own_session
+from doorbell_api.repositories.impl import BlobRepository
+
+pytestmark = pytest.mark.anyio
+
+DIGEST_A = "a" * 64
+DIGEST_B = "b" * 64
+
+
+async def acquire(repo: BlobRepository, digest: str) -> int:
+    async with own_session():
+        count = await repo.acquire(digest, f"blobs/{digest}.png", 100)
+        await repo.session.commit()
+        return count
+
+
+async def release(repo: BlobRepository, digests: list) -> None:
+    async with own_session():
+        await repo.release(digests)
+        await repo.session.commit()
+
+
+async def ref_counts(repo: BlobRepository) -> dict:
+    async with own_session():
+        return {blob.digest: blob.ref_count for blob in await repo.get_all()}
+
+
+async def unreferenced(repo: BlobRepository) -> list:
+    async with own_session():
+        return sorted(blob.digest for blob in await repo.lock_unreferenced(10))
+
+
+async def test_acquiring_the_same_digest_counts_up(db):
+    repo = BlobRepository()
+
+    assert [await acquire(repo, DIGEST_A) for _ in range(3)] == [1, 2, 3]
+    assert await acquire(repo, DIGEST_B) == 1
+    assert await ref_counts(repo) == {DIGEST_A: 3, DIGEST_B: 1}
+
+
+async def test_release_drops_one_reference_per_listed_digest(db):
+    repo = BlobRepository()
+    for _ in range(3):
+        await acquire(repo, DIGEST_A)
+    await acquire(repo, DIGEST_B)
+
+    # A digest listed twice is released twice, as when two captures of the same frame go together
+    await release(repo, [DIGEST_A, DIGEST_B, DIGEST_A])
+
+    assert await ref_counts(repo) == {DIGEST_A: 1, DIGEST_B: 0}
+    assert await unreferenced(repo) == [DIGEST_B]
+
+
+async def test_reacquired_blob_is_referenced_again(db):
+    repo = BlobRepository()
+    await acquire(repo, DIGEST_A)
+    await release(repo, [DIGEST_A])
+    assert await unreferenced(repo) == [DIGEST_A]
+
+    assert await acquire(repo, DIGEST_A) == 1
+    assert await unreferenced(repo) == []
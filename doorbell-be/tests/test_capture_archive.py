@@ -0,0 +1,75 @@
+import io
+import tarfile
+
+import pytest
+
+from doorbell_api.services.impl import CaptureArchiveService, LocalObjectStorage
+from doorbell_api.services.impl import capture_archive
+
+pytestmark = pytest.mark.anyio
+
+FILES = {
+    "2026/01/01/a.png": b"a" * 700,
+    "2026/01/01/a_160.webp": b"b" * 512,
+    "2026/01/01/c.png": b"",
+    "2026/01/01/d.png": b"d" * 1500,
+}
+
+
+class FakeArchiveRepository:
+    """Lists FILES as the captures of one notification and keeps what the service indexes."""
+
+    def __init__(self):
+        self.archives: list = []
+
+    async def find_files(self, notification_id):
+        return [
+            ("2026/01/01/a.png", "digest-a", {"160_webp": "2026/01/01/a_160.webp"}),
+            ("2026/01/01/c.png", "digest-c", None),
+            ("2026/01/01/d.png", "digest-d", None),
+        ]
+
+    async def create_archive(self, notification_id, key, size, members):
+        self.archives.append((key, size, members))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalObjectStorage(str(tmp_path), fsync="none")
+
+
+@pytest.fixture
+def archive_service(storage):
+    return CaptureArchiveService(
+        object_storage=storage,
+        capture_archive_repo=FakeArchiveRepository(),
+        config={"archive": {"enabled": "true"}}
+    )
+
+
+async def test_packed_offsets_point_at_member_data(storage):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+        offsets = {path: CaptureArchiveService._pack(tar, path, data) for path, data in FILES.items()}
+    await storage.put("archive.tar", buffer.getvalue())
+
+    for path, (offset, size) in offsets.items():
+        assert size == len(FILES[path])
+        assert await storage.get_range("archive.tar", offset, size) == FILES[path]
+
+
+async def test_archived_notification_reads_back_from_the_archive(db, storage, archive_service, monkeypatch):
+    # Small enough that the tar rolls over from memory to a temp file while it is packed
+    monkeypatch.setattr(capture_archive, "SPOOL_MAX_BYTES", 1024)
+    for path, data in FILES.items():
+        await storage.put(path, data)
+
+    files, size = await archive_service._archive_notification(1)
+
+    [(key, archive_size, members)] = archive_service._archive_repo.archives
+    assert files == len(FILES)
+    assert size == archive_size == len(await storage.get(key))
+    for member in members:
+        assert await storage.get_range(key, member["offset"], member["size"]) == FILES[member["path"]]
+    for path in FILES:
+        assert not await storage.exists(path)
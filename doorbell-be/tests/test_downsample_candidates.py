@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from doorbell_api.configs.db import own_session
+from doorbell_api.models import Blob, Capture, Notification
+from doorbell_api.repositories.impl import CaptureRepository
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2026, 3, 1)
+OLD = NOW - timedelta(days=30)
+
+
+async def add_notification(session, created_at: datetime, sizes: list) -> list:
+    notification = Notification(title="motion", created_at=created_at)
+    session.add(notification)
+    await session.flush()
+    captures = []
+    for size in sizes:
+        digest = f"{notification.id}-{size}".ljust(64, "0")
+        session.add(Blob(digest=digest, path=f"blobs/{digest}.png", size=size, ref_count=1))
+        captures.append(Capture(notification_id=notification.id, path=f"{digest}.png", content_hash=digest))
+    session.add_all(captures)
+    await session.flush()
+    return [capture.id for capture in captures]
+
+
+async def find_candidates(limit: int) -> list:
+    async with own_session():
+        return await CaptureRepository().find_downsample_candidates(NOW - timedelta(days=7), limit)
+
+
+async def test_every_frame_but_the_largest_of_old_notifications(db):
+    async with own_session():
+        session = db.scoped_session()
+        old = await add_notification(session, OLD, [300, 900, 500])
+        await add_notification(session, OLD, [700])
+        await add_notification(session, NOW, [100, 200])
+        await session.commit()
+
+    assert await find_candidates(10) == [old[0], old[2]]
+
+
+async def test_batches_skip_notifications_down_to_one_frame(db):
+    async with own_session():
+        session = db.scoped_session()
+        await add_notification(session, OLD, [800])
+        first = await add_notification(session, OLD, [100, 200, 300])
+        second = await add_notification(session, OLD, [400, 500])
+        await session.commit()
+
+    assert await find_candidates(1) == [first[0]]
+    assert await find_candidates(3) == [first[0], first[1], second[0]]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+
+from doorbell_api.services.impl import QueryCache
+
+pytestmark = pytest.mark.anyio
+
+ADAPTER = TypeAdapter(str)
+
+
+def make_cache() -> QueryCache:
+    return QueryCache(config={"cache": {"enabled": "true", "ttl_seconds": "60", "max_entries": "16"}})
+
+
+async def test_second_read_is_a_hit():
+    cache = make_cache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return "value"
+
+    assert await cache.get_or_load("settings", "1", load, ADAPTER) == "value"
+    assert await cache.get_or_load("settings", "1", load, ADAPTER) == "value"
+    assert len(loads) == 1
+    assert cache.get_metrics()["hits"] == 1
+
+
+async def test_write_during_load_leaves_no_stale_entry():
+    cache = make_cache()
+    loading = asyncio.Event()
+    written = asyncio.Event()
+
+    async def load_before_write():
+        loading.set()
+        await written.wait()
+        return "old"
+
+    async def write():
+        await loading.wait()
+        await cache.invalidate("settings")
+        written.set()
+
+    stale, _ = await asyncio.gather(cache.get_or_load("settings", "1", load_before_write, ADAPTER), write())
+    assert stale == "old"
+
+    async def load_after_write():
+        return "new"
+
+    assert await cache.get_or_load("settings", "1", load_after_write, ADAPTER) == "new"
+
+
+async def test_invalidate_only_moves_its_namespace():
+    cache = make_cache()
+
+    async def load():
+        return "value"
+
+    await cache.get_or_load("settings", "1", load, ADAPTER)
+    await cache.get_or_load("notifications", "1", load, ADAPTER)
+    await cache.invalidate("notifications")
+
+    await cache.get_or_load("settings", "1", load, ADAPTER)
+    await cache.get_or_load("notifications", "1", load, ADAPTER)
+    assert cache.get_metrics()["hits"] == 1
+    assert cache.get_metrics()["misses"] == 3
@@ -0,0 +1,84 @@
+import os
+from fractions import Fraction
+
+import pytest
+
+from doorbell_api.services.impl.recording import (
+    H264_PPS_NAL_TYPE, H264_SPS_NAL_TYPE, RTP_VIDEO_CLOCK_RATE, SegmentedRecorder, _split_h264_nal_units
+)
+
+av = pytest.importorskip("av")
+
+# Not a multiple of the 16 pixel macroblock, the SPS has to crop it back
+WIDTH, HEIGHT = 200, 120
+FPS = 30
+FRAMES = 60
+
+
+def camera_frames():
+    """Annex-B access units with their 90 kHz timestamps, as the relay taps them off the camera's RTP stream."""
+    encoder = av.CodecContext.create("libx264", "w")
+    encoder.width, encoder.height = WIDTH, HEIGHT
+    encoder.pix_fmt = "yuv420p"
+    encoder.time_base = Fraction(1, FPS)
+    encoder.options = {"g": "15", "bframes": "0"}
+
+    packets = []
+    for index in range(FRAMES + 1):
+        frame = None
+        if index < FRAMES:
+            frame = av.VideoFrame(WIDTH, HEIGHT, "yuv420p")
+            for plane in frame.planes:
+                plane.update(os.urandom(plane.buffer_size))
+            frame.pts = index
+        packets.extend(encoder.encode(frame))
+    return [(bytes(packet), packet.pts * RTP_VIDEO_CLOCK_RATE // FPS) for packet in packets]
+
+
+def record(tmp_path, frames):
+    recorder = SegmentedRecorder(tmp_path, segment_seconds=1, queue_size=FRAMES)
+    recorder.start()
+    for data, timestamp in frames:
+        recorder.submit(data, timestamp)
+    recorder.close()
+    return sorted(tmp_path.glob("segment_*.mp4"))
+
+
+def parameter_set(data: bytes, nal_type: int) -> bytes:
+    return next(unit for unit in _split_h264_nal_units(data) if unit[0] & 0x1F == nal_type)
+
+
+def assert_segments_decode_at_camera_size(segments, sps: bytes):
+    assert len(segments) >= 2
+    decoded = 0
+    for segment in segments:
+        with av.open(str(segment)) as container:
+            stream = container.streams.video[0]
+            frames = list(container.decode(stream))
+            extradata = stream.codec_context.extradata
+        assert (stream.codec_context.width, stream.codec_context.height) == (WIDTH, HEIGHT)
+        assert {(frame.width, frame.height) for frame in frames} == {(WIDTH, HEIGHT)}
+        # The avcC holds the camera's own SPS, not one of an encoder opened for the track
+        assert sps in extradata
+        decoded += len(frames)
+    assert decoded == FRAMES
+
+
+def test_segments_keep_the_camera_size_and_parameter_sets(tmp_path):
+    frames = camera_frames()
+    sps = parameter_set(frames[0][0], H264_SPS_NAL_TYPE)
+
+    assert_segments_decode_at_camera_size(record(tmp_path, frames), sps)
+
+
+def test_segments_starting_on_a_bare_idr_get_the_last_parameter_sets(tmp_path):
+    frames = camera_frames()
+    sps = parameter_set(frames[0][0], H264_SPS_NAL_TYPE)
+    # Cameras that only send SPS/PPS once, every later keyframe is an IDR slice alone
+    bare = [frames[0]] + [
+        (b"".join(b"\x00\x00\x00\x01" + unit for unit in _split_h264_nal_units(data)
+                  if unit[0] & 0x1F not in (H264_SPS_NAL_TYPE, H264_PPS_NAL_TYPE)), timestamp)
+        for data, timestamp in frames[1:]
+    ]
+
+    assert_segments_decode_at_camera_size(record(tmp_path, bare), sps)
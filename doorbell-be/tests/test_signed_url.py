@@ -0,0 +1,25 @@
+from doorbell_api.helpers import SignedUrlHelper
+
+SECRET = "secret"
+
+
+def test_nginx_signature_matches_secure_link_md5():
+    # Example link of the nginx secure_link_md5 documentation, with the client address standing in for the user
+    assert SignedUrlHelper.nginx_signature("/s/link", 2147483647, "127.0.0.1", SECRET) == "_e4Nc3iduzkWRm01TBBNYw"
+
+
+def test_hmac_signature_verifies_until_it_expires():
+    signature = SignedUrlHelper.hmac_signature("a/b.png", 1000, "7", SECRET)
+
+    assert SignedUrlHelper.verify_hmac("a/b.png", 1000, "7", signature, SECRET, now=999)
+    assert SignedUrlHelper.verify_hmac("a/b.png", 1000, "7", signature, SECRET, now=1000)
+    assert not SignedUrlHelper.verify_hmac("a/b.png", 1000, "7", signature, SECRET, now=1001)
+
+
+def test_hmac_signature_is_bound_to_path_user_and_expiry():
+    signature = SignedUrlHelper.hmac_signature("a/b.png", 1000, "7", SECRET)
+
+    assert not SignedUrlHelper.verify_hmac("a/c.png", 1000, "7", signature, SECRET, now=0)
+    assert not SignedUrlHelper.verify_hmac("a/b.png", 1000, "8", signature, SECRET, now=0)
+    assert not SignedUrlHelper.verify_hmac("a/b.png", 2000, "7", signature, SECRET, now=0)
+    assert not SignedUrlHelper.verify_hmac("a/b.png", 1000, "7", signature, "other", now=0)
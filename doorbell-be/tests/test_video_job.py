@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from doorbell_api.helpers import DiskLRUCache
+from doorbell_api.services.impl import VideoJobService
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeCaptureService:
+    """Stands in for the ffmpeg encode, every video is held until the test releases it."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started: list = []
+        self.cancelled: list = []
+
+    async def get_video_key(self, paths):
+        return "-".join(paths).ljust(64, "0")
+
+    async def generate_video(self, paths, progress=None, spool=None):
+        self.started.append(paths)
+        try:
+            yield b"moov"
+            await self.release.wait()
+            yield b"mdat"
+        except asyncio.CancelledError:
+            self.cancelled.append(paths)
+            raise
+
+
+@pytest.fixture
+def capture_service():
+    return FakeCaptureService()
+
+
+@pytest.fixture
+async def video_jobs(capture_service, tmp_path):
+    service = VideoJobService(
+        capture_service=capture_service,
+        video_cache=DiskLRUCache(str(tmp_path), 1 << 20),
+        config={"video": {"workers": "1", "queue_size": "8"}}
+    )
+    yield service
+    capture_service.release.set()
+    for task in service._tasks:
+        task.cancel()
+    await asyncio.gather(*service._tasks, return_exceptions=True)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_same_frames_share_one_job(video_jobs, capture_service):
+    first_id, first = await video_jobs.open_stream(["a", "b"])
+    second_id, second = await video_jobs.open_stream(["a", "b"])
+    capture_service.release.set()
+
+    async with aclosing(first), aclosing(second):
+        assert [chunk async for chunk in first] == [b"moov", b"mdat"]
+        assert [chunk async for chunk in second] == [b"moov", b"mdat"]
+
+    assert first_id == second_id
+    assert capture_service.started == [["a", "b"]]
+    assert video_jobs.get_metrics()["deduplicated"] == 1
+
+
+async def test_interactive_request_promotes_a_queued_background_job(video_jobs):
+    await video_jobs.submit(["running"])
+    await settle()
+    background_id = await video_jobs.submit(["background"], background=True)
+    promoted_id = await video_jobs.submit(["promoted"], background=True)
+    assert video_jobs.get_status(promoted_id)["queue_position"] == 1
+
+    await video_jobs.submit(["promoted"])
+
+    promoted = video_jobs.get_status(promoted_id)
+    assert promoted["background"] is False
+    assert promoted["queue_position"] == 0
+    assert video_jobs.get_status(background_id)["queue_position"] == 1
+
+
+async def test_last_reader_leaving_cancels_the_encode(video_jobs, capture_service):
+    job_id, first = await video_jobs.open_stream(["a"])
+    _, second = await video_jobs.open_stream(["a"])
+
+    assert await first.__anext__() == b"moov"
+    assert await second.__anext__() == b"moov"
+
+    await first.aclose()
+    await settle()
+    assert video_jobs.get_status(job_id)["state"] == "running"
+
+    await second.aclose()
+    await settle()
+    assert video_jobs.get_status(job_id)["state"] == "cancelled"
+    assert capture_service.cancelled == [["a"]]
+
+
+async def test_background_job_outlives_its_readers(video_jobs, capture_service):
+    job_id = await video_jobs.submit(["a"], background=True)
+    await settle()
+
+    capture_service.release.set()
+    assert await video_jobs.wait(job_id) == "done"
+    assert video_jobs.get_video_path(job_id) is None  # The fake encode never went through the cache
+    assert capture_service.cancelled == []
@@ -25,5 +25,4 @@ class EnvConfig {
   static String get turnHost => dotenv.env['TURN_HOST'] ?? 'stun.l.google.com';
   static String? get turnSecret => dotenv.env['TURN_SECRET'];
   static String? get signalingWebsocket =>  dotenv.env['SIGNALING_WS'];
-  static String? get captureBase  =>  dotenv.env['CAPTURES'];
 }
@@ -4,6 +4,7 @@ class CaptureDTO {
   final String createdAt;
   final int? notificationId;
   final String? userId;
+  final Map<String, String> variants;
 
   CaptureDTO({
     this.id,
@@ -11,8 +12,24 @@ class CaptureDTO {
     required this.createdAt,
     this.notificationId,
     this.userId,
+    this.variants = const {},
   });
 
+  /// Name of the smallest stored variant at least [width] pixels wide, null for the original.
+  String? variantForWidth(int width) {
+    String? best;
+    int? bestWidth;
+    variants.forEach((key, variantPath) {
+      final variantWidth = int.tryParse(key.split('_').first);
+      if (variantWidth == null || variantWidth < width) return;
+      if (bestWidth == null || variantWidth < bestWidth!) {
+        best = key;
+        bestWidth = variantWidth;
+      }
+    });
+    return best;
+  }
+
   Map<String, dynamic> toMap() {
     return {
       if (id != null) 'id': id,
@@ -20,6 +37,7 @@ class CaptureDTO {
       'created_at': createdAt,
       if (notificationId != null) 'notification_id': notificationId,
       if (userId != null) 'user_id': userId,
+      if (variants.isNotEmpty) 'variants': variants,
     };
   }
 
@@ -30,6 +48,8 @@ class CaptureDTO {
       createdAt: map['created_at'] as String? ?? DateTime.now().toIso8601String(),
       notificationId: map['notification_id'] as int?,
       userId: map['user_id'] as String?,
+      variants: (map['variants'] as Map<String, dynamic>? ?? {})
+          .map((key, value) => MapEntry(key, value as String)),
     );
   }
 }
@@ -0,0 +1,27 @@
+/// Short-lived URLs of a capture and its variants, as handed out by POST /capture/signed-urls.
+class SignedCaptureDTO {
+  final String url;
+  final int expires;
+  final Map<String, String> variants;
+
+  SignedCaptureDTO({
+    required this.url,
+    required this.expires,
+    this.variants = const {},
+  });
+
+  DateTime get expiresAt =>
+      DateTime.fromMillisecondsSinceEpoch(expires * 1000, isUtc: true);
+
+  /// URL of the [variant] named by CaptureDTO.variantForWidth, the original capture when null or unsigned.
+  String urlFor(String? variant) => variants[variant] ?? url;
+
+  factory SignedCaptureDTO.fromMap(Map<String, dynamic> map) {
+    return SignedCaptureDTO(
+      url: map['url'] as String,
+      expires: map['expires'] as int,
+      variants: (map['variants'] as Map<String, dynamic>? ?? {})
+          .map((key, value) => MapEntry(key, value as String)),
+    );
+  }
+}
@@ -28,7 +28,7 @@ class _NotificationListScreenState extends State<NotificationListScreen> {
   List<NotificationDTO> _notifications = [];
   bool _enableGrouping = true;
 
-  int _currentPage = 1;
+  String? _nextCursor;
   final int _pageSize = 20;
   bool _hasMoreData = true;
   bool _isLoadingMore = false;
@@ -55,30 +55,28 @@ class _NotificationListScreenState extends State<NotificationListScreen> {
       setState(() {
         _isLoading = true;
         _hasError = false;
-        _currentPage = 1;
+        _nextCursor = null;
         _hasMoreData = true;
       });
     }
 
     try {
-      final notifications = await _apiService.getAllNotifications(
-        page: loadMore ? _currentPage + 1 : 1,
+      final page = await _apiService.getAllNotifications(
+        cursor: loadMore ? _nextCursor : null,
         pageSize: _pageSize,
-        sortBy: 'created_at',
         sortOrder: 'desc',
       );
 
       setState(() {
         if (loadMore) {
-          _notifications.addAll(notifications);
-          _currentPage++;
+          _notifications.addAll(page.notifications);
           _isLoadingMore = false;
-          _hasMoreData = notifications.length == _pageSize;
         } else {
-          _notifications = notifications;
+          _notifications = page.notifications;
           _isLoading = false;
-          _hasMoreData = notifications.length == _pageSize;
         }
+        _nextCursor = page.nextCursor;
+        _hasMoreData = page.nextCursor != null;
       });
     } catch (e) {
       setState(() {
@@ -93,7 +91,7 @@ class _NotificationListScreenState extends State<NotificationListScreen> {
   Future<void> _refreshNotifications() async {
     setState(() {
       _expandedCards.clear();
-      _currentPage = 1;
+      _nextCursor = null;
       _hasMoreData = true;
       _notifications.clear();
     });
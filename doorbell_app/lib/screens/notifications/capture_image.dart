@@ -0,0 +1,79 @@
+import 'package:flutter/material.dart';
+import 'package:get_it/get_it.dart';
+import '../../models/capture.dart';
+import '../../services/capture_url_service.dart';
+
+/// Image.network over the signed URL of a capture, [pixelWidth] picks the smallest variant wide enough
+class CaptureImage extends StatefulWidget {
+  final CaptureDTO capture;
+  final int? pixelWidth;
+  final double? width;
+  final double? height;
+  final BoxFit? fit;
+  final ImageErrorWidgetBuilder? errorBuilder;
+  final ImageLoadingBuilder? loadingBuilder;
+
+  const CaptureImage({
+    super.key,
+    required this.capture,
+    this.pixelWidth,
+    this.width,
+    this.height,
+    this.fit,
+    this.errorBuilder,
+    this.loadingBuilder,
+  });
+
+  @override
+  State<CaptureImage> createState() => _CaptureImageState();
+}
+
+class _CaptureImageState extends State<CaptureImage> {
+  late Future<String?> _url;
+
+  @override
+  void initState() {
+    super.initState();
+    _url = _sign();
+  }
+
+  @override
+  void didUpdateWidget(covariant CaptureImage oldWidget) {
+    super.didUpdateWidget(oldWidget);
+    if (oldWidget.capture.path != widget.capture.path ||
+        oldWidget.pixelWidth != widget.pixelWidth) {
+      _url = _sign();
+    }
+  }
+
+  Future<String?> _sign() => GetIt.instance<CaptureUrlService>().urlFor(
+    widget.capture,
+    width: widget.pixelWidth,
+  );
+
+  @override
+  Widget build(BuildContext context) {
+    return FutureBuilder<String?>(
+      future: _url,
+      builder: (context, snapshot) {
+        if (snapshot.connectionState != ConnectionState.done) {
+          return SizedBox(width: widget.width, height: widget.height);
+        }
+        final url = snapshot.data;
+        if (url == null) {
+          final error = StateError('No signed URL for ${widget.capture.path}');
+          return widget.errorBuilder?.call(context, error, null) ??
+              SizedBox(width: widget.width, height: widget.height);
+        }
+        return Image.network(
+          url,
+          width: widget.width,
+          height: widget.height,
+          fit: widget.fit,
+          errorBuilder: widget.errorBuilder,
+          loadingBuilder: widget.loadingBuilder,
+        );
+      },
+    );
+  }
+}
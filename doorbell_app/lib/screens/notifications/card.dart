@@ -1,6 +1,6 @@
-import 'package:doorbell_app/config/env_config.dart';
 import 'package:flutter/material.dart';
 import '../../models/notification.dart';
+import 'capture_image.dart';
 import '../../utils/date_formatter.dart';
 
 class NotificationCard extends StatefulWidget {
@@ -28,7 +28,6 @@ class _NotificationCardState extends State<NotificationCard>
     with SingleTickerProviderStateMixin {
   late AnimationController _animationController;
   late Animation<double> _expandAnimation;
-  final captureBaseUrl = EnvConfig.captureBase ?? '';
 
   @override
   void initState() {
@@ -334,8 +333,9 @@ class _NotificationCardState extends State<NotificationCard>
                                 ),
                                 child: ClipRRect(
                                   borderRadius: BorderRadius.circular(9),
-                                  child: Image.network(
-                                    captureBaseUrl + entry.value.path,
+                                  child: CaptureImage(
+                                    capture: entry.value,
+                                    pixelWidth: (56 * MediaQuery.of(context).devicePixelRatio).ceil(),
                                     width: 56,
                                     height: 56,
                                     fit: BoxFit.cover,
@@ -553,8 +553,9 @@ class _NotificationCardState extends State<NotificationCard>
                                             borderRadius: BorderRadius.circular(11),
                                             child: Stack(
                                               children: [
-                                                Image.network(
-                                                  captureBaseUrl + captures[index].path,
+                                                CaptureImage(
+                                                  capture: captures[index],
+                                                  pixelWidth: (96 * MediaQuery.of(context).devicePixelRatio).ceil(),
                                                   width: 96,
                                                   height: 96,
                                                   fit: BoxFit.cover,
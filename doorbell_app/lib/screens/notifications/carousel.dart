@@ -5,7 +5,7 @@ import 'package:get_it/get_it.dart';
 import '../../models/notification.dart';
 import '../../utils/date_formatter.dart';
 import '../../services/api_service.dart';
-import '../../config/env_config.dart';
+import 'capture_image.dart';
 
 class MediaCarouselScreen extends StatefulWidget {
   final NotificationDTO notification;
@@ -420,7 +420,6 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
 
   Widget _buildImageCarousel() {
     final captures = widget.notification.captures ?? [];
-    final captureBaseUrl = EnvConfig.captureBase ?? '';
 
     return PageView.builder(
       controller: _pageController,
@@ -431,9 +430,6 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
       },
       itemCount: captures.length,
       itemBuilder: (context, index) {
-        // Construct full image URL using captureBase + capture path
-        final imageUrl = '$captureBaseUrl/${captures[index].path}';
-
         return Container(
           margin: EdgeInsets.symmetric(horizontal: 16),
           child: Center(
@@ -457,8 +453,8 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
                 ),
                 child: ClipRRect(
                   borderRadius: BorderRadius.circular(16),
-                  child: Image.network(
-                    imageUrl,
+                  child: CaptureImage(
+                    capture: captures[index],
                     fit: BoxFit.contain,
                     errorBuilder: (context, error, stackTrace) {
                       return Container(
@@ -486,7 +482,7 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
                             ),
                             SizedBox(height: 8),
                             Text(
-                              imageUrl,
+                              captures[index].path,
                               style: TextStyle(
                                 color: Colors.grey[600],
                                 fontSize: 10,
@@ -544,7 +540,6 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
   @override
   Widget build(BuildContext context) {
     final captures = widget.notification.captures ?? [];
-    final captureBaseUrl = EnvConfig.captureBase ?? '';
 
     if (_isCreatingVideo) {
       return Scaffold(
@@ -796,8 +791,6 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
                           scrollDirection: Axis.horizontal,
                           itemCount: captures.length,
                           itemBuilder: (context, index) {
-                            final thumbnailUrl = '$captureBaseUrl/${captures[index].path}';
-
                             return GestureDetector(
                               onTap: () {
                                 _pageController.animateToPage(
@@ -821,8 +814,9 @@ class _MediaCarouselScreenState extends State<MediaCarouselScreen>
                                 ),
                                 child: ClipRRect(
                                   borderRadius: BorderRadius.circular(6),
-                                  child: Image.network(
-                                    thumbnailUrl,
+                                  child: CaptureImage(
+                                    capture: captures[index],
+                                    pixelWidth: (60 * MediaQuery.of(context).devicePixelRatio).ceil(),
                                     fit: BoxFit.cover,
                                     errorBuilder: (context, error, stackTrace) {
                                       return Container(
@@ -6,6 +6,7 @@ import 'package:http/http.dart' as http;
 import 'package:doorbell_app/models/settings.dart' as app_settings_model;
 import 'package:doorbell_app/services/auth_service.dart';
 import 'package:doorbell_app/models/notification.dart';
+import 'package:doorbell_app/models/signed_capture.dart';
 import 'package:get_it/get_it.dart';
 import 'dart:io';
 import 'package:path_provider/path_provider.dart';
@@ -16,18 +17,17 @@ class ApiService {
   AuthService get authService => _serviceLocator<AuthService>();
   String get apiUrl => EnvConfig.apiUrl!;
 
-  Future<List<NotificationDTO>> getAllNotifications({
-    int page = 1,
+  /// Pages by cursor, pass the returned nextCursor to get the following page,
+  /// it is null on the last one
+  Future<({List<NotificationDTO> notifications, String? nextCursor})>
+  getAllNotifications({
+    String? cursor,
     int pageSize = 20,
-    String? sortBy,
     String? sortOrder,
   }) async {
-    final queryParams = {
-      'page': page.toString(),
-      'page_size': pageSize.toString(),
-    };
-    if (sortBy != null) {
-      queryParams['sort_by'] = sortBy;
+    final queryParams = {'page_size': pageSize.toString()};
+    if (cursor != null) {
+      queryParams['cursor'] = cursor;
     }
     if (sortOrder != null) {
       queryParams['sort_order'] = sortOrder;
@@ -45,12 +45,17 @@ class ApiService {
 
       if (response.statusCode == 200) {
         final List<dynamic> notificationsJson = jsonDecode(response.body);
-        return notificationsJson
-            .map(
-              (jsonItem) =>
-                  NotificationDTO.fromMap(jsonItem as Map<String, dynamic>),
-            )
-            .toList();
+        final notifications =
+            notificationsJson
+                .map(
+                  (jsonItem) =>
+                      NotificationDTO.fromMap(jsonItem as Map<String, dynamic>),
+                )
+                .toList();
+        return (
+          notifications: notifications,
+          nextCursor: response.headers['x-next-cursor'],
+        );
       } else {
         print(
           'Failed to fetch notifications: ${response.statusCode} - ${response.body}',
@@ -67,7 +72,8 @@ class ApiService {
 
   Future<void> syncNotifications() async {
     try {
-      final allNotifications = await getAllNotifications(pageSize: 100);
+      final allNotifications =
+          (await getAllNotifications(pageSize: 100)).notifications;
       for (var notification in allNotifications) {
         await DatabaseHelper.instance.insertNotification(notification);
       }
@@ -188,6 +194,71 @@ class ApiService {
     }
   }
 
+  /// Signed URLs keyed by capture path, paths the user may not see are left out of the result
+  Future<Map<String, SignedCaptureDTO>> signCaptureUrls(
+    List<String> capturePaths,
+  ) async {
+    final response = await authService.authorizedRequest(
+      (headers) => http.post(
+        Uri.parse('$apiUrl/capture/signed-urls'),
+        body: jsonEncode({'capture_paths': capturePaths}),
+        headers: {...headers, 'Content-Type': 'application/json'},
+      ),
+    );
+    if (response.statusCode != 200) {
+      throw Exception(
+        'Failed to sign capture URLs: ${response.statusCode} - ${response.body}',
+      );
+    }
+    final Map<String, dynamic> signedJson = jsonDecode(response.body);
+    return signedJson.map(
+      (path, entry) => MapEntry(
+        path,
+        SignedCaptureDTO.fromMap(entry as Map<String, dynamic>),
+      ),
+    );
+  }
+
+  /// Links handed out by the API are relative to its host unless they point at an object store
+  String resolveMediaUrl(String url) => Uri.parse(apiUrl).resolve(url).toString();
+
+  Future<Map<String, dynamic>?> getVideoJob(String jobId) async {
+    final response = await authService.authorizedRequest(
+      (headers) => http.get(
+        Uri.parse('$apiUrl/capture/videos/$jobId'),
+        headers: headers,
+      ),
+    );
+    if (response.statusCode == 200) {
+      return jsonDecode(response.body) as Map<String, dynamic>;
+    }
+    print('Failed to get video job $jobId: ${response.statusCode}');
+    return null;
+  }
+
+  /// Waits for a video job to finish and downloads it from its signed media URL
+  Future<bool> _downloadFinishedVideo(String jobId, File videoFile) async {
+    for (var attempt = 0; attempt < 60; attempt++) {
+      final job = await getVideoJob(jobId);
+      final state = job?['state'];
+      if (job == null || state == 'failed' || state == 'cancelled') {
+        return false;
+      }
+      final media = job['media'] as Map<String, dynamic>?;
+      if (state == 'done') {
+        if (media == null) return false;
+        final response = await http.get(
+          Uri.parse(resolveMediaUrl(media['url'] as String)),
+        );
+        if (response.statusCode != 200) return false;
+        await videoFile.writeAsBytes(response.bodyBytes);
+        return true;
+      }
+      await Future.delayed(const Duration(seconds: 2));
+    }
+    return false;
+  }
+
   Future<String?> generateStopMotionVideo(
     List<String> capturePaths, {
     Function(double)? onProgress,
@@ -233,6 +304,8 @@ class ApiService {
         final contentLength = streamedResponse.contentLength;
         int receivedBytes = 0;
 
+        final jobId = streamedResponse.headers['x-video-job'];
+        Object? streamError;
         try {
           await for (final chunk in streamedResponse.stream) {
             sink.add(chunk);
@@ -243,10 +316,22 @@ class ApiService {
               if (onProgress != null) onProgress(progress);
             }
           }
+        } catch (e) {
+          streamError = e;
         } finally {
           await sink.close();
         }
 
+        if (streamError != null) {
+          // Pregenerated or shared encodes carry on without this reader, a finished one is
+          // picked up from its signed media link instead of failing the whole request
+          if (jobId == null) throw streamError;
+          if (onStatusUpdate != null) onStatusUpdate('Waiting for video...');
+          if (!await _downloadFinishedVideo(jobId, videoFile)) {
+            throw streamError;
+          }
+        }
+
         if (onStatusUpdate != null) onStatusUpdate('Video ready!');
         if (onProgress != null) onProgress(1.0);
 
@@ -0,0 +1,53 @@
+import 'dart:async';
+import 'package:doorbell_app/models/capture.dart';
+import 'package:doorbell_app/models/signed_capture.dart';
+import 'package:doorbell_app/services/api_service.dart';
+import 'package:get_it/get_it.dart';
+
+/// Hands out signed capture URLs, captures asked for while a frame builds are signed in one request
+class CaptureUrlService {
+  final GetIt _serviceLocator = GetIt.instance;
+
+  ApiService get apiService => _serviceLocator<ApiService>();
+
+  /// Links are signed again this long before they expire, so an image never starts on a dead one
+  static const Duration refreshMargin = Duration(minutes: 1);
+
+  final Map<String, SignedCaptureDTO> _signed = {};
+  final Map<String, Completer<SignedCaptureDTO?>> _pending = {};
+  Timer? _batch;
+
+  /// URL of the smallest variant of [capture] at least [width] pixels wide, the original when null.
+  /// Null when the server did not sign the capture, it is gone or belongs to someone else
+  Future<String?> urlFor(CaptureDTO capture, {int? width}) async {
+    final signed = await _sign(capture.path);
+    if (signed == null) return null;
+    final variant = width == null ? null : capture.variantForWidth(width);
+    return apiService.resolveMediaUrl(signed.urlFor(variant));
+  }
+
+  Future<SignedCaptureDTO?> _sign(String path) {
+    final cached = _signed[path];
+    final refreshAt = DateTime.now().toUtc().add(refreshMargin);
+    if (cached != null && cached.expiresAt.isAfter(refreshAt)) {
+      return Future.value(cached);
+    }
+    final pending = _pending.putIfAbsent(path, () => Completer<SignedCaptureDTO?>());
+    _batch ??= Timer(Duration.zero, _flush);
+    return pending.future;
+  }
+
+  Future<void> _flush() async {
+    _batch = null;
+    final batch = Map.of(_pending);
+    _pending.clear();
+    try {
+      final signed = await apiService.signCaptureUrls(batch.keys.toList());
+      _signed.addAll(signed);
+      batch.forEach((path, completer) => completer.complete(signed[path]));
+    } catch (e) {
+      print('Error signing capture URLs: $e');
+      batch.forEach((path, completer) => completer.complete(null));
+    }
+  }
+}